@@ -0,0 +1,304 @@
+"""Benchmark suite for the simulation hot paths"""
+
+import argparse
+import copy
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+import zmq
+
+from silent_sky.agent import BatchedDummyAgent
+from silent_sky.bridge.protocol import SnapshotEncoder, capture_state
+from silent_sky.bridge.recording import BridgeRecorder
+from silent_sky.bridge.zmq_bridge import ZMQBridge
+from silent_sky.runner.episode import make_env, make_agent, play_episode, episode_summary
+from silent_sky.utils.benchmark import latency_stats, measure, save_results, load_results, compare_results
+from silent_sky.utils.config import load_config
+from silent_sky.utils.logging import EpisodeLogger
+
+
+STRATEGIES = ["greedy", "round_robin", "hybrid"]
+FORMATS = ["json", "pickle", "columnar", "stream"]
+
+
+def sized_config(config, num_sectors, episode_length):
+    """Copy of config with the given sky size and episode length"""
+    config = copy.deepcopy(config)
+    config["environment"]["num_sectors"] = num_sectors
+    config["environment"]["episode_length"] = episode_length
+    return config
+
+
+def record_episode(env, agent, seed):
+    """Run one episode and collect the same episode_data as run_episode.py"""
+    episode_data = {"seed": seed, "timesteps": [], "actions": [], "observations": [], "rewards": [], "info": []}
+    observation, info = env.reset(seed=seed)
+    agent.reset(seed=seed)
+    total_reward = 0.0
+    done = False
+    while not done:
+        action = agent.act(observation)
+        next_observation, reward, terminated, truncated, step_info = env.step(action)
+        episode_data["timesteps"].append(env.state.timestep)
+        episode_data["actions"].append(action)
+        episode_data["observations"].append({k: v.tolist() for k, v in observation.items()})
+        episode_data["rewards"].append(float(reward))
+        episode_data["info"].append(step_info)
+        total_reward += reward
+        observation = next_observation
+        done = terminated or truncated
+    episode_data["final_state"] = episode_summary(env, total_reward)
+    return episode_data
+
+
+def bench_env(results, config, sectors, length, args):
+    env = make_env(config)
+    results[f"env.reset[S={sectors}]"] = latency_stats(
+        measure(lambda: env.reset(seed=args.seed), repeat=args.repeat)
+    )
+    
+    rng = np.random.RandomState(args.seed)
+    durations = []
+    for episode in range(args.episodes):
+        env.reset(seed=args.seed + episode)
+        done = False
+        while not done:
+            action = {"sector": int(rng.randint(sectors)), "exposure_mode": int(rng.randint(3))}
+            start = time.perf_counter_ns()
+            _, _, terminated, truncated, _ = env.step(action)
+            durations.append(time.perf_counter_ns() - start)
+            done = terminated or truncated
+    results[f"env.step[S={sectors},T={length}]"] = latency_stats(durations)
+
+
+def bench_agent(results, config, sectors, args):
+    env = make_env(config)
+    observations = []
+    observation, _ = env.reset(seed=args.seed)
+    rng = np.random.RandomState(args.seed)
+    done = False
+    while not done and len(observations) < args.repeat:
+        observations.append(observation)
+        action = {"sector": int(rng.randint(sectors)), "exposure_mode": 1}
+        observation, _, terminated, truncated, _ = env.step(action)
+        done = terminated or truncated
+    
+    for strategy in STRATEGIES + ["random"]:
+        agent = make_agent(strategy, seed=args.seed)
+        durations = []
+        for _ in range(max(1, args.repeat // len(observations))):
+            for observation in observations:
+                start = time.perf_counter_ns()
+                agent.act(observation)
+                durations.append(time.perf_counter_ns() - start)
+        results[f"agent.act[{strategy},S={sectors}]"] = latency_stats(durations)
+        
+        # Same observations stacked into one batch; ops/s counts episode-steps
+        batch = {k: np.stack([o[k] for o in observations]) for k in ("sensor_readings", "sensor_confidence")}
+        batched_agent = BatchedDummyAgent(strategy, seeds=[args.seed + i for i in range(len(observations))])
+        durations = measure(lambda: batched_agent.act(batch), repeat=max(1, args.repeat // 10))
+        results[f"agent.act_batched[{strategy},S={sectors},B={len(observations)}]"] = latency_stats(
+            durations, items=len(durations) * len(observations)
+        )
+
+
+def bench_bridge(results, config, sectors, length, args):
+    for schema_version in (1, 2):
+        bridge = ZMQBridge(
+            pub_port=args.port,
+            rep_port=args.port + 1,
+            enabled=True,
+            schema_version=schema_version
+        )
+        bridge.start()
+        
+        # Local subscriber draining the PUB socket
+        context = zmq.Context.instance()
+        subscriber = context.socket(zmq.SUB)
+        subscriber.connect(f"tcp://localhost:{args.port}")
+        subscriber.setsockopt(zmq.SUBSCRIBE, b"")
+        received = []
+        stop = threading.Event()
+        
+        def drain():
+            while not stop.is_set():
+                if subscriber.poll(50):
+                    received.append(len(subscriber.recv_multipart()))
+        
+        drainer = threading.Thread(target=drain, daemon=True)
+        drainer.start()
+        time.sleep(0.2)  # Let the subscription reach the publisher
+        
+        env = make_env(config)
+        agent = make_agent("greedy", seed=args.seed)
+        durations = []
+        for episode in range(args.episodes):
+            observation, _ = env.reset(seed=args.seed + episode)
+            agent.reset(seed=args.seed + episode)
+            done = False
+            while not done:
+                observation, _, terminated, truncated, info = env.step(agent.act(observation))
+                start = time.perf_counter_ns()
+                bridge.send_state(env.state, observation, info)
+                durations.append(time.perf_counter_ns() - start)
+                done = terminated or truncated
+        
+        time.sleep(0.1)
+        stop.set()
+        drainer.join()
+        subscriber.close()
+        bridge.stop()
+        results[f"bridge.send_state[v{schema_version},S={sectors},T={length}]"] = latency_stats(durations)
+
+
+def bench_long_episode(results, config, sectors, args):
+    """
+    Per-step cost of the schema_version 2 encoders early and late in one long episode
+    
+    The bridge, the events topic and BridgeRecorder each run a SnapshotEncoder,
+    whose cost should follow the active events, not the episode length.
+    Returns the cases whose late p50 exceeds max_growth times the early p50.
+    """
+    length = args.long_length
+    env = make_env(sized_config(config, sectors, length))
+    agent = make_agent("greedy", seed=args.seed)
+    encoder = SnapshotEncoder()
+    durations = {"encode": [], "record": []}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = BridgeRecorder(Path(tmp) / "bench.ssrec")
+        observation, _ = env.reset(seed=args.seed)
+        agent.reset(seed=args.seed)
+        done = False
+        while not done:
+            observation, _, terminated, truncated, info = env.step(agent.act(observation))
+            capture = capture_state(env.state, observation, info)
+            start = time.perf_counter_ns()
+            encoder.encode(capture)
+            durations["encode"].append(time.perf_counter_ns() - start)
+            start = time.perf_counter_ns()
+            recorder.record_capture(capture)
+            durations["record"].append(time.perf_counter_ns() - start)
+            done = terminated or truncated
+        recorder.close()
+    
+    grown = []
+    steps = len(durations["encode"])
+    tenth = max(1, steps // 10)
+    for name, samples in durations.items():
+        # Skip the first tenth (warm-up); compare the second with the last
+        early = latency_stats(samples[tenth:2 * tenth])
+        late = latency_stats(samples[-tenth:])
+        results[f"long.{name}[S={sectors},T={length},early]"] = early
+        results[f"long.{name}[S={sectors},T={length},late]"] = late
+        growth = late["p50_us"] / early["p50_us"]
+        print(f"long.{name}[S={sectors},T={length}]: p50 {early['p50_us']:.1f} -> {late['p50_us']:.1f} µs "
+              f"({growth:.2f}x, {len(env.state.events)} live events at the end)")
+        if growth > args.max_growth:
+            grown.append(f"long.{name}[S={sectors},T={length}]")
+    return grown
+
+
+def bench_logger(results, config, sectors, length, args):
+    env = make_env(config)
+    agent = make_agent("greedy", seed=args.seed)
+    episode_data = record_episode(env, agent, args.seed)
+    repeat = max(3, args.repeat // 20)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = EpisodeLogger(log_dir=tmp)
+        for fmt in FORMATS:
+            path = logger.save_episode(episode_data, format=fmt, filename="bench")
+            results[f"logger.save[{fmt},S={sectors},T={length}]"] = latency_stats(
+                measure(lambda: logger.save_episode(episode_data, format=fmt, filename="bench"), repeat=repeat)
+            )
+            results[f"logger.load[{fmt},S={sectors},T={length}]"] = latency_stats(
+                measure(lambda: logger.load_episode(path, format=fmt), repeat=repeat)
+            )
+
+
+def bench_loop(results, config, sectors, length, args):
+    env = make_env(config)
+    for strategy in STRATEGIES:
+        agent = make_agent(strategy, seed=args.seed)
+        durations = []
+        steps = 0
+        for episode in range(args.episodes):
+            start = time.perf_counter_ns()
+            summary = play_episode(env, agent, args.seed + episode)
+            durations.append(time.perf_counter_ns() - start)
+            steps += summary["steps"]
+        results[f"run_episode[{strategy},S={sectors},T={length}]"] = latency_stats(durations, items=steps)
+
+
+def print_results(results):
+    print(f"{'case':<48} {'ops/s':>12} {'p50 µs':>10} {'p99 µs':>10}")
+    for name, stats in results.items():
+        print(f"{name:<48} {stats['ops_per_s']:>12.1f} {stats['p50_us']:>10.1f} {stats['p99_us']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark env, agent, bridge and logger hot paths")
+    parser.add_argument("--cases", nargs="+", choices=["env", "agent", "bridge", "logger", "loop", "long"], default=["env", "agent", "bridge", "logger", "loop"], help="Benchmark groups to run (long: encoder cost over one long episode)")
+    parser.add_argument("--sectors", type=int, nargs="+", default=[19], help="Sector counts to benchmark")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1000], help="Episode lengths to benchmark")
+    parser.add_argument("--episodes", type=int, default=3, help="Episodes per step/loop case")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per call-level case")
+    parser.add_argument("--seed", type=int, default=0, help="Base random seed")
+    parser.add_argument("--port", type=int, default=5655, help="Base port for bridge cases (uses port and port+1)")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="Results file (JSON)")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed p50 slowdown vs baseline (0.10 = 10%%)")
+    parser.add_argument("--long-length", type=int, default=20000, help="Episode length of the long case")
+    parser.add_argument("--max-growth", type=float, default=1.5, help="Long case: allowed late/early p50 ratio")
+    parser.add_argument("--config", type=str, default=None, help="Config file path")
+    
+    args = parser.parse_args()
+    
+    base_config = load_config(args.config)
+    results = {}
+    grown = []
+    
+    for sectors in args.sectors:
+        if "long" in args.cases:
+            grown += bench_long_episode(results, base_config, sectors, args)
+        if "agent" in args.cases:
+            bench_agent(results, sized_config(base_config, sectors, max(args.lengths)), sectors, args)
+        for length in args.lengths:
+            config = sized_config(base_config, sectors, length)
+            if "env" in args.cases:
+                bench_env(results, config, sectors, length, args)
+            if "bridge" in args.cases:
+                bench_bridge(results, config, sectors, length, args)
+            if "logger" in args.cases:
+                bench_logger(results, config, sectors, length, args)
+            if "loop" in args.cases:
+                bench_loop(results, config, sectors, length, args)
+    
+    print_results(results)
+    save_results(results, args.output)
+    print(f"\nResults saved to: {args.output}")
+    
+    for case in grown:
+        print(f"  GROWTH {case}: late p50 above {args.max_growth:.2f}x early p50")
+    if args.baseline:
+        comparison = compare_results(results, load_results(args.baseline), tolerance=args.tolerance)
+        regressions = [c for c in comparison if c["regressed"]]
+        print(f"\nCompared {len(comparison)} cases against {args.baseline} (p50, tolerance {args.tolerance:.0%})")
+        for c in regressions:
+            print(f"  REGRESSION {c['case']}: {c['baseline']:.1f} -> {c['current']:.1f} µs ({c['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("  No regressions")
+    if grown:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Bridge load test - simulated Unity clients against a live ZMQBridge"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from silent_sky.bridge.loadtest import LoadTest, latency_cases
+from silent_sky.bridge.topics import DEFAULT_TOPIC_PORT, TOPICS
+from silent_sky.bridge.zmq_bridge import ZMQBridge
+from silent_sky.runner.episode import make_env, make_agent, env_directive_handler
+from silent_sky.runner.upgrade_roi import UPGRADES
+from silent_sky.utils.benchmark import compare_results, environment_info, load_results
+from silent_sky.utils.config import load_config
+
+
+def drive_bridge(config: dict, args, test: LoadTest) -> dict:
+    """Step episodes through a ZMQBridge for args.duration seconds; returns the test report"""
+    unity = config["unity"]
+    bridge = ZMQBridge(
+        pub_port=unity["pub_port"],
+        rep_port=unity["rep_port"],
+        enabled=True,
+        schema_version=unity.get("schema_version", 1),
+        keyframe_interval=unity.get("keyframe_interval", 100),
+        publish_mode=unity.get("publish_mode", "inline"),
+        target_fps=unity.get("target_fps"),
+        topics=unity.get("topics")
+    )
+    env = make_env(config)
+    agent = make_agent(config["agent"]["dummy_strategy"], seed=args.seed)
+    bridge.start()
+    bridge.set_directive_callback(env_directive_handler(env))
+    test.begin()
+    
+    interval = 1.0 / args.step_rate if args.step_rate else 0.0
+    steps = 0
+    episodes = 0
+    start = time.monotonic()
+    next_step = start
+    while time.monotonic() - start < args.duration:
+        observation, _ = env.reset(seed=args.seed + episodes)
+        agent.reset(seed=args.seed + episodes)
+        done = False
+        while not done and time.monotonic() - start < args.duration:
+            bridge.apply_directives(env.state.timestep)
+            observation, _, terminated, truncated, info = env.step(agent.act(observation))
+            bridge.send_state(env.state, observation, info)
+            steps += 1
+            done = terminated or truncated
+            if interval:
+                next_step += interval
+                delay = next_step - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_step = time.monotonic()  # Behind; don't burst
+        episodes += 1
+    elapsed = time.monotonic() - start
+    
+    time.sleep(0.2)  # Let the last messages and acks arrive
+    report = test.stop()  # Before the bridge, which fails unanswered directives
+    bridge.stop()
+    report["bridge"] = {"steps": steps, "episodes": episodes, "steps_per_s": steps / elapsed, **bridge.get_stats()}
+    return report
+
+
+def print_report(report: dict):
+    print(f"\nLoad test: {report['duration_s']:.1f}s")
+    bridge = report.get("bridge")
+    if bridge:
+        print(f"Bridge: {bridge['steps']} steps ({bridge['steps_per_s']:.0f}/s), {bridge['frames_sent']} frames sent, "
+              f"{bridge['frames_dropped']} conflated, {bridge['directives_applied']} directive requests applied")
+        snapshots = report["streams"].get("snapshots")
+        if snapshots and snapshots["last_seq"] is not None:
+            # Sent but still queued when the test stopped (slow viewers)
+            print(f"Slowest viewer was {bridge['frames_sent'] - 1 - snapshots['last_seq']} snapshots behind at stop")
+    
+    print(f"\n{'stream':<12} {'clients':>7} {'msg/s':>9} {'lost':>8} {'loss %':>8} {'unsynced':>9} "
+          f"{'size p50':>10} {'size max':>10} {'lat p50 µs':>11} {'lat p99 µs':>11}")
+    for stream, stats in report["streams"].items():
+        latency = stats["latency"] or {"p50_us": float("nan"), "p99_us": float("nan")}
+        print(f"{stream:<12} {stats['clients']:>7} {stats['messages_per_s']:>9.1f} {stats['lost']:>8} "
+              f"{100 * stats['loss_rate']:>7.2f}% {stats['unsynced']:>9} {stats['size']['p50']:>10.0f} "
+              f"{stats['size']['max']:>10} {latency['p50_us']:>11.1f} {latency['p99_us']:>11.1f}")
+    
+    directives = report.get("directives")
+    if directives:
+        ack = directives["ack"] or {"p50_us": float("nan"), "p99_us": float("nan"), "max_us": float("nan")}
+        statuses = ", ".join(f"{count} {status}" for status, count in sorted(directives["statuses"].items()))
+        print(f"\nDirectives: {directives['clients']} clients, {directives['acked']}/{directives['sent']} acked "
+              f"({directives['requests_per_s']:.1f}/s; {statuses or 'none'}), {directives['timeouts']} timed out")
+        print(f"  ack latency: p50 {ack['p50_us']:.1f} µs, p99 {ack['p99_us']:.1f} µs, max {ack['max_us']:.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the ZMQ bridge with simulated Unity clients")
+    parser.add_argument("--config", type=str, default=None, help="Config file path (unity section: ports, schema, topics)")
+    parser.add_argument("--attach", action="store_true", help="Test a bridge that is already running (e.g. run_episode.py --unity) instead of starting one")
+    parser.add_argument("--host", type=str, default="localhost", help="Bridge host for --attach")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--step-rate", type=float, default=60.0, help="Env steps per second of the built-in bridge (0: as fast as possible)")
+    parser.add_argument("--sectors", type=int, default=None, help="Sky size of the built-in bridge (environment.num_sectors)")
+    parser.add_argument("--schema-version", type=int, choices=[1, 2], default=None, help="Snapshot schema of the built-in bridge")
+    parser.add_argument("--publish-mode", choices=["inline", "background"], default=None, help="Publish mode of the built-in bridge")
+    parser.add_argument("--target-fps", type=float, default=None, help="Publisher frame cap for --publish-mode background")
+    parser.add_argument("--subscribers", type=int, default=4, help="Simulated viewers on the PUB socket")
+    parser.add_argument("--topics", nargs="+", choices=TOPICS, default=[], help="Also subscribe to these topics (enables unity.topics on the built-in bridge)")
+    parser.add_argument("--topic-subscribers", type=int, default=1, help="Simulated viewers per topic")
+    parser.add_argument("--directive-clients", type=int, default=1, help="Clients sending directives")
+    parser.add_argument("--directive-rate", type=float, default=2.0, help="Directive requests per second per client (0: back to back)")
+    parser.add_argument("--upgrade-fraction", type=float, default=0.1, help="Share of directive requests that purchase an upgrade")
+    parser.add_argument("--process-delay", type=float, default=0.0, help="Seconds each viewer spends per message (simulates a slow Unity frame)")
+    parser.add_argument("--rcvhwm", type=int, default=1000, help="Viewer receive high-water mark (messages queued before loss)")
+    parser.add_argument("--no-decode", action="store_true", help="Only parse v2 headers instead of decoding every snapshot")
+    parser.add_argument("--processes", type=int, default=None, help="Client worker processes (default: min(CPU count, clients))")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed for episodes and directives")
+    parser.add_argument("--output", type=str, default=None, help="Save the report (JSON)")
+    parser.add_argument("--baseline", type=str, default=None, help="Report to compare latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed p50 latency growth vs baseline (0.10 = 10%%)")
+    parser.add_argument("--max-loss", type=float, default=None, help="Fail if any stream loses more than this share of messages")
+    
+    args = parser.parse_args()
+    
+    config = load_config(args.config)
+    unity = config["unity"]
+    if args.sectors is not None:
+        config["environment"]["num_sectors"] = args.sectors
+    if args.schema_version is not None:
+        unity["schema_version"] = args.schema_version
+    if args.publish_mode is not None:
+        unity["publish_mode"] = args.publish_mode
+    if args.target_fps is not None:
+        unity["target_fps"] = args.target_fps
+    if args.topics and not unity.get("topics"):
+        unity["topics"] = {"enabled": True}
+    topic_port = (unity.get("topics") or {}).get("base_port", DEFAULT_TOPIC_PORT)
+    
+    test = LoadTest(
+        host=args.host if args.attach else "localhost",
+        pub_port=unity["pub_port"],
+        rep_port=unity["rep_port"],
+        subscribers=args.subscribers,
+        directive_clients=args.directive_clients,
+        directive_rate=args.directive_rate,
+        upgrade_fraction=args.upgrade_fraction,
+        upgrades=UPGRADES,
+        topics=args.topics,
+        topic_subscribers=args.topic_subscribers,
+        topic_port=topic_port,
+        decode=not args.no_decode,
+        process_delay=args.process_delay,
+        rcvhwm=args.rcvhwm,
+        processes=args.processes,
+        seed=args.seed
+    )
+    
+    # Client processes start before the bridge so they fork without its sockets
+    test.start()
+    print(f"{len(test.clients)} clients in {len(test.groups)} processes")
+    if args.attach:
+        test.begin()
+        time.sleep(args.duration)
+        report = test.stop()
+    else:
+        report = drive_bridge(config, args, test)
+    print_report(report)
+    
+    results = latency_cases(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment_info(), "results": results, "report": report}, f, indent=2)
+        print(f"\nReport saved to: {args.output}")
+    
+    failed = False
+    if args.max_loss is not None:
+        for stream, stats in report["streams"].items():
+            if stats["loss_rate"] > args.max_loss:
+                print(f"  LOSS {stream}: {100 * stats['loss_rate']:.2f}% > {100 * args.max_loss:.2f}%")
+                failed = True
+    if args.baseline:
+        comparison = compare_results(results, load_results(args.baseline), tolerance=args.tolerance)
+        regressions = [c for c in comparison if c["regressed"]]
+        print(f"\nCompared {len(comparison)} cases against {args.baseline} (p50, tolerance {args.tolerance:.0%})")
+        for c in regressions:
+            print(f"  REGRESSION {c['case']}: {c['baseline']:.1f} -> {c['current']:.1f} µs ({c['ratio']:.2f}x)")
+        failed = failed or bool(regressions)
+        if not regressions:
+            print("  No regressions")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
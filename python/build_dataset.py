@@ -0,0 +1,36 @@
+"""Build or extend an offline transition dataset from saved episodes"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from silent_sky.utils.config import load_config
+from silent_sky.utils.dataset import DatasetBuilder, OfflineDataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact an episode directory into a memory-mapped dataset")
+    parser.add_argument("--episodes", type=str, default=None, help="Episode directory (default: logging.episode_dir from config)")
+    parser.add_argument("--output", type=str, default="data/dataset", help="Dataset directory; an existing dataset is extended")
+    parser.add_argument("--shard-size", type=int, default=1_000_000, help="Target transitions per shard")
+    parser.add_argument("--formats", nargs="+", choices=["json", "pickle", "columnar", "stream"], default=["json", "pickle", "columnar", "stream"], help="Episode formats to ingest")
+    parser.add_argument("--config", type=str, default=None, help="Config file path")
+    
+    args = parser.parse_args()
+    
+    config = load_config(args.config)
+    episode_dir = args.episodes or config["logging"]["episode_dir"]
+    
+    with DatasetBuilder(args.output, shard_size=args.shard_size) as builder:
+        added = builder.add_directory(episode_dir, formats=args.formats)
+    
+    dataset = OfflineDataset(args.output)
+    print(f"Added {added} episodes from {episode_dir}")
+    print(f"Dataset {args.output}: {dataset.num_episodes} episodes, {len(dataset)} transitions, "
+          f"{len(dataset.shards)} shards")
+
+
+if __name__ == "__main__":
+    main()
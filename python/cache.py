@@ -0,0 +1,67 @@
+"""Result cache maintenance - inspect and prune the episode result cache"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from silent_sky.utils.config import load_config
+from silent_sky.utils.result_cache import ResultCache
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+
+
+def format_age(timestamp) -> str:
+    if timestamp is None:
+        return "-"
+    return f"{(time.time() - timestamp) / 3600:.1f}h ago"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the episode result cache")
+    parser.add_argument("command", choices=["stats", "prune", "clear"], help="stats: summary; prune: remove entries (see options); clear: remove everything")
+    parser.add_argument("--config", type=str, default=None, help="Config file path (cache.dir, cache.max_size_mb)")
+    parser.add_argument("--dir", type=str, default=None, help="Cache directory (overrides the config)")
+    parser.add_argument("--max-size", type=float, default=None, help="prune: evict least recently used entries down to this many MB")
+    parser.add_argument("--older-than", type=float, default=None, help="prune: remove entries unused for this many days")
+    parser.add_argument("--stale", action="store_true", help="prune: remove entries from other versions of the silent_sky source")
+    
+    args = parser.parse_args()
+    
+    config = load_config(args.config)
+    cache = ResultCache.from_config(config)
+    if args.dir:
+        cache.root = Path(args.dir)
+    
+    if args.command == "prune":
+        if args.max_size is None and args.older_than is None and not args.stale:
+            parser.error("prune needs --max-size, --older-than or --stale")
+        removed, freed = cache.prune(
+            max_bytes=int(args.max_size * 1024 * 1024) if args.max_size is not None else None,
+            older_than=args.older_than * 86400 if args.older_than is not None else None,
+            stale=args.stale
+        )
+        print(f"Removed {removed} entries ({format_bytes(freed)})")
+    elif args.command == "clear":
+        removed, freed = cache.clear()
+        print(f"Removed {removed} entries ({format_bytes(freed)})")
+    
+    stats = cache.stats()
+    limit = format_bytes(stats["max_bytes"]) if stats["max_bytes"] is not None else "unlimited"
+    print(f"Cache: {stats['dir']}")
+    print(f"  entries:       {stats['entries']} ({stats['with_episodes']} with episode files)")
+    print(f"  size:          {format_bytes(stats['bytes'])} of {limit}")
+    print(f"  stale entries: {stats['stale']} (other source versions)")
+    print(f"  last used:     oldest {format_age(stats['oldest_use'])}, newest {format_age(stats['newest_use'])}")
+    print(f"  source:        {stats['fingerprint'][:16]}")
+
+
+if __name__ == "__main__":
+    main()
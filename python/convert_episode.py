@@ -0,0 +1,40 @@
+"""Episode format converter"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from silent_sky.utils.logging import EpisodeLogger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert saved episodes between formats")
+    parser.add_argument("episode_files", type=str, nargs="+", help="Episode files to convert")
+    parser.add_argument("--from", dest="src_format", choices=["json", "pickle", "columnar", "stream"], default="json", help="Source format")
+    parser.add_argument("--to", dest="dst_format", choices=["json", "pickle", "columnar"], default="columnar", help="Target format")
+    parser.add_argument("--force", action="store_true", help="Overwrite converted files that already exist")
+    
+    args = parser.parse_args()
+    
+    logger = EpisodeLogger()
+    skipped = 0
+    for episode_file in args.episode_files:
+        try:
+            converted = logger.convert_episode(
+                episode_file, src_format=args.src_format, dst_format=args.dst_format, force=args.force
+            )
+        except FileExistsError as e:
+            print(f"Skipped {episode_file}: {e}")
+            skipped += 1
+            continue
+        src_size = Path(episode_file).stat().st_size
+        dst_size = Path(converted).stat().st_size
+        print(f"{episode_file} -> {converted} ({src_size} -> {dst_size} bytes)")
+    if skipped:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
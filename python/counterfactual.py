@@ -0,0 +1,56 @@
+"""Counterfactual analysis: what if the agent had looked elsewhere?"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from silent_sky.analysis.counterfactual import MISSED_VALUE_FIELDS, missed_value, recorded_actions
+from silent_sky.runner.episode import make_env
+from silent_sky.utils.config import load_config
+from silent_sky.utils.logging import EpisodeLogger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute discovery value missed at each step of a saved episode")
+    parser.add_argument("episode_file", type=str, help="Path to episode file")
+    parser.add_argument("--format", choices=["json", "pickle", "columnar", "stream"], default="json", help="Episode file format")
+    parser.add_argument("--horizon", type=int, default=1, help="Steps per counterfactual rollout")
+    parser.add_argument("--sectors", type=int, nargs="+", default=None, help="Alternative sectors (default: all)")
+    parser.add_argument("--output", type=str, default=None, help="Per-step results file (CSV)")
+    parser.add_argument("--top", type=int, default=10, help="Steps with the most missed value to print")
+    parser.add_argument("--config", type=str, default=None, help="Config file path (default: the episode's own config)")
+    
+    args = parser.parse_args()
+    
+    logger = EpisodeLogger(log_dir=str(Path(args.episode_file).parent))
+    episode_data = logger.load_episode(args.episode_file, format=args.format)
+    config = episode_data.get("config") if args.config is None else None
+    config = config or load_config(args.config)
+    
+    env = make_env(config)
+    actions = recorded_actions(episode_data)
+    rows = missed_value(env, episode_data.get("seed"), actions, sectors=args.sectors, horizon=args.horizon)
+    
+    total_actual = sum(row["actual_value"] for row in rows)
+    total_missed = sum(row["missed"] for row in rows)
+    print(f"Episode: {args.episode_file} ({len(rows)} steps, horizon {args.horizon})")
+    print(f"Discovery value: {total_actual:.2f} actual, {total_missed:.2f} missed")
+    
+    print(f"\nTop {args.top} steps by missed value:")
+    for row in sorted(rows, key=lambda r: r["missed"], reverse=True)[:args.top]:
+        print(f"  t={row['timestep']:>5}: looked at {row['sector']:>3} ({row['actual_value']:.2f}), "
+              f"best {row['best_sector']:>3} ({row['best_value']:.2f}), missed {row['missed']:.2f}")
+    
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=MISSED_VALUE_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\nPer-step results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
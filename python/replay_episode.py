@@ -2,21 +2,90 @@
 
 import argparse
 import sys
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from silent_sky.bridge.recording import BridgeRecording
+from silent_sky.bridge.replay import ReplayServer
+from silent_sky.bridge.zmq_bridge import ZMQBridge
+from silent_sky.utils.config import load_config
 from silent_sky.utils.logging import EpisodeLogger
+from silent_sky.utils.episode_stream import iter_stream_blocks
+
+
+def follow_stream(episode_file: str):
+    """Print chunk summaries of a stream file as they are written"""
+    print(f"Following episode: {episode_file}")
+    for metadata, columns in iter_stream_blocks(episode_file, follow=True):
+        kind = metadata.get("stream")
+        if kind == "header":
+            print(f"Seed: {metadata.get('seed', 'unknown')}")
+        elif kind == "trailer":
+            final = metadata.get("final_state") or {}
+            print(f"Episode complete: {metadata.get('steps', 0)} steps, "
+                  f"profit ${final.get('profit', 0):.2f}")
+        elif "timesteps" in columns:
+            timesteps = columns["timesteps"]
+            print(f"Steps {timesteps[0]}-{timesteps[-1]}: "
+                  f"reward {columns['rewards'].sum():.2f}")
+
+
+def serve_recording(recording_file: str, args):
+    """Publish a bridge recording to Unity until interrupted"""
+    config = load_config(args.config)
+    recording = BridgeRecording(recording_file)
+    bridge = ZMQBridge(
+        pub_port=config["unity"]["pub_port"],
+        rep_port=config["unity"]["rep_port"],
+        enabled=True,
+        schema_version=config["unity"].get("schema_version", 1),
+        keyframe_interval=config["unity"].get("keyframe_interval", 100),
+        publish_mode=config["unity"].get("publish_mode", "inline"),
+        target_fps=config["unity"].get("target_fps"),
+        topics=config["unity"].get("topics")
+    )
+    bridge.start()
+    
+    server = ReplayServer(recording, bridge, speed=args.speed, step_interval=args.step_interval, loop=args.loop)
+    print(f"Serving recording: {recording_file} ({len(recording)} steps, "
+          f"{len(recording.keyframes)} keyframes, speed {args.speed}x)")
+    server.start()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        bridge.stop()
 
 
 def main():
     parser = argparse.ArgumentParser(description="Replay a saved episode")
     parser.add_argument("episode_file", type=str, help="Path to episode file")
     parser.add_argument("--agent", choices=["dummy", "ppo"], default="dummy", help="Agent to use for replay")
-    parser.add_argument("--format", choices=["json", "pickle"], default="json", help="Episode file format")
+    parser.add_argument("--format", choices=["json", "pickle", "columnar", "stream"], default="json", help="Episode file format")
+    parser.add_argument("--follow", action="store_true", help="Tail a stream file while its episode is still running")
+    parser.add_argument("--serve", action="store_true", help="Publish a bridge recording (run_episode.py --record) to Unity")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed for --serve (0 = as fast as possible)")
+    parser.add_argument("--step-interval", type=float, default=None, help="Seconds per step at 1x (default: recorded timing)")
+    parser.add_argument("--loop", action="store_true", help="Restart playback at the end of the recording")
+    parser.add_argument("--config", type=str, default=None, help="Config file path")
     
     args = parser.parse_args()
     
+    if args.serve:
+        serve_recording(args.episode_file, args)
+        return
+    
+    if args.follow:
+        if args.format != "stream":
+            parser.error("--follow requires --format stream")
+        follow_stream(args.episode_file)
+        return
+    
     logger = EpisodeLogger()
     episode_data = logger.load_episode(args.episode_file, format=args.format)
     
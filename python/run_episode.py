@@ -1,17 +1,63 @@
 """Single episode runner - main entry point for Phase 1"""
 
 import argparse
+import shutil
 import sys
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from silent_sky.env.observatory_env import ObservatoryEnv
-from silent_sky.agent.dummy_agent import DummyAgent
+from silent_sky.bridge.recording import BridgeRecorder
 from silent_sky.bridge.zmq_bridge import ZMQBridge
-from silent_sky.utils.logging import EpisodeLogger
+from silent_sky.runner.episode import SUMMARY_FIELDS, make_env, make_agent, episode_summary, env_directive_handler
+from silent_sky.runner.long_horizon import EpisodeAggregates, EventArchive
+from silent_sky.runner.server import DEFAULT_ADDRESS, EpisodeServer
+from silent_sky.utils.logging import EPISODE_EXTENSIONS, EpisodeLogger
+from silent_sky.utils.profiling import Profiler, CProfileHook, StackSamplerHook, instrument, parse_steps
 from silent_sky.utils.config import load_config
+from silent_sky.utils.result_cache import open_cache
+
+
+def serve_episodes(config: dict, args):
+    """Run an episode server until a shutdown command or Ctrl+C"""
+    server = EpisodeServer(config, address=args.address, workers=args.workers, cache=open_cache(config, args.cache))
+    server.start()
+    print(f"Episode server on {args.address} ({server.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    status = server.status()
+    print(f"Episode server stopped: {status['completed']} jobs completed ({status['cached']} from cache), {status['failed']} failed")
+
+
+def cached_episode(cache, cache_key: str, config: dict, args):
+    """Report and restore a cached episode; None if it has to be played"""
+    entry = cache.get(cache_key, required=SUMMARY_FIELDS)
+    if entry is None:
+        return None
+    
+    saved_path = None
+    episode_path = cache.episode_path(entry)
+    extension = EPISODE_EXTENSIONS[args.format]
+    if episode_path is not None and episode_path.suffix == f".{extension}":
+        # Named as a fresh run would be
+        saved_path = EpisodeLogger(log_dir=config["logging"]["episode_dir"]).episode_path(args.format, args.output)
+        shutil.copyfile(episode_path, saved_path)
+    elif args.output:
+        return None  # The episode file is wanted, so play it
+    
+    final_state = entry["summary"]
+    print(f"Cached result (seed={config['environment']['seed']}, key {cache_key[:12]})")
+    print(f"Total reward: {final_state['total_reward']:.2f}")
+    print(f"Budget: ${final_state['budget']:.2f}")
+    print(f"Events discovered: {final_state['events_discovered']}/{final_state['events_total']}")
+    if saved_path:
+        print(f"Episode saved to: {saved_path}")
+    return {"seed": config["environment"]["seed"], "config": config, "final_state": final_state}
 
 
 def main():
@@ -22,7 +68,20 @@ def main():
     parser.add_argument("--agent", choices=["dummy", "ppo"], default="dummy", help="Agent type")
     parser.add_argument("--strategy", choices=["greedy", "round_robin", "hybrid"], default="greedy", help="Dummy agent strategy")
     parser.add_argument("--output", type=str, default=None, help="Output file for episode")
+    parser.add_argument("--format", choices=["json", "pickle", "columnar", "stream"], default="json", help="Episode file format")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Steps per chunk for --format stream")
     parser.add_argument("--config", type=str, default=None, help="Config file path")
+    parser.add_argument("--record", type=str, default=None, help="Record bridge snapshots to this file for replay_episode.py --serve")
+    parser.add_argument("--profile", action="store_true", help="Time each phase of the step loop")
+    parser.add_argument("--profile-steps", type=str, default=None, help="Profile these steps, e.g. 100:110, every:50 or 5,17,42 (implies --profile)")
+    parser.add_argument("--profiler", choices=["cprofile", "sample"], default="sample", help="Profiler used for --profile-steps")
+    parser.add_argument("--serve", action="store_true", help="Keep running and take episode jobs over a local socket")
+    parser.add_argument("--address", type=str, default=DEFAULT_ADDRESS, help="Address for --serve")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --serve (default: CPU count, 0 = in-process)")
+    parser.add_argument("--long-horizon", action="store_true", help="Bounded memory for very long episodes: trim expired events, keep running totals, stream steps to disk")
+    parser.add_argument("--event-horizon", type=int, default=1000, help="Steps a settled (discovered or fully decayed) event stays in the live state with --long-horizon; events still in play are never trimmed")
+    parser.add_argument("--spill-events", type=str, default=None, help="Append expired events to this JSON Lines file with --long-horizon")
+    parser.add_argument("--cache", action="store_true", help="Reuse a cached result for this config, seed and strategy, and cache new ones (see cache.py)")
     
     args = parser.parse_args()
     
@@ -35,48 +94,76 @@ def main():
     if args.agent == "dummy":
         config["agent"]["dummy_strategy"] = args.strategy
     
+    if args.serve:
+        serve_episodes(config, args)
+        return None
+    
+    # Long-horizon episodes never hold per-step data or the full event history
+    archive = None
+    aggregates = None
+    if args.long_horizon:
+        if args.format != "stream":
+            print(f"--long-horizon: writing --format stream instead of {args.format}")
+            args.format = "stream"
+        archive = EventArchive(horizon=args.event_horizon, spill_path=args.spill_events)
+        aggregates = EpisodeAggregates()
+    episode_length = config["environment"]["episode_length"]
+    progress_interval = max(10, episode_length // 100) if args.long_horizon else 10
+    
+    use_unity = args.unity or (not args.headless and config["unity"]["enabled"])
+    
+    # Cached results only stand in for plain headless runs of a fixed seed
+    cache = open_cache(config, args.cache)
+    cache_key = None
+    if (cache and config["environment"]["seed"] is not None and args.agent == "dummy" and not use_unity
+            and not args.record and not args.long_horizon and not args.profile and args.profile_steps is None):
+        cache_key = cache.key(config, config["environment"]["seed"], config["agent"]["dummy_strategy"])
+        cached = cached_episode(cache, cache_key, config, args)
+        if cached is not None:
+            return cached
+    
     # Create environment
-    env = ObservatoryEnv(
-        num_sectors=config["environment"]["num_sectors"],
-        episode_length=config["environment"]["episode_length"],
-        initial_budget=config["environment"]["initial_budget"],
-        seed=config["environment"]["seed"]
-    )
+    env = make_env(config)
     
     # Create agent
     if args.agent == "dummy":
-        agent = DummyAgent(
-            strategy=config["agent"]["dummy_strategy"],
-            seed=config["environment"]["seed"]
-        )
+        agent = make_agent(config["agent"]["dummy_strategy"], seed=config["environment"]["seed"])
     else:
         raise NotImplementedError("PPO agent not implemented in Phase 1")
     
     # Setup ZeroMQ bridge if Unity enabled
     bridge = None
-    if args.unity or (not args.headless and config["unity"]["enabled"]):
+    if use_unity:
         bridge = ZMQBridge(
             pub_port=config["unity"]["pub_port"],
             rep_port=config["unity"]["rep_port"],
-            enabled=True
+            enabled=True,
+            schema_version=config["unity"].get("schema_version", 1),
+            keyframe_interval=config["unity"].get("keyframe_interval", 100),
+            publish_mode=config["unity"].get("publish_mode", "inline"),
+            target_fps=config["unity"].get("target_fps"),
+            topics=config["unity"].get("topics")
         )
         bridge.start()
         
-        # Set callback for mission directives
-        def handle_directive(directive: dict):
-            if "reward_weights" in directive:
-                env.update_mission_directives(directive["reward_weights"])
-            if "upgrade" in directive:
-                env.purchase_upgrade(directive["upgrade"])
-        
-        bridge.set_directive_callback(handle_directive)
+        # Set callback for mission directives (applied at step boundaries)
+        bridge.set_directive_callback(env_directive_handler(env))
     
     # Setup episode logger
     logger = EpisodeLogger(log_dir=config["logging"]["episode_dir"])
     
+    # Timing spans (no-ops unless --profile)
+    profiler = Profiler(enabled=args.profile or args.profile_steps is not None)
+    instrument(env, "reset", profiler, "env.reset")
+    instrument(env.reward_calculator, "calculate_money", profiler, "env.calculate_money")
+    if args.profile_steps:
+        select = parse_steps(args.profile_steps)
+        profiler.add_hook(CProfileHook(select) if args.profiler == "cprofile" else StackSamplerHook(select))
+    
     # Episode data for logging
     episode_data = {
         "seed": config["environment"]["seed"],
+        "config": config,
         "timesteps": [],
         "actions": [],
         "observations": [],
@@ -84,75 +171,149 @@ def main():
         "info": []
     }
     
+    # Output filename
+    if args.output:
+        filename = args.output
+    else:
+        filename = None
+    
+    # Stream steps to disk as they happen instead of keeping them in memory
+    stream = None
+    if args.format == "stream":
+        stream = logger.open_stream(
+            {"seed": episode_data["seed"], "config": config},
+            filename=filename,
+            chunk_size=args.chunk_size
+        )
+    
+    # Bridge recording (keyframes plus per-step deltas) for seekable replay
+    recorder = None
+    if args.record:
+        recorder = BridgeRecorder(
+            args.record,
+            metadata={"seed": config["environment"]["seed"], "config": config},
+            keyframe_interval=config["unity"].get("keyframe_interval", 100)
+        )
+    
     # Run episode
     observation, info = env.reset(seed=config["environment"]["seed"])
     agent.reset()
+    start_budget = float(env.state.budget)
     
     total_reward = 0.0
     done = False
     
     print(f"Starting episode (seed={config['environment']['seed']})...")
     
+    step = 0
     while not done:
+        profiler.begin_step(step)
+        
+        # Mission directives and upgrades from Unity take effect between steps
+        if bridge:
+            bridge.apply_directives(env.state.timestep)
+        
         # Agent selects action
-        action = agent.act(observation)
+        with profiler.span("agent.act"):
+            action = agent.act(observation)
         
         # Step environment
-        next_observation, reward, terminated, truncated, step_info = env.step(action)
+        with profiler.span("env.step"):
+            next_observation, reward, terminated, truncated, step_info = env.step(action)
         
         # Send state to Unity if connected
         if bridge and env.state:
-            bridge.send_state(env.state, next_observation, step_info)
+            with profiler.span("bridge.send_state"):
+                bridge.send_state(env.state, next_observation, step_info)
+        if recorder:
+            with profiler.span("record"):
+                recorder.record(env.state, next_observation, step_info)
+        if archive:
+            with profiler.span("archive"):
+                archive.trim(env.state, aggregates)
         
         # Log step
-        episode_data["timesteps"].append(env.state.timestep)
-        episode_data["actions"].append(action)
-        episode_data["observations"].append({
-            k: v.tolist() if hasattr(v, 'tolist') else v
-            for k, v in observation.items()
-        })
-        episode_data["rewards"].append(float(reward))
-        episode_data["info"].append(step_info)
+        with profiler.span("log_step"):
+            if stream:
+                stream.append_step(env.state.timestep, action, observation, reward, step_info)
+            else:
+                episode_data["timesteps"].append(env.state.timestep)
+                episode_data["actions"].append(action)
+                episode_data["observations"].append({
+                    k: v.tolist() if hasattr(v, 'tolist') else v
+                    for k, v in observation.items()
+                })
+                episode_data["rewards"].append(float(reward))
+                episode_data["info"].append(step_info)
         
+        profiler.end_step(step)
+        step += 1
         total_reward += reward
         observation = next_observation
         done = terminated or truncated
         
-        if env.state.timestep % 10 == 0:
-            print(f"Step {env.state.timestep}/{config['environment']['episode_length']}, "
-                  f"Reward: {reward:.2f}, Budget: ${env.state.budget:.2f}")
+        if env.state.timestep % progress_interval == 0:
+            if aggregates:
+                aggregates.update(env.state)
+                print(f"Step {env.state.timestep}/{episode_length}, "
+                      f"Reward: {reward:.2f}, Budget: ${env.state.budget:.2f}, "
+                      f"Discovered: {aggregates.events_discovered}/{aggregates.events_total}")
+            else:
+                print(f"Step {env.state.timestep}/{episode_length}, "
+                      f"Reward: {reward:.2f}, Budget: ${env.state.budget:.2f}")
     
     # Final state
     if env.state:
-        money_info = env.reward_calculator.calculate_money(env.state)
-        episode_data["final_state"] = {
-            "total_reward": float(total_reward),
-            "budget": float(env.state.budget),
-            "earnings": money_info["earnings"],
-            "costs": money_info["costs"],
-            "profit": money_info["profit"],
-            "events_discovered": len(env.state.discovered_events),
-            "events_total": len(env.state.events)
-        }
+        with profiler.span("episode_summary"):
+            episode_data["final_state"] = episode_summary(env, total_reward, aggregates)
+    if archive:
+        archive.close()
     
     print(f"\nEpisode complete!")
     print(f"Total reward: {total_reward:.2f}")
     if env.state:
+        final_state = episode_data["final_state"]
         print(f"Budget: ${env.state.budget:.2f}")
-        print(f"Events discovered: {len(env.state.discovered_events)}/{len(env.state.events)}")
+        print(f"Events discovered: {final_state['events_discovered']}/{final_state['events_total']}")
+    if args.spill_events and archive:
+        print(f"Expired events saved to: {args.spill_events}")
     
     # Save episode
-    if args.output:
-        filename = args.output
+    if stream:
+        stream.close(final_state=episode_data.get("final_state"))
+        saved_path = str(stream.path)
     else:
-        filename = None
-    
-    saved_path = logger.save_episode(episode_data, format="json", filename=filename)
+        with profiler.span("save_episode"):
+            saved_path = logger.save_episode(episode_data, format=args.format, filename=filename)
     print(f"Episode saved to: {saved_path}")
+    if cache_key:
+        store_episodes = (config.get("cache") or {}).get("store_episodes", False)
+        # Same summary shape as play_episode, which sweeps and the server cache
+        summary = {**episode_data["final_state"], "steps": step, "start_budget": start_budget, "upgrade_cost": 0.0}
+        cache.put(
+            cache_key, summary,
+            seed=config["environment"]["seed"], strategy=config["agent"]["dummy_strategy"],
+            episode_path=saved_path if store_episodes else None
+        )
+    if recorder:
+        recorder.close()
+        print(f"Recording saved to: {args.record}")
+    
+    # Timing summary, written next to the episode file
+    if profiler.enabled:
+        output_prefix = str(Path(saved_path).with_suffix(""))
+        profiler.close(output_prefix)
+        print("\nTiming:")
+        profiler.print_summary()
+        profiler.save(f"{output_prefix}.timing.json")
+        print(f"Timing saved to: {output_prefix}.timing.json")
     
     # Cleanup
     if bridge:
         bridge.stop()
+        stats = bridge.get_stats()
+        print(f"Bridge: {stats['frames_sent']} frames sent, {stats['frames_dropped']} dropped, "
+              f"{stats['directives_applied']} directives applied")
     
     return episode_data
 
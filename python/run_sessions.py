@@ -0,0 +1,51 @@
+"""Concurrent sessions - several envs, each with its own bridge, in one process"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from silent_sky.runner.async_episode import run_sessions
+from silent_sky.utils.config import load_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run concurrent episode sessions on one event loop")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent sessions")
+    parser.add_argument("--base-port", type=int, default=None, help="Session i uses ports BASE+2i (PUB) and BASE+2i+1 (directives); default: unity.pub_port")
+    parser.add_argument("--seed", type=int, default=0, help="First episode seed")
+    parser.add_argument("--episodes", type=int, default=1, help="Episodes per session")
+    parser.add_argument("--strategy", choices=["greedy", "round_robin", "hybrid"], default=None, help="Dummy agent strategy")
+    parser.add_argument("--step-interval", type=float, default=0.0, help="Seconds between steps of a session")
+    parser.add_argument("--config", type=str, default=None, help="Config file path")
+    
+    args = parser.parse_args()
+    
+    config = load_config(args.config)
+    if args.strategy:
+        config["agent"]["dummy_strategy"] = args.strategy
+    base_port = args.base_port if args.base_port is not None else config["unity"]["pub_port"]
+    
+    start = time.perf_counter()
+    results = asyncio.run(run_sessions(
+        config,
+        args.sessions,
+        base_port=base_port,
+        seed=args.seed,
+        episodes=args.episodes,
+        step_interval=args.step_interval
+    ))
+    elapsed = time.perf_counter() - start
+    
+    print(f"\n{len(results)} episodes in {elapsed:.1f}s")
+    print(f"{'session':>7} {'seed':>6} {'steps':>6} {'reward':>10} {'profit':>12} {'discovered':>11}")
+    for result in sorted(results, key=lambda r: (r["session"], r["seed"])):
+        print(f"{result['session']:>7} {result['seed']:>6} {result['steps']:>6} {result['total_reward']:>10.2f} "
+              f"{result['profit']:>12.2f} {result['events_discovered']:>6}/{result['events_total']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """Agent implementations"""
 
 from .dummy_agent import DummyAgent
+from .batched_agent import BatchedDummyAgent
 
-__all__ = ["DummyAgent"]
-
+__all__ = ["DummyAgent", "BatchedDummyAgent"]
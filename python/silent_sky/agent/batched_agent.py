@@ -0,0 +1,121 @@
+"""Batched dummy agent - DummyAgent over B episodes in one call"""
+
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+
+class BatchedDummyAgent:
+    """
+    DummyAgent for B independent episodes at once
+    
+    Takes stacked (B, num_sectors) observations and returns (B,) sector and
+    exposure arrays. Round-robin cursors and step counts are kept as arrays,
+    one entry per episode; each episode makes the same decisions as a scalar
+    DummyAgent with the same strategy and seed.
+    """
+    
+    def __init__(self, strategy: str = "greedy", seeds: Sequence[Optional[int]] = (None,)):
+        """
+        Initialize batched dummy agent
+        
+        Args:
+            strategy: "greedy", "round_robin", or "hybrid" (anything else is random)
+            seeds: One random seed per episode; len(seeds) is the batch size
+        """
+        self.strategy = strategy
+        self.batch_size = len(seeds)
+        # The random fallback draws from one MT19937 stream per episode so
+        # results match DummyAgent(seed=seed) exactly
+        self.rngs = [np.random.RandomState(seed) for seed in seeds]
+        self.current_sector = np.zeros(self.batch_size, dtype=np.int64)
+        self.step_count = np.zeros(self.batch_size, dtype=np.int64)
+    
+    def act(self, observation: Dict[str, np.ndarray], indices: Optional[Sequence[int]] = None) -> Dict[str, np.ndarray]:
+        """
+        Select actions for every episode, or for a subset
+        
+        Args:
+            observation: Dict with sensor_readings and sensor_confidence of
+                         shape (B, num_sectors); other keys are ignored
+            indices: Episodes the observation rows belong to (default: all
+                     B episodes, in order)
+        
+        Returns:
+            Dict with "sector" and "exposure_mode" arrays, one per row
+        """
+        rows = slice(None) if indices is None else np.asarray(indices, dtype=np.int64)
+        self.step_count[rows] += 1
+        
+        sensor_readings = np.asarray(observation["sensor_readings"])
+        sensor_confidence = np.asarray(observation["sensor_confidence"])
+        batch_size, num_sectors = sensor_readings.shape
+        
+        if self.strategy == "greedy":
+            sector = self._greedy_sector(sensor_readings, sensor_confidence)
+            
+            # Exposure mode based on uncertainty
+            max_uncertainty = np.max(1.0 - sensor_confidence, axis=1)
+            exposure_mode = np.where(
+                max_uncertainty > 0.7, 2,  # LONG for high uncertainty
+                np.where(max_uncertainty > 0.4, 1, 0)  # MEDIUM / SHORT
+            )
+        
+        elif self.strategy == "round_robin":
+            sector = self.current_sector[rows].copy()
+            self.current_sector[rows] = (sector + 1) % num_sectors
+            exposure_mode = np.ones(batch_size, dtype=np.int64)  # Always MEDIUM
+        
+        elif self.strategy == "hybrid":
+            # Greedy where events are detected, round-robin elsewhere
+            event_detected = np.max(sensor_readings, axis=1) > 0.5
+            current_sector = self.current_sector[rows]
+            sector = np.where(
+                event_detected,
+                self._greedy_sector(sensor_readings, sensor_confidence),
+                current_sector
+            )
+            self.current_sector[rows] = np.where(
+                event_detected,
+                current_sector,
+                (current_sector + 1) % num_sectors
+            )
+            exposure_mode = np.where(event_detected, 2, 0)  # LONG for events, SHORT for scanning
+        
+        else:
+            # Random fallback
+            sector = np.empty(batch_size, dtype=np.int64)
+            exposure_mode = np.empty(batch_size, dtype=np.int64)
+            rngs = self.rngs if indices is None else [self.rngs[i] for i in rows]
+            for i, rng in enumerate(rngs):
+                sector[i] = rng.randint(0, num_sectors)
+                exposure_mode[i] = rng.randint(0, 3)
+        
+        return {
+            "sector": sector.astype(np.int64),
+            "exposure_mode": exposure_mode.astype(np.int64)
+        }
+    
+    def reset(self, indices: Optional[Sequence[int]] = None, seeds: Optional[Sequence[Optional[int]]] = None):
+        """
+        Reset agent state for some or all episodes
+        
+        Args:
+            indices: Episodes to reset (default: all), e.g. those that just
+                     finished and were auto-reset
+            seeds: Optional new seed per reset episode
+        """
+        if indices is None:
+            indices = range(self.batch_size)
+        indices = np.asarray(list(indices), dtype=np.int64)
+        self.current_sector[indices] = 0
+        self.step_count[indices] = 0
+        if seeds is not None:
+            for i, seed in zip(indices, seeds):
+                if seed is not None:
+                    self.rngs[i].seed(seed)
+    
+    @staticmethod
+    def _greedy_sector(sensor_readings: np.ndarray, sensor_confidence: np.ndarray) -> np.ndarray:
+        # Prioritize sectors with high signal but low confidence
+        uncertainty_scores = (1.0 - sensor_confidence) + sensor_readings
+        return np.argmax(uncertainty_scores, axis=1)
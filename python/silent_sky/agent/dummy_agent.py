@@ -82,8 +82,16 @@ class DummyAgent:
             "exposure_mode": exposure_mode
         }
     
-    def reset(self):
-        """Reset agent state"""
+    def reset(self, seed: Optional[int] = None):
+        """
+        Reset agent state
+        
+        Args:
+            seed: If given, reseed the random fallback so a reused agent
+                  behaves like a freshly created DummyAgent(seed=seed)
+        """
         self.current_sector = 0
         self.step_count = 0
+        if seed is not None:
+            self.rng.seed(seed)
 
@@ -0,0 +1,6 @@
+"""Episode analysis tools"""
+
+from .snapshot import EnvSnapshot, snapshot_env, restore_env
+from .counterfactual import MISSED_VALUE_FIELDS, recorded_actions, missed_value
+
+__all__ = ["EnvSnapshot", "snapshot_env", "restore_env", "MISSED_VALUE_FIELDS", "recorded_actions", "missed_value"]
@@ -0,0 +1,100 @@
+"""Counterfactual rollouts: discovery value missed at each step of an episode"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..env.observatory_env import ObservatoryEnv
+from ..utils.episode_format import episode_to_columns
+from .snapshot import restore_env, snapshot_env
+
+MISSED_VALUE_FIELDS = ("timestep", "sector", "actual_value", "best_sector", "best_value", "missed")
+
+
+def recorded_actions(episode_data: Dict) -> List[Dict[str, int]]:
+    """Actions of a saved episode (any EpisodeLogger format) as action dicts"""
+    columns, _ = episode_to_columns({"actions": episode_data["actions"]})
+    sectors = np.asarray(columns["actions/sector"]).tolist()
+    exposure_modes = np.asarray(columns["actions/exposure_mode"]).tolist()
+    return [
+        {"sector": int(sector), "exposure_mode": int(exposure_mode)}
+        for sector, exposure_mode in zip(sectors, exposure_modes)
+    ]
+
+
+def discovery_value(env: ObservatoryEnv, first_action: Dict, continuation: Sequence[Dict]) -> float:
+    """Value of the events discovered by first_action and the continuation"""
+    discovered = env.state.discovered_events
+    already_discovered = len(discovered)
+    
+    _, _, terminated, truncated, _ = env.step(first_action)
+    for action in continuation:
+        if terminated or truncated:
+            break
+        _, _, terminated, truncated, _ = env.step(action)
+    
+    return float(sum(e.value for e in env.state.discovered_events[already_discovered:]))
+
+
+def missed_value(
+    env: ObservatoryEnv,
+    seed: Optional[int],
+    actions: Sequence[Dict],
+    sectors: Optional[Iterable[int]] = None,
+    horizon: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Discovery value missed at each step by the recorded sector choices
+    
+    Replays the episode from reset(seed). At every step it snapshots the env
+    and rolls out each alternative sector with the recorded exposure mode.
+    The next horizon - 1 recorded actions follow, then the env is restored.
+    Each step costs len(sectors) * horizon env steps and len(sectors) + 1
+    restores. Each snapshot starts from the previous one, so snapshot and
+    restore cost follows the events still in play, not the episode length.
+    
+    Args:
+        env: Environment with the episode's config
+        seed: Episode seed
+        actions: Recorded actions (see recorded_actions)
+        sectors: Alternative sectors (default: all)
+        horizon: Steps per rollout, including the branching step
+    
+    Returns:
+        One dict per step with the MISSED_VALUE_FIELDS: timestep, sector,
+        actual_value, best_sector, best_value and missed (best_value -
+        actual_value, never negative)
+    """
+    env.reset(seed=seed)
+    candidates = list(sectors) if sectors is not None else list(range(len(env.state.sectors)))
+    rows = []
+    snapshot = None
+    
+    for t, action in enumerate(actions):
+        snapshot = snapshot_env(env, previous=snapshot)
+        continuation = actions[t + 1:t + horizon]
+        
+        values = {}
+        for sector in set(candidates) | {action["sector"]}:
+            restore_env(env, snapshot)
+            branch = {"sector": sector, "exposure_mode": action["exposure_mode"]}
+            values[sector] = discovery_value(env, branch, continuation)
+        
+        best_sector = max(candidates, key=lambda s: values[s])
+        actual_value = values[action["sector"]]
+        rows.append({
+            "timestep": snapshot.timestep,
+            "sector": action["sector"],
+            "actual_value": actual_value,
+            "best_sector": best_sector,
+            "best_value": values[best_sector],
+            "missed": max(0.0, values[best_sector] - actual_value)
+        })
+        
+        # Continue the recorded trajectory
+        restore_env(env, snapshot)
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            break
+    
+    return rows
@@ -0,0 +1,97 @@
+"""Snapshot and restore of a live ObservatoryEnv for branching rollouts"""
+
+import copy
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from ..env.observatory_env import ObservatoryEnv
+from ..utils.events import event_in_play
+
+
+class EnvSnapshot(NamedTuple):
+    """
+    Point-in-time copy of an environment
+    
+    attributes holds a deep copy of the env's attributes (EnvironmentState,
+    RNG, upgrades and reward calculator) except for the event lists. Those
+    are append-only, so they are shared with the env and only their lengths
+    are recorded; restore truncates whatever was appended since. Settled
+    events never change again, so event_fields records the field values of
+    the events still in play only.
+    """
+    timestep: int
+    attributes: Dict[str, Any]
+    events: List[Any]
+    discovered_events: List[Any]
+    events_length: int
+    discovered_length: int
+    event_fields: List[Tuple[Any, Dict[str, Any]]]
+
+
+def _event_lists(env: ObservatoryEnv) -> Tuple[List[Any], List[Any]]:
+    state = getattr(env, "state", None)
+    if state is None:
+        return [], []
+    return state.events, state.discovered_events
+
+
+def _shared_memo(env: ObservatoryEnv, events: List[Any], discovered: List[Any], in_play: List[Any]) -> Dict[int, Any]:
+    """deepcopy memo that keeps immutable and shared objects as they are"""
+    memo = {id(events): events, id(discovered): discovered}
+    for name in ("observation_space", "action_space"):
+        space = getattr(env, name, None)
+        if space is not None:
+            memo[id(space)] = space
+    for event in in_play:
+        memo[id(event)] = event
+    return memo
+
+
+def snapshot_env(env: ObservatoryEnv, previous: Optional[EnvSnapshot] = None) -> EnvSnapshot:
+    """
+    Capture everything needed to continue env from its current step
+    
+    A snapshot can be restored any number of times, so many branches can
+    fork from one prefix. Restore a snapshot only into the env it was taken
+    from (or a copy of it) while no other env shares its event objects, and
+    only within the same episode.
+    
+    Args:
+        env: Environment to capture
+        previous: The snapshot env was last restored from or stepped on
+            from. Only its events still in play and the events appended
+            since are checked, so the cost follows the active events
+            instead of the episode length.
+    """
+    events, discovered = _event_lists(env)
+    if previous is not None and previous.events is events and previous.events_length <= len(events):
+        candidates = [event for event, _ in previous.event_fields]
+        candidates.extend(events[previous.events_length:])
+    else:
+        candidates = events
+    in_play = [event for event in candidates if event_in_play(event)]
+    
+    event_fields = [(event, event.__dict__.copy()) for event in in_play]
+    attributes = copy.deepcopy(vars(env), _shared_memo(env, events, discovered, in_play))
+    timestep = env.state.timestep if env.state is not None else 0
+    return EnvSnapshot(
+        timestep=timestep,
+        attributes=attributes,
+        events=events,
+        discovered_events=discovered,
+        events_length=len(events),
+        discovered_length=len(discovered),
+        event_fields=event_fields
+    )
+
+
+def restore_env(env: ObservatoryEnv, snapshot: EnvSnapshot):
+    """Put env back into the state captured by snapshot"""
+    events, discovered = snapshot.events, snapshot.discovered_events
+    in_play = [event for event, _ in snapshot.event_fields]
+    # Copy again so the snapshot itself stays pristine for later branches
+    attributes = copy.deepcopy(snapshot.attributes, _shared_memo(env, events, discovered, in_play))
+    del events[snapshot.events_length:]
+    del discovered[snapshot.discovered_length:]
+    for event, fields in snapshot.event_fields:
+        event.__dict__.update(fields)
+    vars(env).update(attributes)
@@ -1,6 +1,12 @@
 """Python-Unity communication bridge"""
 
 from .zmq_bridge import ZMQBridge
+from .directives import DirectiveQueue
+from .async_bridge import AsyncZMQBridge
+from .recording import BridgeRecorder, BridgeRecording
+from .replay import ReplayServer
+from .topics import TOPICS, TopicFanout, decode_topic
+from .loadtest import LoadTest
 
-__all__ = ["ZMQBridge"]
-
+__all__ = ["ZMQBridge", "DirectiveQueue", "AsyncZMQBridge", "BridgeRecorder", "BridgeRecording", "ReplayServer",
+           "TOPICS", "TopicFanout", "decode_topic", "LoadTest"]
@@ -0,0 +1,255 @@
+"""asyncio variant of ZMQBridge for hosting many sessions in one process"""
+
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+import zmq
+import zmq.asyncio
+
+from ..env.state import EnvironmentState
+from ..sky.hexgrid import SectorField
+from .directives import DirectiveQueue, apply_payload
+from .protocol import SCHEMA_V1, SCHEMA_V2, SnapshotEncoder, StateCapture, capture_state, snapshot_v1, stamp
+
+
+class AsyncZMQBridge:
+    """
+    ZMQBridge on pyzmq asyncio sockets
+    
+    Same sockets, schemas and directive semantics as ZMQBridge, but no
+    threads: directives are received by a task that wakes as soon as a
+    request arrives, and subscriptions are watched by another; as with
+    ZMQBridge, nothing is serialized while nobody is subscribed. Directives
+    still take effect only at apply_directives (step boundaries), unless
+    the callback is registered with immediate=True. Bridges created with a
+    shared context can run side by side on one event loop.
+    
+    publish_mode "inline" sends inside send_state. "background" keeps only
+    the latest capture and a publisher task sends it, at most target_fps
+    times per second; replaced captures count as frames_dropped.
+    """
+    
+    def __init__(
+        self,
+        pub_port: int = 5555,
+        rep_port: int = 5556,
+        enabled: bool = True,
+        schema_version: int = SCHEMA_V1,
+        keyframe_interval: int = 100,
+        publish_mode: str = "inline",
+        target_fps: Optional[float] = None,
+        context: Optional[zmq.asyncio.Context] = None
+    ):
+        if schema_version not in (SCHEMA_V1, SCHEMA_V2):
+            raise ValueError(f"Unknown schema_version: {schema_version}")
+        if publish_mode not in ("inline", "background"):
+            raise ValueError(f"Unknown publish_mode: {publish_mode}")
+        
+        self.pub_port = pub_port
+        self.rep_port = rep_port
+        self.enabled = enabled
+        self.schema_version = schema_version
+        self.encoder = SnapshotEncoder(keyframe_interval=keyframe_interval)
+        self.publish_mode = publish_mode
+        self.target_fps = target_fps
+        
+        # Prefixes subscribed on the PUB socket (XPUB forwards the first
+        # subscribe and the last unsubscribe of each)
+        self.subscriptions = set()
+        
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        
+        # Latest capture waiting for the publisher task (background mode)
+        self._pending: Optional[StateCapture] = None
+        self._restart_requested = False
+        self._pending_event: Optional[asyncio.Event] = None
+        
+        self.context = context
+        self._own_context = context is None
+        self.pub_socket = None
+        self.rep_socket = None
+        self.running = False
+        self._tasks: List[asyncio.Task] = []
+        
+        self.directive_callback: Optional[Callable[[Dict], Optional[Dict]]] = None
+        self.directives_immediate = False
+        self.directives = DirectiveQueue()
+    
+    async def start(self):
+        """Bind the sockets and start the receive tasks"""
+        if not self.enabled:
+            return
+        
+        if self.context is None:
+            self.context = zmq.asyncio.Context()
+        
+        self.pub_socket = self.context.socket(zmq.XPUB)
+        self.pub_socket.setsockopt(zmq.XPUB_VERBOSE, 1)
+        self.pub_socket.bind(f"tcp://*:{self.pub_port}")
+        
+        self.rep_socket = self.context.socket(zmq.ROUTER)
+        self.rep_socket.bind(f"tcp://*:{self.rep_port}")
+        
+        self.running = True
+        self._tasks = [
+            asyncio.create_task(self._handle_directives()),
+            asyncio.create_task(self._watch_subscriptions())
+        ]
+        if self.publish_mode == "background":
+            self._pending_event = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._publish_loop()))
+        
+        print(f"ZeroMQ bridge started: PUB on {self.pub_port}, directives on {self.rep_port}")
+    
+    async def stop(self):
+        """Cancel the tasks, reject pending directives and close the sockets"""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
+        if self.rep_socket:
+            self.directives.reject_all("bridge stopped")
+            await self._send_acks()
+        
+        for socket in (self.pub_socket, self.rep_socket):
+            if socket:
+                socket.close(linger=0)
+        if self._own_context and self.context:
+            self.context.term()
+    
+    async def send_state(
+        self,
+        state: EnvironmentState,
+        observation: Dict,
+        info: Dict,
+        sector_field: Optional[SectorField] = None
+    ):
+        """Send state update to Unity (sector_field: see capture_state)"""
+        if not self.enabled or not self.pub_socket:
+            return
+        
+        await self.send_capture(capture_state(state, observation, info, sector_field))
+    
+    async def send_capture(self, capture: StateCapture, restart: bool = False):
+        """Send an already captured state (see ZMQBridge.send_capture)"""
+        if not self.enabled or not self.pub_socket:
+            return
+        
+        if self.publish_mode == "background":
+            if self._pending is not None:
+                self.frames_dropped += 1
+            self._pending = capture
+            self._restart_requested = self._restart_requested or restart
+            self._pending_event.set()
+            return
+        
+        await self._publish(capture, restart)
+    
+    async def apply_directives(self, timestep: int) -> int:
+        """
+        Apply directives received since the last call and acknowledge them
+        
+        Args:
+            timestep: Current env timestep, reported in each acknowledgment
+        
+        Returns:
+            Number of requests applied
+        """
+        if not self.directives:
+            return 0
+        count = self.directives.apply(timestep, self.directive_callback)
+        await self._send_acks()
+        return count
+    
+    def set_directive_callback(self, callback: Callable[[Dict], Optional[Dict]], immediate: bool = False):
+        """Set callback for processing mission directives (see ZMQBridge)"""
+        self.directive_callback = callback
+        self.directives_immediate = immediate
+    
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "directives_applied": self.directives.applied,
+            "directives_pending": len(self.directives)
+        }
+    
+    async def _publish(self, capture: StateCapture, restart: bool = False):
+        if restart:
+            self.encoder.reset()
+        # Nobody on the PUB socket: skip the encode (a subscriber joining gets a keyframe)
+        if not self.subscriptions:
+            return
+        
+        try:
+            if self.schema_version == SCHEMA_V2:
+                frames = self.encoder.encode(capture, extra=stamp(self.frames_sent))
+                await self.pub_socket.send_multipart(frames, copy=False)
+            else:
+                message = snapshot_v1(capture)
+                message.update(stamp(self.frames_sent))
+                await self.pub_socket.send_string(json.dumps(message))
+            self.frames_sent += 1
+        except zmq.ZMQError as e:
+            print(f"Error sending state: {e}")
+    
+    async def _publish_loop(self):
+        """Send the latest capture at up to target_fps"""
+        min_interval = 1.0 / self.target_fps if self.target_fps else 0.0
+        last_send = 0.0
+        
+        while self.running:
+            await self._pending_event.wait()
+            
+            # Let newer captures replace this one until the frame is due
+            delay = last_send + min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            self._pending_event.clear()
+            capture, self._pending = self._pending, None
+            restart, self._restart_requested = self._restart_requested, False
+            if capture is None:
+                continue
+            
+            last_send = time.monotonic()
+            await self._publish(capture, restart)
+    
+    async def _watch_subscriptions(self):
+        """Track XPUB subscriptions; a new subscriber needs a keyframe"""
+        while self.running:
+            message = await self.pub_socket.recv()
+            if not message:
+                continue
+            if message[0] == 1:
+                self.subscriptions.add(message[1:])
+                self.encoder.request_keyframe()
+            elif message[0] == 0:
+                self.subscriptions.discard(message[1:])
+    
+    async def _handle_directives(self):
+        while self.running:
+            frames = await self.rep_socket.recv_multipart()
+            envelope, body = frames[:-1], frames[-1]
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                self.directives.ack(envelope, {"status": "error", "message": f"Invalid directive: {e}"})
+            else:
+                if self.directive_callback is None or self.directives_immediate:
+                    self.directives.ack(envelope, apply_payload(payload, self.directive_callback))
+                else:
+                    self.directives.put(payload, envelope)
+            await self._send_acks()
+    
+    async def _send_acks(self):
+        for envelope, response in self.directives.take_acks():
+            try:
+                await self.rep_socket.send_multipart(envelope + [json.dumps(response).encode("utf-8")])
+            except zmq.ZMQError as e:
+                print(f"Error sending directive ack: {e}")
@@ -0,0 +1,102 @@
+"""Directive queue between the bridge's socket thread and the simulation
+
+Directives received from Unity are not applied on the socket thread. They
+wait here until the thread stepping the env drains them at a step boundary,
+and each one is acknowledged with the timestep at which it took effect.
+Both directions are deques (append/popleft are atomic), so neither side
+ever waits on the other.
+"""
+
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+# A single directive or a list applied together at the same boundary
+Payload = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+
+class DirectiveQueue:
+    """
+    Pending directives and the acknowledgments for applied ones
+    
+    put() and take_acks() are called by the socket thread; apply() by the
+    thread that steps the env. reply_to is opaque (the ROUTER envelope).
+    """
+    
+    def __init__(self):
+        self._pending: deque = deque()
+        self._acks: deque = deque()
+        self.applied = 0
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def put(self, payload: Payload, reply_to: Any):
+        self._pending.append((payload, reply_to))
+    
+    def ack(self, reply_to: Any, response: Dict[str, Any]):
+        """Queue a reply to be sent by the socket thread"""
+        self._acks.append((reply_to, response))
+    
+    def take_acks(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Remove and return every queued reply"""
+        acks = []
+        while self._acks:
+            acks.append(self._acks.popleft())
+        return acks
+    
+    def apply(self, timestep: int, callback: Optional[Callable[[Dict], Optional[Dict]]]) -> int:
+        """
+        Apply every pending directive (call only at a step boundary)
+        
+        Args:
+            timestep: Current env timestep, reported in each acknowledgment
+            callback: Applies one directive; may return extra reply fields
+        
+        Returns:
+            Number of requests acknowledged
+        """
+        count = 0
+        for payload, reply_to in self._take_pending():
+            response = apply_payload(payload, callback)
+            response["timestep"] = timestep
+            self.ack(reply_to, response)
+            count += 1
+        self.applied += count
+        return count
+    
+    def reject_all(self, message: str) -> int:
+        """Fail every pending directive (e.g. the bridge is stopping)"""
+        count = 0
+        for _, reply_to in self._take_pending():
+            self.ack(reply_to, {"status": "error", "message": message})
+            count += 1
+        return count
+    
+    def _take_pending(self):
+        while True:
+            try:
+                yield self._pending.popleft()
+            except IndexError:
+                return
+
+
+def apply_payload(payload: Payload, callback: Optional[Callable[[Dict], Optional[Dict]]]) -> Dict[str, Any]:
+    """Apply a request (one directive or a list) and build its reply"""
+    if isinstance(payload, list):
+        results = [apply_directive(directive, callback) for directive in payload]
+        failed = any(result["status"] != "ok" for result in results)
+        return {"status": "error" if failed else "ok", "results": results}
+    return apply_directive(payload, callback)
+
+
+def apply_directive(directive: Dict[str, Any], callback: Optional[Callable[[Dict], Optional[Dict]]]) -> Dict[str, Any]:
+    """Run one directive through the callback and build its reply"""
+    response = {"status": "ok"}
+    try:
+        result = callback(directive) if callback else None
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+    if isinstance(result, dict):
+        response.update(result)
+    return response
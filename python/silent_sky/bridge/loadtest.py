@@ -0,0 +1,518 @@
+"""Headless stand-in for the Unity client, for load-testing the bridge
+
+Simulated clients connect to a running ZMQBridge the way Unity does:
+    
+    SubscriberClient  subscribes to the PUB socket (or one topic socket),
+                      decodes every message as the Unity client would, and
+                      measures publish-to-receive latency, message sizes and
+                      messages lost on the way
+    DirectiveClient   sends mission directives and upgrade purchases to the
+                      directive socket at a fixed rate and times each ack
+
+Latency and loss come from the publisher stamp on every message (see
+protocol.py): a gap in "seq" is a message the client never got (e.g. its
+receive high-water mark overflowed), and "sent_at" is the publisher's wall
+clock at send, so latencies are only meaningful with the bridge and the
+clients on the same machine. Steps the bridge conflated before sending
+(publish_mode "background") show up as skipped timesteps, not as losses.
+
+LoadTest spreads the clients over worker processes, so decoding is not
+limited to one core and the bridge under test keeps its own:
+    
+    test = LoadTest(subscribers=20, directive_clients=4, directive_rate=5.0)
+    test.start()   # Fork the workers before the bridge opens its sockets
+    bridge.start()
+    test.begin()   # Directive clients start sending
+    ...            # Step an env through the bridge
+    report = test.stop()
+    bridge.stop()
+"""
+
+import json
+import multiprocessing
+import random
+import time
+from threading import Thread
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import zmq
+
+from ..utils.benchmark import latency_stats
+from .protocol import SnapshotDecoder
+from .topics import DEFAULT_TOPIC_PORT, TOPICS, decode_topic
+
+
+# Reward weights sent by the Unity MissionDirectives panel
+REWARD_WEIGHT_KEYS = ("discovery_value", "operational_cost", "exploration_bias")
+
+SNAPSHOT_STREAM = "snapshots"
+
+
+class SubscriberClient:
+    """
+    One simulated viewer on the PUB socket or on a topic socket
+    
+    Full snapshots are decoded like the Unity client does (schema_version 1
+    parsed as JSON, schema_version 2 through a SnapshotDecoder). A v2
+    subscriber that loses a message cannot apply the following deltas, so
+    it waits for the next keyframe; messages received meanwhile count as
+    unsynced.
+    """
+    
+    def __init__(
+        self,
+        address: str,
+        topic: Optional[str] = None,
+        decode: bool = True,
+        process_delay: float = 0.0,
+        rcvhwm: int = 1000
+    ):
+        """
+        Args:
+            address: Address of the PUB (or topic) socket
+            topic: Topic published on address, None for full snapshots
+            decode: Decode v2 snapshots fully (otherwise only the header)
+            process_delay: Seconds spent per message after decoding, to
+                           simulate a slow viewer (e.g. 0.016 for 60 fps)
+            rcvhwm: Receive high-water mark; a slow viewer loses messages
+                    once this many are queued
+        """
+        self.address = address
+        self.topic = topic
+        self.stream = topic or SNAPSHOT_STREAM
+        self.decode = decode
+        self.process_delay = process_delay
+        self.rcvhwm = rcvhwm
+        
+        self.received = 0
+        self.lost = 0
+        self.skipped_steps = 0
+        self.unsynced = 0
+        self.keyframes = 0
+        self.errors = 0
+        self.latencies_ns: List[int] = []
+        self.decode_ns: List[int] = []
+        self.sizes: List[int] = []
+        self._last_seq: Optional[int] = None
+        self._last_timestep: Optional[int] = None
+        self._decoder = SnapshotDecoder()
+    
+    def run(self, stop, context: zmq.Context):
+        """Receive until stop (a threading or multiprocessing Event) is set"""
+        socket = context.socket(zmq.SUB)
+        socket.setsockopt(zmq.RCVHWM, self.rcvhwm)
+        socket.setsockopt(zmq.SUBSCRIBE, b"")
+        socket.connect(self.address)
+        try:
+            while not stop.is_set():
+                if not socket.poll(100):
+                    continue
+                frames = socket.recv_multipart()
+                received_at = time.time()
+                self._handle(frames, received_at)
+                if self.process_delay:
+                    time.sleep(self.process_delay)
+        finally:
+            socket.close(linger=0)
+    
+    def result(self) -> Dict[str, Any]:
+        return {
+            "stream": self.stream,
+            "received": self.received,
+            "lost": self.lost,
+            "skipped_steps": self.skipped_steps,
+            "unsynced": self.unsynced,
+            "keyframes": self.keyframes,
+            "errors": self.errors,
+            "last_seq": self._last_seq,
+            "latencies_ns": np.asarray(self.latencies_ns, dtype=np.int64),
+            "decode_ns": np.asarray(self.decode_ns, dtype=np.int64),
+            "sizes": np.asarray(self.sizes, dtype=np.int64)
+        }
+    
+    def _handle(self, frames: List[bytes], received_at: float):
+        self.received += 1
+        self.sizes.append(sum(len(frame) for frame in frames))
+        
+        start = time.perf_counter_ns()
+        try:
+            header = self._decode(frames)
+        except Exception:
+            self.errors += 1
+            return
+        self.decode_ns.append(time.perf_counter_ns() - start)
+        
+        if "sent_at" in header:
+            self.latencies_ns.append(int((received_at - header["sent_at"]) * 1e9))
+    
+    def _track(self, header: Dict[str, Any]):
+        """Count lost messages (seq gaps) and skipped timesteps"""
+        seq = header.get("seq")
+        if seq is not None:
+            if self._last_seq is not None and seq > self._last_seq + 1:
+                self.lost += seq - self._last_seq - 1
+                self._decoder.synced = False  # Deltas were missed
+            # A lower seq is a restarted publisher; count from there
+            self._last_seq = seq
+        
+        timestep = header.get("timestep")
+        if timestep is not None:
+            if self._last_timestep is not None and timestep > self._last_timestep + 1:
+                self.skipped_steps += timestep - self._last_timestep - 1
+            self._last_timestep = timestep
+    
+    def _decode(self, frames: List[bytes]) -> Dict[str, Any]:
+        """Decode one message; returns its header (or the whole v1 snapshot)"""
+        if self.topic is not None:
+            header = decode_topic(frames)
+            self._track(header)
+            return header
+        if len(frames) == 1:
+            header = json.loads(frames[0])
+            self._track(header)
+            return header
+        
+        header = json.loads(frames[0])
+        self._track(header)  # First: after a gap the deltas cannot be applied
+        if header.get("keyframe"):
+            self.keyframes += 1
+        if self.decode:
+            # Resyncs on a keyframe, like the Unity decoder
+            if self._decoder.decode(frames) is None:
+                self.unsynced += 1
+        return header
+
+
+class DirectiveClient:
+    """
+    One simulated Unity control panel sending directives over REQ
+    
+    Each request is a reward-weight directive, or with probability
+    upgrade_fraction an upgrade purchase. Requests are sent at up to rate
+    per second; as with REQ in Unity, the next one waits for the ack. A
+    request unanswered after timeout seconds is counted and the socket is
+    reopened (a REQ socket cannot send again without a reply).
+    """
+    
+    def __init__(
+        self,
+        address: str,
+        rate: float = 1.0,
+        upgrade_fraction: float = 0.1,
+        upgrades: Sequence[str] = (),
+        timeout: float = 5.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            address: Address of the directive socket
+            rate: Requests per second (0: back to back)
+            upgrade_fraction: Share of requests that purchase an upgrade
+            upgrades: Upgrade names to choose from (none: directives only)
+            timeout: Seconds to wait for an ack
+            seed: Seed for the directive choices
+        """
+        self.address = address
+        self.rate = rate
+        self.upgrade_fraction = upgrade_fraction if upgrades else 0.0
+        self.upgrades = list(upgrades)
+        self.timeout = timeout
+        self.seed = seed
+        
+        self.sent = 0
+        self.acked = 0
+        self.timeouts = 0
+        self.statuses: Dict[str, int] = {}
+        self.ack_ns: List[int] = []
+    
+    def run(self, stop, context: zmq.Context, go=None):
+        """
+        Send until stop is set
+        
+        Args:
+            stop: threading or multiprocessing Event
+            context: ZMQ context for the socket
+            go: Event to wait for before the first request (None: start now)
+        """
+        while go is not None and not go.is_set() and not stop.is_set():
+            go.wait(0.1)
+        rng = random.Random(self.seed)
+        interval = 1.0 / self.rate if self.rate else 0.0
+        socket = self._connect(context)
+        next_send = time.monotonic()
+        try:
+            while not stop.is_set():
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    stop.wait(delay)
+                    continue
+                # Falling behind skips sends instead of bursting to catch up
+                next_send = max(next_send + interval, time.monotonic())
+                
+                start = time.perf_counter_ns()
+                socket.send_json(self._directive(rng))
+                self.sent += 1
+                reply = self._wait_reply(socket, stop)
+                if reply is None:
+                    if stop.is_set():
+                        break
+                    self.timeouts += 1
+                    socket.close(linger=0)
+                    socket = self._connect(context)
+                    continue
+                self.ack_ns.append(time.perf_counter_ns() - start)
+                self.acked += 1
+                status = reply.get("status", "unknown")
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+        finally:
+            socket.close(linger=0)
+    
+    def result(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "acked": self.acked,
+            "timeouts": self.timeouts,
+            "statuses": dict(self.statuses),
+            "ack_ns": np.asarray(self.ack_ns, dtype=np.int64)
+        }
+    
+    def _connect(self, context: zmq.Context) -> zmq.Socket:
+        socket = context.socket(zmq.REQ)
+        socket.connect(self.address)
+        return socket
+    
+    def _wait_reply(self, socket: zmq.Socket, stop) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + self.timeout
+        while not stop.is_set() and time.monotonic() < deadline:
+            if socket.poll(100):
+                return socket.recv_json()
+        return None
+    
+    def _directive(self, rng: random.Random) -> Dict[str, Any]:
+        if self.upgrades and rng.random() < self.upgrade_fraction:
+            return {"upgrade": rng.choice(self.upgrades)}
+        return {"reward_weights": {key: round(rng.uniform(0.0, 2.0), 2) for key in REWARD_WEIGHT_KEYS}}
+
+
+def _worker_main(conn, clients: List[Any], stop, go):
+    """Run clients as threads until stop, then send their results"""
+    context = zmq.Context()
+    threads = []
+    for client in clients:
+        # Subscribers listen from the start; directive clients wait for go
+        args = (stop, context, go) if isinstance(client, DirectiveClient) else (stop, context)
+        threads.append(Thread(target=client.run, args=args, daemon=True))
+    for thread in threads:
+        thread.start()
+    conn.send(None)  # Sockets connecting
+    for thread in threads:
+        thread.join()
+    context.term()
+    conn.send([(type(client).__name__, client.result()) for client in clients])
+    conn.close()
+
+
+class LoadTest:
+    """
+    Simulated Unity clients in worker processes, with a merged report
+    
+    start() returns once every subscriber is connecting, begin() lets the
+    directive clients send and starts the clock, and stop() collects the
+    results (see summarize). Start the workers before the bridge under test
+    creates its ZMQ context in this process, so they fork without it.
+    """
+    
+    def __init__(
+        self,
+        host: str = "localhost",
+        pub_port: int = 5555,
+        rep_port: int = 5556,
+        subscribers: int = 1,
+        directive_clients: int = 0,
+        directive_rate: float = 1.0,
+        upgrade_fraction: float = 0.1,
+        upgrades: Sequence[str] = (),
+        topics: Sequence[str] = (),
+        topic_subscribers: int = 1,
+        topic_port: int = DEFAULT_TOPIC_PORT,
+        decode: bool = True,
+        process_delay: float = 0.0,
+        rcvhwm: int = 1000,
+        timeout: float = 5.0,
+        processes: Optional[int] = None,
+        seed: int = 0
+    ):
+        """
+        Args:
+            host: Host the bridge listens on
+            pub_port, rep_port: Bridge ports (unity.pub_port, unity.rep_port)
+            subscribers: Viewers on the PUB socket
+            directive_clients: Clients sending directives
+            directive_rate: Requests per second per directive client
+            upgrade_fraction: Share of directive requests that buy an upgrade
+            upgrades: Upgrade names the directive clients choose from
+            topics: Topics to subscribe to (see topics.py)
+            topic_subscribers: Viewers per topic
+            topic_port: Base port of the topic sockets (unity.topics.base_port)
+            decode, process_delay, rcvhwm: Passed to every SubscriberClient
+            timeout: Directive ack timeout in seconds
+            processes: Worker processes (default: min(CPU count, clients))
+            seed: Base seed for the directive clients
+        """
+        for topic in topics:
+            if topic not in TOPICS:
+                raise ValueError(f"Unknown topic: {topic}")
+        
+        clients: List[Any] = [
+            SubscriberClient(f"tcp://{host}:{pub_port}", decode=decode, process_delay=process_delay, rcvhwm=rcvhwm)
+            for _ in range(subscribers)
+        ]
+        for topic in topics:
+            address = f"tcp://{host}:{topic_port + TOPICS.index(topic)}"
+            clients += [
+                SubscriberClient(address, topic=topic, process_delay=process_delay, rcvhwm=rcvhwm)
+                for _ in range(topic_subscribers)
+            ]
+        clients += [
+            DirectiveClient(
+                f"tcp://{host}:{rep_port}",
+                rate=directive_rate,
+                upgrade_fraction=upgrade_fraction,
+                upgrades=upgrades,
+                timeout=timeout,
+                seed=seed + i
+            )
+            for i in range(directive_clients)
+        ]
+        if not clients:
+            raise ValueError("LoadTest needs at least one client")
+        
+        processes = processes or min(multiprocessing.cpu_count(), len(clients))
+        self.clients = clients
+        self.groups = [clients[i::processes] for i in range(min(processes, len(clients)))]
+        self._stop = multiprocessing.Event()
+        self._go = multiprocessing.Event()
+        self._conns = []
+        self._processes = []
+        self._started: Optional[float] = None
+    
+    def start(self):
+        """Start the worker processes and wait until every client is connected"""
+        for group in self.groups:
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker_main, args=(child_conn, group, self._stop, self._go), daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        for conn in self._conns:
+            conn.recv()
+    
+    def begin(self):
+        """Let the directive clients send (the bridge must be up) and start the clock"""
+        time.sleep(0.2)  # Let connections and subscriptions settle
+        self._go.set()
+        self._started = time.monotonic()
+    
+    def stop(self) -> Dict[str, Any]:
+        """Stop every client and return the summarized results"""
+        duration = time.monotonic() - self._started if self._started else 0.0
+        self._stop.set()
+        results = []
+        for conn in self._conns:
+            results += conn.recv()
+            conn.close()
+        for process in self._processes:
+            process.join()
+        self._conns = []
+        self._processes = []
+        return summarize(results, duration)
+
+
+def _size_stats(sizes: np.ndarray) -> Dict[str, float]:
+    if not len(sizes):
+        return {"mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0}
+    p50, p99 = np.percentile(sizes, [50, 99])
+    return {"mean": float(sizes.mean()), "p50": float(p50), "p99": float(p99), "max": int(sizes.max())}
+
+
+def summarize(results: List[Any], duration: float) -> Dict[str, Any]:
+    """
+    Merge client results into a report
+    
+    Args:
+        results: (client class name, result) pairs from the workers
+        duration: Seconds the clients ran
+    
+    Returns:
+        Dict with duration_s, "streams" (per stream: clients, received,
+        lost, loss_rate, skipped_steps, unsynced, keyframes, errors,
+        last_seq of the client furthest behind, bytes,
+        messages_per_s per client, size stats, latency and decode
+        latency_stats) and "directives" (clients, sent, acked, timeouts,
+        statuses, requests_per_s, ack latency_stats)
+    """
+    streams: Dict[str, List[Dict[str, Any]]] = {}
+    directives: List[Dict[str, Any]] = []
+    for kind, result in results:
+        if kind == "DirectiveClient":
+            directives.append(result)
+        else:
+            streams.setdefault(result["stream"], []).append(result)
+    
+    report: Dict[str, Any] = {"duration_s": duration, "streams": {}}
+    for stream, group in streams.items():
+        received = sum(r["received"] for r in group)
+        lost = sum(r["lost"] for r in group)
+        latencies = np.concatenate([r["latencies_ns"] for r in group])
+        decode = np.concatenate([r["decode_ns"] for r in group])
+        sizes = np.concatenate([r["sizes"] for r in group])
+        report["streams"][stream] = {
+            "clients": len(group),
+            "received": received,
+            "lost": lost,
+            "loss_rate": lost / (received + lost) if received + lost else 0.0,
+            "skipped_steps": sum(r["skipped_steps"] for r in group),
+            "unsynced": sum(r["unsynced"] for r in group),
+            "keyframes": sum(r["keyframes"] for r in group),
+            "errors": sum(r["errors"] for r in group),
+            "last_seq": min((r["last_seq"] for r in group if r["last_seq"] is not None), default=None),
+            "bytes": int(sizes.sum()),
+            "messages_per_s": received / len(group) / duration if duration else 0.0,
+            "size": _size_stats(sizes),
+            "latency": latency_stats(latencies) if len(latencies) else None,
+            "decode": latency_stats(decode) if len(decode) else None
+        }
+    
+    if directives:
+        acks = np.concatenate([r["ack_ns"] for r in directives])
+        statuses: Dict[str, int] = {}
+        for r in directives:
+            for status, count in r["statuses"].items():
+                statuses[status] = statuses.get(status, 0) + count
+        acked = sum(r["acked"] for r in directives)
+        report["directives"] = {
+            "clients": len(directives),
+            "sent": sum(r["sent"] for r in directives),
+            "acked": acked,
+            "timeouts": sum(r["timeouts"] for r in directives),
+            "statuses": statuses,
+            "requests_per_s": acked / duration if duration else 0.0,
+            "ack": latency_stats(acks) if len(acks) else None
+        }
+    return report
+
+
+def latency_cases(report: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Latency entries of a report as benchmark cases, for compare_results"""
+    cases = {}
+    for stream, stats in report["streams"].items():
+        if stats["latency"]:
+            cases[f"bridge.latency[{stream}]"] = stats["latency"]
+        if stats["decode"]:
+            cases[f"client.decode[{stream}]"] = stats["decode"]
+    directives = report.get("directives")
+    if directives and directives["ack"]:
+        cases["bridge.directive_ack"] = directives["ack"]
+    return cases
@@ -0,0 +1,631 @@
+"""State snapshot wire formats for the Unity bridge
+
+schema_version 1: a single JSON message holding the full state every step.
+
+schema_version 2: a multipart message whose first frame is a small JSON
+header and whose remaining frames are raw little-endian buffers:
+    
+    frame 0  header JSON (scalars, info, upgrades, event type table)
+    frame 1  sectors            float32 (3, num_sectors): reading, confidence, activity_rate,
+                                or SECTOR_DTYPE records if "sectors_sparse"
+    frame 2  observation        float32: sensor_readings, sensor_confidence,
+                                time_remaining, budget_remaining concatenated
+    frame 3  events             EVENT_DTYPE records
+    frame 4  discovered_events  DISCOVERED_DTYPE records
+    frame 5  updated events     EVENT_UPDATE_DTYPE records
+
+Keyframes ("keyframe": true) carry the full live event history. Other
+messages carry only the events added and discovered since the previous
+message, plus any already-sent event whose fields changed since it was last
+sent, re-sent whole. Only events still in play (see
+utils.events.event_in_play) are checked for changes, so the size and
+encoding cost of these messages follow the active events, not the episode
+length; a keyframe copies the records already sent rather than reading
+every event again. Messages also send only the sectors whose values changed
+("sectors_sparse": true) when that is smaller than the dense block, so
+large skies cost what an observation touched. Captures taken from a
+SectorField name the changed sectors themselves, so neither the capture
+nor the encoder reads the whole sky except for a keyframe. A keyframe,
+always dense, is sent every keyframe_interval steps, on a new episode, and
+whenever requested (e.g. when a subscriber joins late).
+
+Event positions ("events_offset", "discovered_offset" and the "index" of
+discovered and updated records) count from the start of the episode.
+Long-horizon runs trim expired events off the front of the state's lists
+(see EventArchive); the state's events_base and discovered_base say how
+many were removed, and a keyframe then starts at events_offset ==
+events_base instead of 0.
+
+Both versions carry a publisher stamp (see stamp): "seq" counts the
+messages the publisher has sent, so a gap means messages were lost on the
+way, and "sent_at" is the publisher's wall clock (time.time()) at send.
+Receivers on the same machine can measure publish-to-receive latency
+against it.
+"""
+
+import json
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from ..env.state import EnvironmentState
+from ..sky.hexgrid import SectorField
+
+
+SCHEMA_V1 = 1
+SCHEMA_V2 = 2
+
+OBSERVATION_KEYS = ("sensor_readings", "sensor_confidence", "time_remaining", "budget_remaining")
+
+EVENT_DTYPE = np.dtype([
+    ("timestep", "<i4"),
+    ("value", "<f4"),
+    ("sector", "<u2"),
+    ("event_type", "u1"),
+    ("discovered", "u1"),
+])
+
+# Already-sent event whose fields changed; "index" is its position in the events list
+EVENT_UPDATE_DTYPE = np.dtype([("index", "<i4")] + EVENT_DTYPE.descr)
+
+# Changed sector in a sparse sectors frame
+SECTOR_DTYPE = np.dtype([
+    ("index", "<u4"),
+    ("reading", "<f4"),
+    ("confidence", "<f4"),
+    ("activity_rate", "<f4"),
+])
+
+# Rows of the dense sectors block, and the channels a SectorField capture needs
+SECTOR_CHANNELS = ("reading", "confidence", "activity_rate")
+
+# "index" is the position of the event in the events list, -1 if unknown
+DISCOVERED_DTYPE = np.dtype([
+    ("index", "<i4"),
+    ("value", "<f4"),
+    ("sector", "<u2"),
+    ("event_type", "u1"),
+    ("pad", "u1"),
+])
+
+
+class StateCapture(NamedTuple):
+    """
+    Point-in-time copy of what a snapshot needs, cheap to take in the step loop
+    
+    Sector values and observation arrays are copied. The event lists are
+    referenced together with their current lengths; they are append-only, so
+    encoding later only reads the first num_events entries. Event objects
+    themselves are read at encode time. Trimming replaces the lists rather
+    than deleting from them, so a capture's lists stay valid; events_base
+    and discovered_base are the episode positions of their first entries.
+    
+    A capture taken from a SectorField references the field instead of
+    copying the sectors (sector_ids and sectors are None); like the events,
+    its values are read at encode time. Use dense_sectors for the full
+    block.
+    """
+    timestep: int
+    sector_ids: Optional[np.ndarray]
+    sectors: Optional[np.ndarray]
+    events: List
+    num_events: int
+    discovered_events: List
+    num_discovered: int
+    budget: float
+    total_earnings: float
+    total_costs: float
+    upgrades: Dict
+    time_remaining: float
+    observation: Dict[str, np.ndarray]
+    info: Dict
+    events_base: int = 0
+    discovered_base: int = 0
+    sector_field: Optional[SectorField] = None
+    
+    def dense_sectors(self) -> np.ndarray:
+        """(3, num_sectors) float32 sector values (SECTOR_CHANNELS rows)"""
+        if self.sector_field is None:
+            return self.sectors
+        return np.stack([self.sector_field[channel] for channel in SECTOR_CHANNELS]).astype("<f4")
+
+
+def capture_state(
+    state: EnvironmentState,
+    observation: Dict,
+    info: Dict,
+    sector_field: Optional[SectorField] = None
+) -> StateCapture:
+    """
+    Capture the state for encoding now or on another thread
+    
+    Args:
+        state: Env state
+        observation: Observation of the step
+        info: Info dict of the step
+        sector_field: SectorField with SECTOR_CHANNELS holding the sector
+            values, marked as they change. The capture references it instead
+            of reading every sector, and encoders send the sectors it marked.
+    """
+    if sector_field is None:
+        sectors = state.sectors
+        sector_ids = np.array([s.sector_id for s in sectors], dtype="<i4")
+        sector_values = np.array(
+            [(s.sensor_reading, s.sensor_confidence, s.activity_rate) for s in sectors],
+            dtype="<f4"
+        ).T.copy()
+    else:
+        sector_ids = sector_values = None
+    return StateCapture(
+        timestep=state.timestep,
+        sector_ids=sector_ids,
+        sectors=sector_values,
+        events=state.events,
+        num_events=len(state.events),
+        discovered_events=state.discovered_events,
+        num_discovered=len(state.discovered_events),
+        budget=float(state.budget),
+        total_earnings=float(state.total_earnings),
+        total_costs=float(state.total_costs),
+        upgrades=state.upgrades.copy(),
+        time_remaining=float(state.get_time_remaining()),
+        observation={key: np.array(observation[key]) for key in OBSERVATION_KEYS},
+        info=dict(info),
+        events_base=getattr(state, "events_base", 0),
+        discovered_base=getattr(state, "discovered_base", 0),
+        sector_field=sector_field
+    )
+
+
+def snapshot_v1(capture: StateCapture) -> Dict:
+    """Build the full JSON snapshot (schema_version 1)"""
+    sectors = capture.dense_sectors()
+    sector_ids = capture.sector_ids if capture.sector_ids is not None else np.arange(sectors.shape[1])
+    return {
+        "schema_version": SCHEMA_V1,
+        "timestep": capture.timestep,
+        "state": {
+            "sectors": [
+                {
+                    "sector_id": int(sector_id),
+                    "sensor_reading": float(reading),
+                    "sensor_confidence": float(confidence),
+                    "activity_rate": float(activity_rate)  # For visualization only
+                }
+                for sector_id, reading, confidence, activity_rate in zip(
+                    sector_ids.tolist(), *sectors.tolist()
+                )
+            ],
+            "events": [
+                {
+                    "event_type": e.event_type,
+                    "sector": e.sector,
+                    "timestep": e.timestep,
+                    "value": float(e.value),
+                    "discovered": e.discovered
+                }
+                for e in capture.events[:capture.num_events]
+            ],
+            "discovered_events": [
+                {
+                    "event_type": e.event_type,
+                    "sector": e.sector,
+                    "value": float(e.value)
+                }
+                for e in capture.discovered_events[:capture.num_discovered]
+            ],
+            "budget": capture.budget,
+            "total_earnings": capture.total_earnings,
+            "total_costs": capture.total_costs,
+            "upgrades": capture.upgrades,
+            "time_remaining": capture.time_remaining
+        },
+        "observation": {
+            key: capture.observation[key].tolist() for key in OBSERVATION_KEYS
+        },
+        "info": capture.info
+    }
+
+
+def stamp(seq: int) -> Dict[str, Any]:
+    """Publisher stamp for one message: sequence number and wall-clock send time"""
+    return {"seq": seq, "sent_at": time.time()}
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def apply_sectors_frame(sectors: Optional[np.ndarray], header: Dict, frame) -> np.ndarray:
+    """
+    Sector values after one message's sectors frame
+    
+    Args:
+        sectors: (3, num_sectors) values before the message (None before a keyframe)
+        header: Message header
+        frame: Frame 1 of the message
+    
+    Returns:
+        New (3, num_sectors) float32 array; sectors is not modified
+    """
+    num_sectors = header["num_sectors"]
+    if not header.get("sectors_sparse"):
+        return np.frombuffer(frame, dtype="<f4").reshape(3, num_sectors).copy()
+    if sectors is None or sectors.shape[1] != num_sectors:
+        raise ValueError("Sparse sectors frame without a preceding keyframe")
+    records = np.frombuffer(frame, dtype=SECTOR_DTYPE)
+    sectors = sectors.copy()
+    index = records["index"]
+    sectors[0, index] = records["reading"]
+    sectors[1, index] = records["confidence"]
+    sectors[2, index] = records["activity_rate"]
+    return sectors
+
+
+class _RecordLog:
+    """Records sent so far by episode position; appends are amortized and the front can be trimmed"""
+    
+    def __init__(self, dtype: np.dtype):
+        self._buffer = np.empty(256, dtype=dtype)
+        self._start = 0  # Buffer index of the record at position base
+        self._end = 0
+        self.base = 0
+    
+    def trim(self, position: int):
+        """Forget the records before position"""
+        if position > self.base:
+            self._start = min(self._end, self._start + position - self.base)
+            self.base = position
+    
+    def append(self, records: np.ndarray):
+        count = len(records)
+        if self._end + count > len(self._buffer):
+            kept = self._buffer[self._start:self._end]
+            buffer = np.empty(max(256, 2 * (len(kept) + count)), dtype=self._buffer.dtype)
+            buffer[:len(kept)] = kept
+            self._buffer, self._start, self._end = buffer, 0, len(kept)
+        self._buffer[self._end:self._end + count] = records
+        self._end += count
+    
+    def get(self, positions: np.ndarray) -> np.ndarray:
+        return self._buffer[self._start + positions - self.base]
+    
+    def put(self, positions: np.ndarray, records: np.ndarray):
+        self._buffer[self._start + positions - self.base] = records
+    
+    def copy(self, start: int, end: int) -> np.ndarray:
+        """Copy of the records at positions [start, end)"""
+        return self._buffer[self._start + start - self.base:self._start + end - self.base].copy()
+
+
+class SnapshotEncoder:
+    """
+    Stateful encoder for schema_version 2 messages
+    
+    Tracks how much of the event history has already been sent so that
+    non-keyframe messages only carry new, newly discovered and changed
+    events. Only sent events still in play are watched for changes; an
+    event leaves the watch once it is settled and its discovery has been
+    sent. The records sent so far are kept, so a keyframe copies them
+    instead of reading every event again. Captures that are skipped
+    (conflated) are covered by the next message. With SectorField captures
+    the changed sectors come from the field's change log (one cursor per
+    encoder), so the dense block is only built for keyframes.
+    """
+    
+    def __init__(self, keyframe_interval: int = 100):
+        self.keyframe_interval = keyframe_interval
+        self.reset()
+    
+    def reset(self):
+        """Forget what has been sent; the next message is a keyframe"""
+        self._event_types: Dict[Any, int] = {}
+        self._events_log = _RecordLog(EVENT_DTYPE)
+        self._discovered_log = _RecordLog(DISCOVERED_DTYPE)
+        # Sent events that may still change, oldest first, and their episode positions
+        self._watched: List = []
+        self._watched_positions = np.empty(0, dtype=np.int64)
+        self._sectors_sent: Optional[np.ndarray] = None
+        # SectorField the last message was read from, and its version then
+        self._sector_field: Optional[SectorField] = None
+        self._sector_version = 0
+        self._events_sent = 0
+        self._discovered_sent = 0
+        self._last_timestep: Optional[int] = None
+        self._last_keyframe: Optional[int] = None
+        self._keyframe_requested = True
+        self.sent_keyframe = False
+    
+    def request_keyframe(self):
+        """Make the next message a keyframe"""
+        self._keyframe_requested = True
+    
+    def encode(self, capture: StateCapture, extra: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Encode one captured step as a list of frames for send_multipart
+        
+        Args:
+            capture: Step to encode
+            extra: Additional header fields (e.g. a publisher stamp)
+        """
+        events = capture.events
+        discovered = capture.discovered_events
+        events_base = capture.events_base
+        discovered_base = capture.discovered_base
+        # Episode positions one past the last entry
+        num_events = events_base + capture.num_events
+        num_discovered = discovered_base + capture.num_discovered
+        
+        new_episode = (
+            self._last_timestep is None
+            or capture.timestep < self._last_timestep
+            or num_events < self._events_sent
+            or num_discovered < self._discovered_sent
+        )
+        if new_episode:
+            self.reset()
+        keyframe = (
+            self._keyframe_requested
+            or self._last_keyframe is None
+            or capture.timestep - self._last_keyframe >= self.keyframe_interval
+        )
+        
+        # Entries trimmed before they were sent are skipped
+        events_start = max(self._events_sent, events_base)
+        discovered_start = max(self._discovered_sent, discovered_base)
+        self._events_log.trim(events_base)
+        self._discovered_log.trim(discovered_base)
+        watched, positions = self._watched, self._watched_positions
+        if len(positions) and positions[0] < events_base:
+            live = positions >= events_base
+            watched = [e for e, kept in zip(watched, live.tolist()) if kept]
+            positions = positions[live]
+        
+        # Watched events whose fields changed since they were sent are re-sent whole
+        sent = self._events_log.get(positions)
+        current = self._records(watched)
+        updated = np.flatnonzero(current != sent)
+        update_records = np.empty(len(updated), dtype=EVENT_UPDATE_DTYPE)
+        update_records["index"] = positions[updated]
+        for field in EVENT_DTYPE.names:
+            update_records[field] = current[field][updated]
+        self._events_log.put(positions[updated], current[updated])
+        
+        new_events = events[events_start - events_base:num_events - events_base]
+        event_records = self._records(new_events)
+        self._events_log.append(event_records)
+        watched = watched + new_events
+        positions = np.concatenate([positions, np.arange(events_start, num_events, dtype=np.int64)])
+        current = np.concatenate([current, event_records])
+        # Discovered flags sent before this message
+        flag_sent = np.concatenate([sent["discovered"] != 0, np.zeros(len(event_records), dtype=bool)])
+        
+        # Newly discovered events were in play until now, so they are watched
+        new_discovered = discovered[discovered_start - discovered_base:num_discovered - discovered_base]
+        index: Dict[int, int] = {}
+        reported = set()
+        if new_discovered:
+            index = {id(e): int(position) for e, position in zip(watched, positions.tolist())}
+            reported = set(map(id, new_discovered))
+        discovered_records = np.array(
+            [
+                (index.get(id(e), -1), e.value, e.sector, self._type_code(e.event_type), 0)
+                for e in new_discovered
+            ],
+            dtype=DISCOVERED_DTYPE
+        )
+        self._discovered_log.append(discovered_records)
+        
+        # Stop watching settled events (see utils.events.event_in_play). A
+        # discovered one stays until its discovered record has been sent, so
+        # that record can carry its index; one whose record never comes (its
+        # entry was trimmed first) is dropped at the next keyframe
+        is_discovered = current["discovered"] != 0
+        settled = ~is_discovered & (current["value"] <= 0)
+        if is_discovered.any():
+            done = np.fromiter((id(e) in reported for e in watched), dtype=bool, count=len(watched))
+            if keyframe:
+                done |= flag_sent
+            settled |= is_discovered & done
+        kept = ~settled
+        self._watched = [e for e, keep in zip(watched, kept.tolist()) if keep]
+        self._watched_positions = positions[kept]
+        
+        if keyframe:
+            events_start, discovered_start = events_base, discovered_base
+            event_records = self._events_log.copy(events_base, num_events)
+            discovered_records = self._discovered_log.copy(discovered_base, num_discovered)
+            update_records = update_records[:0]
+        
+        sectors_frame, sectors_sparse, num_sectors = self._sectors_frame(capture, keyframe)
+        
+        obs = np.concatenate([
+            np.asarray(capture.observation[key], dtype="<f4").ravel()
+            for key in OBSERVATION_KEYS
+        ])
+        
+        header = {
+            "schema_version": SCHEMA_V2,
+            "timestep": capture.timestep,
+            "keyframe": keyframe,
+            "num_sectors": num_sectors,
+            "sectors_sparse": sectors_sparse,
+            "events_offset": events_start,
+            "discovered_offset": discovered_start,
+            "event_types": list(self._event_types.keys()),
+            "budget": capture.budget,
+            "total_earnings": capture.total_earnings,
+            "total_costs": capture.total_costs,
+            "upgrades": capture.upgrades,
+            "time_remaining": capture.time_remaining,
+            "info": capture.info
+        }
+        if extra:
+            header.update(extra)
+        
+        self._events_sent = num_events
+        self._discovered_sent = num_discovered
+        self._last_timestep = capture.timestep
+        if keyframe:
+            self._last_keyframe = capture.timestep
+            self._keyframe_requested = False
+        self.sent_keyframe = keyframe
+        
+        return [
+            json.dumps(header, default=_json_default).encode("utf-8"),
+            sectors_frame,
+            memoryview(obs).cast("B"),
+            memoryview(event_records).cast("B"),
+            memoryview(discovered_records).cast("B"),
+            memoryview(update_records).cast("B"),
+        ]
+    
+    def _sectors_frame(self, capture: StateCapture, keyframe: bool):
+        """Sectors frame: (frame, sparse, num_sectors)"""
+        field = capture.sector_field
+        changed = None
+        if field is not None:
+            num_sectors = field.num_sectors
+            if not keyframe and field is self._sector_field:
+                changed, version = field.changes_since(self._sector_version)
+            else:
+                version = field.version
+            self._sector_field, self._sector_version = field, version
+            self._sectors_sent = None
+            values = field.values
+            rows = [field.channels.index(channel) for channel in SECTOR_CHANNELS]
+        else:
+            sectors = capture.sectors
+            num_sectors = sectors.shape[1]
+            if not keyframe and self._sectors_sent is not None and self._sectors_sent.shape == sectors.shape:
+                changed = np.flatnonzero((sectors != self._sectors_sent).any(axis=0))
+            self._sector_field = None
+            self._sectors_sent = sectors
+            values, rows = sectors, [0, 1, 2]
+        
+        if changed is not None and len(changed) * SECTOR_DTYPE.itemsize < 3 * 4 * num_sectors:
+            records = np.empty(len(changed), dtype=SECTOR_DTYPE)
+            records["index"] = changed
+            for channel, row in zip(SECTOR_CHANNELS, rows):
+                records[channel] = values[row, changed]
+            return memoryview(records).cast("B"), True, num_sectors
+        return memoryview(capture.dense_sectors()).cast("B"), False, num_sectors
+    
+    def _records(self, events: List) -> np.ndarray:
+        return np.array(
+            [(e.timestep, e.value, e.sector, self._type_code(e.event_type), e.discovered) for e in events],
+            dtype=EVENT_DTYPE
+        )
+    
+    def _type_code(self, event_type: Any) -> int:
+        code = self._event_types.get(event_type)
+        if code is None:
+            code = len(self._event_types)
+            self._event_types[event_type] = code
+        return code
+
+
+class SnapshotDecoder:
+    """
+    Rebuilds schema_version 1 style snapshots from schema_version 2 messages
+    
+    Mirrors the C# SnapshotDecoder; used by Python-side viewers and tools.
+    Delta messages received before the first keyframe are skipped.
+    """
+    
+    def __init__(self):
+        self.events: List[Dict] = []
+        self.discovered_events: List[Dict] = []
+        self.events_base = 0  # Episode position of events[0]
+        self.sectors: Optional[np.ndarray] = None
+        self.synced = False
+    
+    def decode(self, frames: List[bytes]) -> Optional[Dict]:
+        """
+        Decode one multipart message
+        
+        Returns:
+            Snapshot dict in the schema_version 1 layout, or None while
+            waiting for a keyframe
+        """
+        header = json.loads(bytes(frames[0]))
+        if header["keyframe"]:
+            self.events = []
+            self.discovered_events = []
+            self.events_base = header["events_offset"]
+            self.synced = True
+        elif not self.synced:
+            return None
+        
+        event_types = header["event_types"]
+        num_sectors = header["num_sectors"]
+        sectors = apply_sectors_frame(self.sectors, header, frames[1])
+        self.sectors = sectors
+        obs = np.frombuffer(frames[2], dtype="<f4")
+        event_records = np.frombuffer(frames[3], dtype=EVENT_DTYPE)
+        discovered_records = np.frombuffer(frames[4], dtype=DISCOVERED_DTYPE)
+        update_records = np.frombuffer(frames[5], dtype=EVENT_UPDATE_DTYPE) if len(frames) > 5 else ()
+        
+        for r in event_records:
+            self.events.append({
+                "event_type": event_types[r["event_type"]],
+                "sector": int(r["sector"]),
+                "timestep": int(r["timestep"]),
+                "value": float(r["value"]),
+                "discovered": bool(r["discovered"])
+            })
+        for r in update_records:
+            index = r["index"] - self.events_base
+            if 0 <= index < len(self.events):
+                self.events[index] = {
+                    "event_type": event_types[r["event_type"]],
+                    "sector": int(r["sector"]),
+                    "timestep": int(r["timestep"]),
+                    "value": float(r["value"]),
+                    "discovered": bool(r["discovered"])
+                }
+        for r in discovered_records:
+            index = r["index"] - self.events_base
+            if r["index"] >= 0 and 0 <= index < len(self.events):
+                self.events[index]["discovered"] = True
+            self.discovered_events.append({
+                "event_type": event_types[r["event_type"]],
+                "sector": int(r["sector"]),
+                "value": float(r["value"])
+            })
+        
+        return {
+            "schema_version": SCHEMA_V2,
+            "timestep": header["timestep"],
+            "state": {
+                "sectors": [
+                    {
+                        "sector_id": i,
+                        "sensor_reading": float(sectors[0, i]),
+                        "sensor_confidence": float(sectors[1, i]),
+                        "activity_rate": float(sectors[2, i])
+                    }
+                    for i in range(num_sectors)
+                ],
+                "events": self.events,
+                "discovered_events": self.discovered_events,
+                "budget": header["budget"],
+                "total_earnings": header["total_earnings"],
+                "total_costs": header["total_costs"],
+                "upgrades": header["upgrades"],
+                "time_remaining": header["time_remaining"]
+            },
+            "observation": {
+                "sensor_readings": obs[:num_sectors].tolist(),
+                "sensor_confidence": obs[num_sectors:2 * num_sectors].tolist(),
+                "time_remaining": obs[2 * num_sectors:2 * num_sectors + 1].tolist(),
+                "budget_remaining": obs[2 * num_sectors + 1:].tolist()
+            },
+            "info": header["info"],
+            **{key: header[key] for key in ("seq", "sent_at") if key in header}
+        }
@@ -0,0 +1,198 @@
+"""Bridge recordings: schema_version 2 snapshot streams saved for replay
+
+A recording is the sequence of messages a schema_version 2 bridge would
+publish, one per step, with a keyframe every keyframe_interval steps:
+    
+    preamble       MAGIC, version, metadata length, metadata JSON
+    step records   <d wall_time> <I num_frames> then per frame <I length> bytes
+    index block    columnar block (see episode_format) with per-step
+                   offsets, timesteps, keyframe flags and wall times
+    footer         <Q index offset> INDEX_MAGIC
+
+Seeking to step n reads the keyframe at or before n and the deltas after
+it, so the cost is bounded by keyframe_interval regardless of episode
+length. The file is memory-mapped, never loaded whole. A recording without
+an index (e.g. its episode is still running) is indexed by a scan.
+"""
+
+import json
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..env.state import EnvironmentState
+from ..sky.hexgrid import SectorField
+from ..utils.episode_format import pack_columns, unpack_columns
+from .protocol import SnapshotEncoder, StateCapture, capture_state
+
+
+MAGIC = b"SSRC"
+INDEX_MAGIC = b"SSRI"
+FORMAT_VERSION = 1
+
+_PREAMBLE = struct.Struct("<4sHI")
+_RECORD = struct.Struct("<dI")
+_FRAME = struct.Struct("<I")
+_FOOTER = struct.Struct("<Q4s")
+
+
+class BridgeRecorder:
+    """
+    Records what a schema_version 2 bridge would publish, for replay
+    
+    Uses its own encoder, so recording works with any bridge schema or with
+    no bridge at all.
+    """
+    
+    def __init__(self, path: Union[str, Path], metadata: Optional[Dict] = None, keyframe_interval: int = 100):
+        self.path = Path(path)
+        self.encoder = SnapshotEncoder(keyframe_interval=keyframe_interval)
+        self.closed = False
+        self._start = time.perf_counter()
+        self._offsets: List[int] = []
+        self._timesteps: List[int] = []
+        self._keyframes: List[int] = []
+        self._wall_times: List[float] = []
+        
+        metadata = dict(metadata or {})
+        metadata["keyframe_interval"] = keyframe_interval
+        header = json.dumps(metadata, default=str).encode("utf-8")
+        self._file = open(self.path, "wb")
+        self._file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        self._file.write(header)
+    
+    def record(
+        self,
+        state: EnvironmentState,
+        observation: Dict,
+        info: Dict,
+        sector_field: Optional[SectorField] = None
+    ):
+        """Record one step (sector_field: see capture_state)"""
+        self.record_capture(capture_state(state, observation, info, sector_field))
+    
+    def record_capture(self, capture: StateCapture):
+        """Record one already captured step"""
+        frames = self.encoder.encode(capture)
+        wall_time = time.perf_counter() - self._start
+        
+        self._offsets.append(self._file.tell())
+        self._timesteps.append(capture.timestep)
+        self._keyframes.append(self.encoder.sent_keyframe)
+        self._wall_times.append(wall_time)
+        
+        self._file.write(_RECORD.pack(wall_time, len(frames)))
+        for frame in frames:
+            self._file.write(_FRAME.pack(len(frame)))
+            self._file.write(frame)
+    
+    def close(self):
+        """Write the index and footer"""
+        if self.closed:
+            return
+        self.closed = True
+        index_offset = self._file.tell()
+        columns = {
+            "offsets": np.array(self._offsets, dtype="<i8"),
+            "timesteps": np.array(self._timesteps, dtype="<i4"),
+            "keyframes": np.array(self._keyframes, dtype="u1"),
+            "wall_times": np.array(self._wall_times, dtype="<f8")
+        }
+        self._file.write(pack_columns(columns, {"recording": "index", "steps": len(self._offsets)}))
+        self._file.write(_FOOTER.pack(index_offset, INDEX_MAGIC))
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BridgeRecording:
+    """Random access to the steps of a recording"""
+    
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        self._buffer = memoryview(self._data)
+        
+        magic, version, header_len = _PREAMBLE.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a bridge recording: {self.path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version: {version}")
+        start = _PREAMBLE.size
+        self.metadata: Dict[str, Any] = json.loads(bytes(self._buffer[start:start + header_len]))
+        self._records_start = start + header_len
+        
+        index = self._read_index()
+        if index is None:
+            index = self._scan()
+        self.offsets = index["offsets"]
+        self.timesteps = index["timesteps"]
+        self.keyframes = np.flatnonzero(index["keyframes"])
+        self.wall_times = index["wall_times"]
+    
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    def frames(self, step: int) -> List[memoryview]:
+        """Frames of the step-th message (views into the mapped file)"""
+        _, frames, _ = self._read_record(int(self.offsets[step]))
+        return frames
+    
+    def keyframe_before(self, step: int) -> int:
+        """Index of the last keyframe at or before step"""
+        position = np.searchsorted(self.keyframes, step, side="right") - 1
+        if position < 0:
+            raise ValueError(f"No keyframe at or before step {step}")
+        return int(self.keyframes[position])
+    
+    def _read_record(self, offset: int) -> Tuple[float, List[memoryview], int]:
+        wall_time, num_frames = _RECORD.unpack_from(self._buffer, offset)
+        offset += _RECORD.size
+        frames = []
+        for _ in range(num_frames):
+            (length,) = _FRAME.unpack_from(self._buffer, offset)
+            offset += _FRAME.size
+            if offset + length > len(self._buffer):
+                raise ValueError("Truncated recording")
+            frames.append(self._buffer[offset:offset + length])
+            offset += length
+        return wall_time, frames, offset
+    
+    def _read_index(self) -> Optional[Dict[str, np.ndarray]]:
+        if len(self._buffer) < self._records_start + _FOOTER.size:
+            return None
+        index_offset, magic = _FOOTER.unpack_from(self._buffer, len(self._buffer) - _FOOTER.size)
+        if magic != INDEX_MAGIC:
+            return None
+        columns, _, _ = unpack_columns(self._data, index_offset)
+        columns["keyframes"] = columns["keyframes"].astype(bool)
+        return columns
+    
+    def _scan(self) -> Dict[str, np.ndarray]:
+        """Index an unfinished recording by walking its step records"""
+        offsets, timesteps, keyframes, wall_times = [], [], [], []
+        offset = self._records_start
+        while offset + _RECORD.size <= len(self._buffer):
+            try:
+                wall_time, frames, end = self._read_record(offset)
+                header = json.loads(bytes(frames[0]))
+            except (ValueError, struct.error, IndexError):
+                break  # Partially written record
+            offsets.append(offset)
+            timesteps.append(header["timestep"])
+            keyframes.append(header["keyframe"])
+            wall_times.append(wall_time)
+            offset = end
+        return {
+            "offsets": np.array(offsets, dtype="<i8"),
+            "timesteps": np.array(timesteps, dtype="<i4"),
+            "keyframes": np.array(keyframes, dtype=bool),
+            "wall_times": np.array(wall_times, dtype="<f8")
+        }
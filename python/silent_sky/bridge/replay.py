@@ -0,0 +1,274 @@
+"""Replay server: publishes a bridge recording through ZMQBridge"""
+
+import json
+import time
+from threading import Condition, Thread
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .protocol import DISCOVERED_DTYPE, EVENT_DTYPE, EVENT_UPDATE_DTYPE, OBSERVATION_KEYS, StateCapture, apply_sectors_frame
+from .recording import BridgeRecording
+from .zmq_bridge import ZMQBridge
+
+
+class ReplayEvent:
+    """Event rebuilt from a recording (same fields the encoder reads)"""
+    
+    __slots__ = ("event_type", "sector", "timestep", "value", "discovered")
+    
+    def __init__(self, event_type, sector: int, timestep: int, value: float, discovered: bool):
+        self.event_type = event_type
+        self.sector = sector
+        self.timestep = timestep
+        self.value = value
+        self.discovered = discovered
+
+
+class ReplayState:
+    """
+    State rebuilt by applying recorded schema_version 2 messages
+    
+    Events are kept as persistent objects in append-only lists, like the
+    environment's, so captures taken from it encode to correct deltas.
+    """
+    
+    def __init__(self):
+        self.events: List[ReplayEvent] = []
+        self.discovered_events: List[ReplayEvent] = []
+        self.events_base = 0  # Episode positions of the first entries
+        self.discovered_base = 0
+        self.header: Optional[Dict] = None
+        self.sectors: Optional[np.ndarray] = None
+        self.obs: Optional[np.ndarray] = None
+    
+    def apply(self, frames: List[memoryview]) -> bool:
+        """
+        Apply one message; a keyframe replaces the event history
+        
+        Returns:
+            True for a keyframe (the event objects were replaced)
+        """
+        header = json.loads(bytes(frames[0]))
+        if header["keyframe"]:
+            self.events = []
+            self.discovered_events = []
+            self.events_base = header["events_offset"]
+            self.discovered_base = header["discovered_offset"]
+        elif self.header is None:
+            raise ValueError("Replay must start at a keyframe")
+        
+        event_types = header["event_types"]
+        self.header = header
+        self.sectors = apply_sectors_frame(self.sectors, header, frames[1])
+        self.obs = np.frombuffer(frames[2], dtype="<f4").copy()
+        
+        for r in np.frombuffer(frames[3], dtype=EVENT_DTYPE).tolist():
+            timestep, value, sector, event_type, discovered = r
+            self.events.append(ReplayEvent(event_types[event_type], sector, timestep, value, bool(discovered)))
+        if len(frames) > 5:
+            for r in np.frombuffer(frames[5], dtype=EVENT_UPDATE_DTYPE).tolist():
+                index, timestep, value, sector, event_type, discovered = r
+                if 0 <= index - self.events_base < len(self.events):
+                    # Updated in place; the object may also be in discovered_events
+                    event = self.events[index - self.events_base]
+                    event.event_type = event_types[event_type]
+                    event.sector = sector
+                    event.timestep = timestep
+                    event.value = value
+                    event.discovered = bool(discovered)
+        for r in np.frombuffer(frames[4], dtype=DISCOVERED_DTYPE).tolist():
+            index, value, sector, event_type, _ = r
+            if index >= 0 and 0 <= index - self.events_base < len(self.events):
+                event = self.events[index - self.events_base]
+                event.discovered = True
+            else:
+                event = ReplayEvent(event_types[event_type], sector, -1, value, True)
+            self.discovered_events.append(event)
+        return header["keyframe"]
+    
+    def capture(self) -> StateCapture:
+        """Capture of the current state for ZMQBridge.send_capture"""
+        header = self.header
+        num_sectors = header["num_sectors"]
+        sizes = (num_sectors, num_sectors, 1, 1)
+        splits = np.cumsum(sizes)[:-1]
+        observation = dict(zip(OBSERVATION_KEYS, np.split(self.obs, splits)))
+        return StateCapture(
+            timestep=header["timestep"],
+            sector_ids=np.arange(num_sectors, dtype="<i4"),
+            sectors=self.sectors,
+            events=self.events,
+            num_events=len(self.events),
+            discovered_events=self.discovered_events,
+            num_discovered=len(self.discovered_events),
+            budget=header["budget"],
+            total_earnings=header["total_earnings"],
+            total_costs=header["total_costs"],
+            upgrades=header["upgrades"],
+            time_remaining=header["time_remaining"],
+            observation=observation,
+            info=header["info"],
+            events_base=self.events_base,
+            discovered_base=self.discovered_base
+        )
+
+
+class ReplayServer:
+    """
+    Plays a recording through a ZMQBridge at a chosen speed
+    
+    speed 1.0 reproduces the recorded step timing (or one step per
+    step_interval seconds if given), 10.0 plays ten times faster, and 0
+    publishes as fast as the bridge accepts (use publish_mode "background"
+    with target_fps to match a slow viewer).
+    
+    Commands arrive as directives on the bridge's directive socket:
+        {"replay": "pause"} / {"replay": "play"}
+        {"replay": "seek", "step": n}
+        {"replay": "step", "count": k}     (k may be negative; pauses)
+        {"replay": "speed", "value": x}
+        {"replay": "status"}
+    Each reply carries the step on screen, length, paused flag and speed.
+    Other directives are passed to directive_callback, if set.
+    """
+    
+    def __init__(
+        self,
+        recording: BridgeRecording,
+        bridge: ZMQBridge,
+        speed: float = 1.0,
+        step_interval: Optional[float] = None,
+        loop: bool = False
+    ):
+        self.recording = recording
+        self.bridge = bridge
+        self.speed = speed
+        self.step_interval = step_interval
+        self.loop = loop
+        self.paused = False
+        self.running = False
+        self.directive_callback = None
+        
+        self.state = ReplayState()
+        self.position = 0  # Next step to publish
+        self._cond = Condition()
+        self._anchor_step = 0
+        self._anchor_time = 0.0
+        self.thread = None
+        
+        # Replay commands lock the playback state themselves, and must be
+        # answered while paused, so they skip the step-boundary queue
+        bridge.set_directive_callback(self._handle_directive, immediate=True)
+    
+    def start(self):
+        """Publish the first step and start playback in a background thread"""
+        self.running = True
+        with self._cond:
+            self._seek(0)
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+    
+    def run(self):
+        """Playback loop: publish each step when it is due"""
+        while self.running:
+            with self._cond:
+                if self.position >= len(self.recording):
+                    if self.loop:
+                        self._seek(0)
+                        continue
+                    self.paused = True
+                if self.paused:
+                    self._cond.wait()
+                    continue
+                
+                delay = self._due_time(self.position) - time.monotonic()
+                if delay > 0:
+                    # Commands wake the loop; due times are recomputed after them
+                    self._cond.wait(timeout=delay)
+                    continue
+                self._advance()
+            # Let the directive thread in between steps when unthrottled
+            time.sleep(0)
+    
+    def status(self) -> Dict:
+        return {
+            "step": self.position - 1,
+            "length": len(self.recording),
+            "paused": self.paused,
+            "speed": self.speed
+        }
+    
+    def _handle_directive(self, directive: Dict) -> Optional[Dict]:
+        """Apply a replay command (runs on the bridge's directive thread)"""
+        command = directive.get("replay")
+        if command is None:
+            if self.directive_callback:
+                return self.directive_callback(directive)
+            return None
+        
+        with self._cond:
+            if command == "pause":
+                self.paused = True
+            elif command == "play":
+                if self.position >= len(self.recording):
+                    self._seek(0)
+                self.paused = False
+                self._reset_clock()
+            elif command == "seek":
+                self._seek(int(directive["step"]))
+            elif command == "step":
+                count = int(directive.get("count", 1))
+                self.paused = True
+                if count > 0:
+                    for _ in range(min(count, len(self.recording) - self.position)):
+                        self._advance()
+                elif count < 0:
+                    self._seek(self.position - 1 + count)
+            elif command == "speed":
+                self.speed = float(directive["value"])
+                self._reset_clock()
+            elif command != "status":
+                raise ValueError(f"Unknown replay command: {command}")
+            self._cond.notify_all()
+            return self.status()
+    
+    def _seek(self, step: int):
+        """Rebuild the state at step from the nearest keyframe and publish it"""
+        step = min(max(step, 0), len(self.recording) - 1)
+        keyframe = self.recording.keyframe_before(step)
+        self.state = ReplayState()
+        for i in range(keyframe, step + 1):
+            self.state.apply(self.recording.frames(i))
+        self.bridge.send_capture(self.state.capture(), restart=True)
+        self.position = step + 1
+        self._reset_clock()
+    
+    def _advance(self):
+        """Apply and publish the next step"""
+        keyframe = self.state.apply(self.recording.frames(self.position))
+        # New event objects invalidate the bridge encoder's delta bookkeeping
+        self.bridge.send_capture(self.state.capture(), restart=keyframe)
+        self.position += 1
+    
+    def _reset_clock(self):
+        # Timing is measured from the step on screen
+        self._anchor_step = max(self.position - 1, 0)
+        self._anchor_time = time.monotonic()
+    
+    def _due_time(self, step: int) -> float:
+        if self.speed <= 0:
+            return 0.0
+        if self.step_interval is not None:
+            elapsed = (step - self._anchor_step) * self.step_interval
+        else:
+            wall_times = self.recording.wall_times
+            elapsed = wall_times[step] - wall_times[self._anchor_step]
+        return self._anchor_time + elapsed / self.speed
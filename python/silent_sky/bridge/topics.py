@@ -0,0 +1,212 @@
+"""Topic fan-out: per-viewer slices of the state on their own sockets
+
+Viewers that only need part of the state subscribe to a topic instead of
+the full snapshot. Each topic has its own XPUB socket (so its own send
+high-water mark), bound on base_port + TOPICS.index(topic), and its own
+maximum publish rate. Every message starts with the topic name frame:
+    
+    sectors  [b"sectors", header JSON, float32 (3, num_sectors)]
+             header: timestep, num_sectors
+    events   [b"events", header JSON, EVENT_DTYPE records, DISCOVERED_DTYPE records,
+              EVENT_UPDATE_DTYPE records]
+             header: timestep, keyframe, events_offset, discovered_offset, event_types
+    finance  [b"finance", JSON]  timestep, budget, total_earnings, total_costs,
+                                 profit, upgrades, time_remaining
+    obs      [b"obs", JSON]      timestep, observation, info
+
+Every header also carries the publisher stamp (seq and sent_at, counted
+per topic). Records are as in schema_version 2 (see protocol.py). The events topic
+carries deltas since its previous message, so rate limiting it loses
+nothing; a keyframe with the live event history is sent when a viewer
+subscribes. The other topics are latest-value and simply skip frames.
+
+A topic nobody subscribes to is not serialized at all, so idle topics
+cost the publisher nothing.
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import zmq
+
+from .protocol import DISCOVERED_DTYPE, EVENT_DTYPE, EVENT_UPDATE_DTYPE, OBSERVATION_KEYS, SnapshotEncoder, StateCapture, _json_default, stamp
+
+
+TOPICS = ("sectors", "events", "finance", "obs")
+
+# rate: messages per second at most (None: every capture); hwm: send
+# high-water mark per subscriber, beyond which ZMQ drops that viewer's messages
+DEFAULT_TOPIC_SETTINGS = {
+    "sectors": {"rate": 10.0, "hwm": 10},
+    "events": {"rate": None, "hwm": 1000},
+    "finance": {"rate": 2.0, "hwm": 10},
+    "obs": {"rate": None, "hwm": 100},
+}
+
+DEFAULT_TOPIC_PORT = 5560
+
+
+def topic_settings(config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Normalize the unity.topics config section
+    
+    Args:
+        config: None, or {"enabled": bool, "base_port": int, <topic>: {"rate", "hwm"}}
+    
+    Returns:
+        None if disabled, else base_port plus complete settings per topic
+    """
+    if not config or not config.get("enabled", True):
+        return None
+    settings = {"base_port": config.get("base_port", DEFAULT_TOPIC_PORT)}
+    for topic in TOPICS:
+        settings[topic] = {**DEFAULT_TOPIC_SETTINGS[topic], **(config.get(topic) or {})}
+    return settings
+
+
+def decode_topic(frames: List[bytes]) -> Dict[str, Any]:
+    """
+    Decode one topic message
+    
+    Returns:
+        Dict with "topic" and the payload; sectors as "sectors" (3, N)
+        float32, events as "events", "discovered" and "updated" record arrays
+    """
+    topic = bytes(frames[0]).decode("utf-8")
+    message = json.loads(bytes(frames[1]))
+    message["topic"] = topic
+    if topic == "sectors":
+        message["sectors"] = np.frombuffer(frames[2], dtype="<f4").reshape(3, message["num_sectors"])
+    elif topic == "events":
+        message["events"] = np.frombuffer(frames[2], dtype=EVENT_DTYPE)
+        message["discovered"] = np.frombuffer(frames[3], dtype=DISCOVERED_DTYPE)
+        message["updated"] = np.frombuffer(frames[4] if len(frames) > 4 else b"", dtype=EVENT_UPDATE_DTYPE)
+    return message
+
+
+class TopicFanout:
+    """
+    Publishes captures as topic messages (see module docstring)
+    
+    Used by ZMQBridge from the thread that publishes; not thread-safe.
+    """
+    
+    def __init__(self, settings: Dict[str, Any], keyframe_interval: int = 100):
+        """
+        Args:
+            settings: Output of topic_settings
+            keyframe_interval: Steps between event keyframes
+        """
+        self.settings = settings
+        self.base_port = settings["base_port"]
+        self.sockets: Dict[str, zmq.Socket] = {}
+        self.subscribed = {topic: False for topic in TOPICS}
+        self.events_encoder = SnapshotEncoder(keyframe_interval=keyframe_interval)
+        self._last_sent = {topic: 0.0 for topic in TOPICS}
+        self.messages_sent = {topic: 0 for topic in TOPICS}
+        self.bytes_sent = {topic: 0 for topic in TOPICS}
+    
+    def start(self, context: zmq.Context):
+        for offset, topic in enumerate(TOPICS):
+            socket = context.socket(zmq.XPUB)
+            socket.setsockopt(zmq.XPUB_VERBOSE, 1)
+            socket.setsockopt(zmq.SNDHWM, self.settings[topic]["hwm"])
+            socket.bind(f"tcp://*:{self.base_port + offset}")
+            self.sockets[topic] = socket
+    
+    def stop(self):
+        for socket in self.sockets.values():
+            socket.close(linger=0)
+        self.sockets = {}
+    
+    def port(self, topic: str) -> int:
+        return self.base_port + TOPICS.index(topic)
+    
+    def publish(self, capture: StateCapture, restart: bool = False):
+        """Send each subscribed topic that is due"""
+        self._check_subscriptions()
+        if restart:
+            self.events_encoder.reset()
+        
+        now = time.monotonic()
+        for topic in TOPICS:
+            if not self.subscribed[topic]:
+                continue
+            rate = self.settings[topic]["rate"]
+            if rate and now - self._last_sent[topic] < 1.0 / rate:
+                continue
+            self._last_sent[topic] = now
+            
+            stamped = stamp(self.messages_sent[topic])
+            frames = [topic.encode("utf-8")] + getattr(self, f"_{topic}_frames")(capture, stamped)
+            try:
+                self.sockets[topic].send_multipart(frames, copy=False)
+            except zmq.ZMQError as e:
+                print(f"Error sending topic {topic}: {e}")
+                continue
+            self.messages_sent[topic] += 1
+            self.bytes_sent[topic] += sum(memoryview(frame).nbytes for frame in frames)
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            topic: {
+                "port": self.port(topic),
+                "subscribed": self.subscribed[topic],
+                "messages_sent": self.messages_sent[topic],
+                "bytes_sent": self.bytes_sent[topic]
+            }
+            for topic in TOPICS
+        }
+    
+    def _check_subscriptions(self):
+        # XPUB passes every subscribe (verbose) and the last unsubscribe
+        for topic, socket in self.sockets.items():
+            while socket.poll(0, zmq.POLLIN):
+                message = socket.recv()
+                if not message:
+                    continue
+                if message[0] == 1:
+                    self.subscribed[topic] = True
+                    if topic == "events":
+                        self.events_encoder.request_keyframe()
+                elif message[0] == 0:
+                    self.subscribed[topic] = False
+    
+    def _sectors_frames(self, capture: StateCapture, stamped: Dict[str, Any]) -> List[Any]:
+        sectors = capture.dense_sectors()
+        header = {"timestep": capture.timestep, "num_sectors": sectors.shape[1], **stamped}
+        return [json.dumps(header).encode("utf-8"), memoryview(sectors).cast("B")]
+    
+    def _events_frames(self, capture: StateCapture, stamped: Dict[str, Any]) -> List[Any]:
+        frames = self.events_encoder.encode(capture)
+        full = json.loads(bytes(frames[0]))
+        header = {
+            key: full[key]
+            for key in ("timestep", "keyframe", "events_offset", "discovered_offset", "event_types")
+        }
+        header.update(stamped)
+        return [json.dumps(header).encode("utf-8"), frames[3], frames[4], frames[5]]
+    
+    def _finance_frames(self, capture: StateCapture, stamped: Dict[str, Any]) -> List[Any]:
+        message = {
+            "timestep": capture.timestep,
+            "budget": capture.budget,
+            "total_earnings": capture.total_earnings,
+            "total_costs": capture.total_costs,
+            "profit": capture.total_earnings - capture.total_costs,
+            "upgrades": capture.upgrades,
+            "time_remaining": capture.time_remaining,
+            **stamped
+        }
+        return [json.dumps(message, default=_json_default).encode("utf-8")]
+    
+    def _obs_frames(self, capture: StateCapture, stamped: Dict[str, Any]) -> List[Any]:
+        message = {
+            "timestep": capture.timestep,
+            "observation": {key: capture.observation[key].tolist() for key in OBSERVATION_KEYS},
+            "info": capture.info,
+            **stamped
+        }
+        return [json.dumps(message, default=_json_default).encode("utf-8")]
@@ -2,30 +2,90 @@
 
 import json
 import time
-from typing import Dict, Optional, Callable
+from typing import Dict, List, Optional, Callable
 import zmq
-from threading import Thread
+from threading import Condition, Thread
 
 from ..env.observatory_env import ObservatoryEnv
 from ..env.state import EnvironmentState
+from ..sky.hexgrid import SectorField
+from .directives import DirectiveQueue, apply_payload
+from .protocol import SCHEMA_V1, SCHEMA_V2, SnapshotEncoder, StateCapture, capture_state, snapshot_v1, stamp
+from .topics import TopicFanout, topic_settings
 
 
 class ZMQBridge:
     """
     ZeroMQ bridge for sending state to Unity and receiving directives
     
-    Python side: PUB for state updates, REP for directives
+    Python side: PUB for state updates, ROUTER for directives (Unity's
+    REQ sockets talk to it as they would to a REP socket)
+    
+    schema_version 1 publishes a full JSON snapshot per step; schema_version 2
+    publishes binary multipart messages with event deltas and periodic
+    keyframes (see protocol.py). The PUB side is an XPUB socket so that a
+    late subscriber triggers a keyframe, and so that snapshots are not
+    serialized at all while nobody is subscribed. Both carry a seq/sent_at stamp for
+    measuring loss and latency (see loadtest.py).
+    
+    publish_mode "inline" serializes and sends inside send_state. "background"
+    only captures the state in send_state; a publisher thread serializes and
+    sends the latest capture, at most target_fps times per second. Captures
+    that are replaced before being sent are counted in frames_dropped.
+    
+    Directives are queued by the socket thread and applied when the thread
+    stepping the env calls apply_directives at a step boundary; the reply
+    carries the timestep at which they took effect. A request may also be a
+    JSON list of directives, applied together and answered with one reply.
+    Callbacks registered with immediate=True run on the socket thread
+    instead (for handlers that do their own locking, e.g. ReplayServer).
+    
+    With topics configured, every published capture is also fanned out as
+    sectors, events, finance and obs topic messages on separate sockets
+    with their own rates and high-water marks (see topics.py).
     """
     
     def __init__(
         self,
         pub_port: int = 5555,
         rep_port: int = 5556,
-        enabled: bool = True
+        enabled: bool = True,
+        schema_version: int = SCHEMA_V1,
+        keyframe_interval: int = 100,
+        publish_mode: str = "inline",
+        target_fps: Optional[float] = None,
+        topics: Optional[Dict] = None
     ):
+        if schema_version not in (SCHEMA_V1, SCHEMA_V2):
+            raise ValueError(f"Unknown schema_version: {schema_version}")
+        if publish_mode not in ("inline", "background"):
+            raise ValueError(f"Unknown publish_mode: {publish_mode}")
+        
         self.pub_port = pub_port
         self.rep_port = rep_port
         self.enabled = enabled
+        self.schema_version = schema_version
+        self.encoder = SnapshotEncoder(keyframe_interval=keyframe_interval)
+        self.publish_mode = publish_mode
+        self.target_fps = target_fps
+        
+        # Per-topic fan-out (unity.topics), published alongside the snapshots
+        settings = topic_settings(topics)
+        self.topics = TopicFanout(settings, keyframe_interval=keyframe_interval) if settings else None
+        
+        # Prefixes subscribed on the PUB socket (XPUB forwards the first
+        # subscribe and the last unsubscribe of each)
+        self.subscriptions = set()
+        
+        # Publisher counters
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        
+        # Latest capture waiting for the publisher thread (background mode)
+        self._pending: Optional[StateCapture] = None
+        self._restart_requested = False
+        self._pending_cond = Condition()
+        self.publisher_thread = None
         
         self.context = None
         self.pub_socket = None
@@ -34,7 +94,13 @@ class ZMQBridge:
         self.thread = None
         
         # Callback for mission directives
-        self.directive_callback: Optional[Callable[[Dict], None]] = None
+        self.directive_callback: Optional[Callable[[Dict], Optional[Dict]]] = None
+        self.directives_immediate = False
+        self.directives = DirectiveQueue()
+        
+        # inproc pair that wakes the socket thread when acks are queued
+        self._wake_send = None
+        self._wake_recv = None
     
     def start(self):
         """Start ZeroMQ server"""
@@ -43,25 +109,47 @@ class ZMQBridge:
         
         self.context = zmq.Context()
         
-        # PUB socket for state updates (Python → Unity)
-        self.pub_socket = self.context.socket(zmq.PUB)
+        # PUB socket for state updates (Python → Unity); XPUB reports subscriptions
+        self.pub_socket = self.context.socket(zmq.XPUB)
+        self.pub_socket.setsockopt(zmq.XPUB_VERBOSE, 1)
         self.pub_socket.bind(f"tcp://*:{self.pub_port}")
         time.sleep(0.1)  # Give socket time to bind
         
-        # REP socket for directives (Unity → Python)
-        self.rep_socket = self.context.socket(zmq.REP)
+        # ROUTER socket for directives (Unity → Python); replies can be
+        # deferred to the step boundary, unlike with REP
+        self.rep_socket = self.context.socket(zmq.ROUTER)
         self.rep_socket.bind(f"tcp://*:{self.rep_port}")
         
+        wake_address = f"inproc://directive-wake-{id(self)}"
+        self._wake_recv = self.context.socket(zmq.PAIR)
+        self._wake_recv.bind(wake_address)
+        self._wake_send = self.context.socket(zmq.PAIR)
+        self._wake_send.connect(wake_address)
+        
+        if self.topics:
+            self.topics.start(self.context)
+        
         # Start directive handler thread
         self.running = True
         self.thread = Thread(target=self._handle_directives, daemon=True)
         self.thread.start()
         
-        print(f"ZeroMQ bridge started: PUB on {self.pub_port}, REP on {self.rep_port}")
+        if self.publish_mode == "background":
+            self.publisher_thread = Thread(target=self._publish_loop, daemon=True)
+            self.publisher_thread.start()
+        
+        print(f"ZeroMQ bridge started: PUB on {self.pub_port}, directives on {self.rep_port}")
+        if self.topics:
+            ports = ", ".join(f"{topic} on {stats['port']}" for topic, stats in self.topics.get_stats().items())
+            print(f"Topics: {ports}")
     
     def stop(self):
         """Stop ZeroMQ server"""
         self.running = False
+        with self._pending_cond:
+            self._pending_cond.notify()
+        if self.publisher_thread:
+            self.publisher_thread.join(timeout=1.0)
         if self.thread:
             self.thread.join(timeout=1.0)
         
@@ -69,94 +157,201 @@ class ZMQBridge:
             self.pub_socket.close()
         if self.rep_socket:
             self.rep_socket.close()
+        for socket in (self._wake_send, self._wake_recv):
+            if socket:
+                socket.close()
+        if self.topics:
+            self.topics.stop()
         if self.context:
             self.context.term()
     
-    def send_state(self, state: EnvironmentState, observation: Dict, info: Dict):
-        """Send state update to Unity"""
+    def send_state(
+        self,
+        state: EnvironmentState,
+        observation: Dict,
+        info: Dict,
+        sector_field: Optional[SectorField] = None
+    ):
+        """Send state update to Unity (sector_field: see capture_state)"""
+        if not self.enabled or not self.pub_socket:
+            return
+        
+        self.send_capture(capture_state(state, observation, info, sector_field))
+    
+    def send_capture(self, capture: StateCapture, restart: bool = False):
+        """
+        Send an already captured state (e.g. rebuilt from a recording)
+        
+        Args:
+            capture: State to send
+            restart: The capture does not continue the previous one (e.g. a
+                     replay seek); start the stream over with a keyframe
+        """
         if not self.enabled or not self.pub_socket:
             return
         
-        # Create state snapshot with version
-        snapshot = {
-            "schema_version": 1,
-            "timestep": state.timestep,
-            "state": {
-                "sectors": [
-                    {
-                        "sector_id": s.sector_id,
-                        "sensor_reading": float(s.sensor_reading),
-                        "sensor_confidence": float(s.sensor_confidence),
-                        "activity_rate": float(s.activity_rate)  # For visualization only
-                    }
-                    for s in state.sectors
-                ],
-                "events": [
-                    {
-                        "event_type": e.event_type,
-                        "sector": e.sector,
-                        "timestep": e.timestep,
-                        "value": float(e.value),
-                        "discovered": e.discovered
-                    }
-                    for e in state.events
-                ],
-                "discovered_events": [
-                    {
-                        "event_type": e.event_type,
-                        "sector": e.sector,
-                        "value": float(e.value)
-                    }
-                    for e in state.discovered_events
-                ],
-                "budget": float(state.budget),
-                "total_earnings": float(state.total_earnings),
-                "total_costs": float(state.total_costs),
-                "upgrades": state.upgrades.copy(),
-                "time_remaining": float(state.get_time_remaining())
-            },
-            "observation": {
-                "sensor_readings": observation["sensor_readings"].tolist(),
-                "sensor_confidence": observation["sensor_confidence"].tolist(),
-                "time_remaining": observation["time_remaining"].tolist(),
-                "budget_remaining": observation["budget_remaining"].tolist()
-            },
-            "info": info
+        if self.publish_mode == "background":
+            # Hand off to the publisher thread, replacing any unsent capture
+            with self._pending_cond:
+                if self._pending is not None:
+                    self.frames_dropped += 1
+                self._pending = capture
+                self._restart_requested = self._restart_requested or restart
+                self._pending_cond.notify()
+            return
+        
+        self._publish(capture, restart)
+    
+    def apply_directives(self, timestep: int) -> int:
+        """
+        Apply directives received since the last call
+        
+        Call from the thread that steps the env, between steps.
+        
+        Args:
+            timestep: Current env timestep, reported in each acknowledgment
+        
+        Returns:
+            Number of requests applied
+        """
+        if not self.directives:
+            return 0
+        count = self.directives.apply(timestep, self.directive_callback)
+        self._wake()
+        return count
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Publisher counters for tuning send rate against step rate"""
+        stats = {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "directives_applied": self.directives.applied,
+            "directives_pending": len(self.directives)
         }
+        if self.topics:
+            stats["topics"] = self.topics.get_stats()
+        return stats
+    
+    def _publish(self, capture: StateCapture, restart: bool = False):
+        """Serialize and send one capture (caller's thread owns the PUB socket)"""
+        self._check_subscriptions()
+        if restart:
+            self.encoder.reset()
+        # Nobody on the PUB socket: skip the encode (a subscriber joining gets a keyframe)
+        if self.subscriptions:
+            try:
+                if self.schema_version == SCHEMA_V2:
+                    frames = self.encoder.encode(capture, extra=stamp(self.frames_sent))
+                    self.pub_socket.send_multipart(frames, copy=False)
+                else:
+                    message = snapshot_v1(capture)
+                    message.update(stamp(self.frames_sent))
+                    self.pub_socket.send_string(json.dumps(message))
+                self.frames_sent += 1
+            except Exception as e:
+                print(f"Error sending state: {e}")
         
-        try:
-            message = json.dumps(snapshot)
-            self.pub_socket.send_string(message)
-        except Exception as e:
-            print(f"Error sending state: {e}")
+        if self.topics:
+            self.topics.publish(capture, restart)
+    
+    def _publish_loop(self):
+        """Send the latest capture at up to target_fps (runs in thread)"""
+        min_interval = 1.0 / self.target_fps if self.target_fps else 0.0
+        last_send = 0.0
+        
+        while True:
+            with self._pending_cond:
+                while self._pending is None and self.running:
+                    self._pending_cond.wait()
+                if self._pending is None:
+                    return
+            
+            # Let newer captures replace this one until the frame is due
+            delay = last_send + min_interval - time.monotonic()
+            if delay > 0 and self.running:
+                time.sleep(delay)
+            
+            with self._pending_cond:
+                capture, self._pending = self._pending, None
+                restart, self._restart_requested = self._restart_requested, False
+            if capture is None:
+                continue
+            
+            last_send = time.monotonic()
+            self._publish(capture, restart)
+    
+    def _check_subscriptions(self):
+        """Drain XPUB subscription messages; a new subscriber needs a keyframe"""
+        while self.pub_socket.poll(0, zmq.POLLIN):
+            message = self.pub_socket.recv()
+            if not message:
+                continue
+            if message[0] == 1:
+                self.subscriptions.add(message[1:])
+                self.encoder.request_keyframe()
+            elif message[0] == 0:
+                self.subscriptions.discard(message[1:])
     
     def _handle_directives(self):
-        """Handle mission directives from Unity (runs in thread)"""
+        """Receive directives and send queued acks (runs in thread)"""
+        poller = zmq.Poller()
+        poller.register(self.rep_socket, zmq.POLLIN)
+        poller.register(self._wake_recv, zmq.POLLIN)
+        
         while self.running:
             try:
-                # Non-blocking receive
-                if self.rep_socket.poll(100, zmq.POLLIN):
-                    message = self.rep_socket.recv_string()
-                    directive = json.loads(message)
-                    
-                    # Process directive
-                    if self.directive_callback:
-                        self.directive_callback(directive)
-                    
-                    # Send acknowledgment
-                    response = {"status": "ok"}
-                    self.rep_socket.send_string(json.dumps(response))
-            except zmq.Again:
-                continue
+                events = dict(poller.poll(100))
+                if self._wake_recv in events:
+                    while self._wake_recv.poll(0, zmq.POLLIN):
+                        self._wake_recv.recv()
+                # Take every waiting request, then answer everything applied
+                while self.rep_socket.poll(0, zmq.POLLIN):
+                    self._receive_directive(self.rep_socket.recv_multipart())
+                self._send_acks()
             except Exception as e:
                 print(f"Error handling directive: {e}")
-                if self.rep_socket:
-                    try:
-                        self.rep_socket.send_string(json.dumps({"status": "error", "message": str(e)}))
-                    except:
-                        pass
-    
-    def set_directive_callback(self, callback: Callable[[Dict], None]):
-        """Set callback for processing mission directives"""
+        
+        # No more step boundaries; don't leave clients waiting
+        self.directives.reject_all("bridge stopped")
+        self._send_acks()
+    
+    def _receive_directive(self, frames: List[bytes]):
+        envelope, body = frames[:-1], frames[-1]
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            self.directives.ack(envelope, {"status": "error", "message": f"Invalid directive: {e}"})
+            return
+        
+        if self.directive_callback is None or self.directives_immediate:
+            self.directives.ack(envelope, apply_payload(payload, self.directive_callback))
+            return
+        self.directives.put(payload, envelope)
+    
+    def _send_acks(self):
+        for envelope, response in self.directives.take_acks():
+            try:
+                self.rep_socket.send_multipart(envelope + [json.dumps(response).encode("utf-8")])
+            except zmq.ZMQError as e:
+                print(f"Error sending directive ack: {e}")
+    
+    def _wake(self):
+        """Have the socket thread send queued acks now"""
+        if self._wake_send:
+            try:
+                self._wake_send.send(b"", zmq.NOBLOCK)
+            except zmq.Again:
+                pass  # Wakeups already queued
+    
+    def set_directive_callback(self, callback: Callable[[Dict], Optional[Dict]], immediate: bool = False):
+        """
+        Set callback for processing mission directives
+        
+        Args:
+            callback: Applies one directive; may return extra reply fields
+            immediate: Run on the socket thread as directives arrive instead
+                       of at apply_directives (callback must be thread-safe)
+        """
         self.directive_callback = callback
+        self.directives_immediate = immediate
 
@@ -0,0 +1,12 @@
+"""Episode runners (single episodes, batch sweeps, sessions, episode server)"""
+
+from .episode import make_env, make_agent, play_episode, episode_summary, env_directive_handler
+from .sweep import run_sweep, run_jobs, aggregate_results
+from .async_episode import play_episode_async, run_sessions
+from .server import EpisodeServer, EpisodeClient
+from .upgrade_roi import UPGRADES, upgrade_combinations, evaluate_upgrades
+from .long_horizon import EpisodeAggregates, EventArchive
+
+__all__ = ["make_env", "make_agent", "play_episode", "episode_summary", "env_directive_handler", "run_sweep", "run_jobs", "aggregate_results",
+           "play_episode_async", "run_sessions", "EpisodeServer", "EpisodeClient", "UPGRADES", "upgrade_combinations", "evaluate_upgrades",
+           "EpisodeAggregates", "EventArchive"]
@@ -0,0 +1,122 @@
+"""asyncio episode driver and multi-session runner
+
+Each session is an env, an agent and an AsyncZMQBridge with its own ports.
+Stepping, publishing and directive handling for all sessions interleave
+on one event loop: every step ends with an await, so no session holds the
+loop for longer than one env.step.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import zmq.asyncio
+
+from ..agent.dummy_agent import DummyAgent
+from ..bridge.async_bridge import AsyncZMQBridge
+from ..env.observatory_env import ObservatoryEnv
+from .episode import env_directive_handler, episode_summary, make_agent, make_env
+
+
+async def play_episode_async(
+    env: ObservatoryEnv,
+    agent: DummyAgent,
+    bridge: Optional[AsyncZMQBridge] = None,
+    seed: Optional[int] = None,
+    step_interval: float = 0.0
+) -> Dict[str, Any]:
+    """
+    Run one episode, applying directives and publishing through bridge
+    
+    Args:
+        env: Environment, reset with seed
+        agent: Agent, reset and reseeded with seed
+        bridge: Started bridge, or None to run without a viewer
+        seed: Episode seed
+        step_interval: Seconds to wait after each step (0 only yields)
+    
+    Returns:
+        final_state summary plus "steps"
+    """
+    observation, info = env.reset(seed=seed)
+    agent.reset(seed=seed)
+    
+    total_reward = 0.0
+    steps = 0
+    done = False
+    while not done:
+        if bridge:
+            await bridge.apply_directives(env.state.timestep)
+        action = agent.act(observation)
+        observation, reward, terminated, truncated, info = env.step(action)
+        if bridge:
+            await bridge.send_state(env.state, observation, info)
+        total_reward += reward
+        steps += 1
+        done = terminated or truncated
+        await asyncio.sleep(step_interval)
+    
+    summary = episode_summary(env, total_reward)
+    summary["steps"] = steps
+    return summary
+
+
+async def run_sessions(
+    config: Dict[str, Any],
+    num_sessions: int,
+    base_port: int = 5555,
+    seed: int = 0,
+    episodes: int = 1,
+    step_interval: float = 0.0
+) -> List[Dict[str, Any]]:
+    """
+    Run concurrent sessions, each with its own env, agent and bridge
+    
+    Session i publishes on base_port + 2i and takes directives on
+    base_port + 2i + 1. It plays episodes with seeds
+    seed + i * episodes, seed + i * episodes + 1, ...
+    
+    Args:
+        config: Merged config (see load_config); "environment", "agent"
+                and "unity" are used
+        num_sessions: Concurrent sessions
+        base_port: First port of the session port range
+        seed: First episode seed
+        episodes: Episodes per session
+        step_interval: Seconds each session waits after each step
+    
+    Returns:
+        One dict per episode with session, seed and the final_state summary
+    """
+    unity_config = config["unity"]
+    context = zmq.asyncio.Context()
+    
+    async def session(index: int) -> List[Dict[str, Any]]:
+        env = make_env(config)
+        agent = make_agent(config["agent"]["dummy_strategy"])
+        bridge = AsyncZMQBridge(
+            pub_port=base_port + 2 * index,
+            rep_port=base_port + 2 * index + 1,
+            schema_version=unity_config.get("schema_version", 1),
+            keyframe_interval=unity_config.get("keyframe_interval", 100),
+            publish_mode=unity_config.get("publish_mode", "inline"),
+            target_fps=unity_config.get("target_fps"),
+            context=context
+        )
+        bridge.set_directive_callback(env_directive_handler(env))
+        await bridge.start()
+        
+        results = []
+        try:
+            for episode in range(episodes):
+                episode_seed = seed + index * episodes + episode
+                summary = await play_episode_async(env, agent, bridge, episode_seed, step_interval)
+                results.append({"session": index, "seed": episode_seed, **summary})
+        finally:
+            await bridge.stop()
+        return results
+    
+    try:
+        per_session = await asyncio.gather(*(session(i) for i in range(num_sessions)))
+    finally:
+        context.term()
+    return [result for results in per_session for result in results]
@@ -0,0 +1,138 @@
+"""Reusable pieces of the single-episode loop"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ..env.observatory_env import ObservatoryEnv
+from ..agent.dummy_agent import DummyAgent
+from ..sky.hexgrid import hex_ring_sector_count
+
+
+def sky_sectors(config: Dict[str, Any]) -> int:
+    """Number of sectors the "environment" config section asks for"""
+    env_config = config["environment"]
+    if env_config.get("num_rings") is not None:
+        return hex_ring_sector_count(env_config["num_rings"])
+    return env_config["num_sectors"]
+
+
+def make_env(config: Dict[str, Any]) -> ObservatoryEnv:
+    """
+    Create an environment from the "environment" config section
+    
+    "num_rings" (if set) sizes the sky as a hex-ring grid and takes
+    precedence over "num_sectors" (see HexRingGrid).
+    """
+    env_config = config["environment"]
+    return ObservatoryEnv(
+        num_sectors=sky_sectors(config),
+        episode_length=env_config["episode_length"],
+        initial_budget=env_config["initial_budget"],
+        seed=env_config["seed"]
+    )
+
+
+# Summary fields of play_episode, the shape every ResultCache entry holds
+SUMMARY_FIELDS = (
+    "total_reward", "budget", "earnings", "costs", "profit", "events_discovered", "events_total",
+    "steps", "start_budget", "upgrade_cost"
+)
+
+
+def make_agent(strategy: str, seed: Optional[int] = None) -> DummyAgent:
+    """Create a dummy agent (the only agent type in Phase 1)"""
+    return DummyAgent(strategy=strategy, seed=seed)
+
+
+def env_directive_handler(env: ObservatoryEnv) -> Callable[[Dict], None]:
+    """Bridge directive callback applying mission directives and upgrades to env"""
+    def handle_directive(directive: Dict):
+        if "reward_weights" in directive:
+            env.update_mission_directives(directive["reward_weights"])
+        if "upgrade" in directive:
+            env.purchase_upgrade(directive["upgrade"])
+    
+    return handle_directive
+
+
+def episode_summary(env: ObservatoryEnv, total_reward: float, aggregates=None) -> Dict[str, Any]:
+    """
+    Build the final_state summary for a finished episode
+    
+    With aggregates (an EpisodeAggregates kept up to date during a
+    long-horizon episode) the totals come from it instead of a pass over
+    the event history.
+    """
+    if aggregates is not None:
+        aggregates.update(env.state)
+        return {"total_reward": float(total_reward), "budget": float(env.state.budget), **aggregates.summary()}
+    
+    money_info = env.reward_calculator.calculate_money(env.state)
+    return {
+        "total_reward": float(total_reward),
+        "budget": float(env.state.budget),
+        "earnings": money_info["earnings"],
+        "costs": money_info["costs"],
+        "profit": money_info["profit"],
+        "events_discovered": len(env.state.discovered_events),
+        "events_total": len(env.state.events)
+    }
+
+
+def play_episode(
+    env: ObservatoryEnv,
+    agent: DummyAgent,
+    seed: Optional[int] = None,
+    upgrades: Sequence[str] = (),
+    episode_data: Optional[Dict[str, List]] = None
+) -> Dict[str, Any]:
+    """
+    Run one headless episode, reusing an existing env and agent
+    
+    Args:
+        env: Environment, reset with seed
+        agent: Agent, reset and reseeded with seed
+        seed: Episode seed
+        upgrades: Upgrades purchased right after the reset
+        episode_data: If given, per-step lists (timesteps, actions,
+                      observations, rewards, info) are appended to it in
+                      run_episode.py's layout
+    
+    Returns:
+        final_state summary plus "steps", "start_budget" (budget after
+        the reset) and "upgrade_cost" (budget spent on upgrades)
+    """
+    observation, info = env.reset(seed=seed)
+    agent.reset(seed=seed)
+    
+    budget = env.state.budget
+    for upgrade in upgrades:
+        env.purchase_upgrade(upgrade)
+    # The first observation predates the purchases; its budget_remaining
+    # is stale for one step (DummyAgent does not read it)
+    upgrade_cost = float(budget - env.state.budget)
+    
+    total_reward = 0.0
+    steps = 0
+    done = False
+    while not done:
+        action = agent.act(observation)
+        next_observation, reward, terminated, truncated, info = env.step(action)
+        if episode_data is not None:
+            episode_data["timesteps"].append(env.state.timestep)
+            episode_data["actions"].append(action)
+            episode_data["observations"].append({
+                k: v.tolist() if hasattr(v, 'tolist') else v
+                for k, v in observation.items()
+            })
+            episode_data["rewards"].append(float(reward))
+            episode_data["info"].append(info)
+        observation = next_observation
+        total_reward += reward
+        steps += 1
+        done = terminated or truncated
+    
+    summary = episode_summary(env, total_reward)
+    summary["steps"] = steps
+    summary["start_budget"] = float(budget)
+    summary["upgrade_cost"] = upgrade_cost
+    return summary
@@ -0,0 +1,203 @@
+"""Bounded-memory support for long-horizon episodes
+
+The environment's event lists are append-only, so over 10^5-10^6 steps
+they (and anything that walks them every step) grow without limit.
+EventArchive trims settled events (ones the env no longer changes) off the
+front of the lists into a ring buffer and, optionally, a spill file; EpisodeAggregates keeps the episode
+totals up to date from what is appended, so nothing has to scan the full
+history again.
+
+Per step:
+    
+    aggregates.update(env.state)
+    archive.trim(env.state, aggregates)
+
+Trimming replaces state.events and state.discovered_events with shorter
+lists and sets state.events_base / state.discovered_base (entries removed
+so far), which the bridge's encoder uses to keep event positions stable.
+"""
+
+import json
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, Optional, Union
+
+from ..env.state import EnvironmentState
+from ..utils.events import event_in_play
+
+
+def _event_record(event) -> Dict[str, Any]:
+    return {
+        "event_type": event.event_type,
+        "sector": int(event.sector),
+        "timestep": int(event.timestep),
+        "value": float(event.value),
+        "discovered": bool(event.discovered)
+    }
+
+
+class EpisodeAggregates:
+    """
+    Running episode totals, updated from the entries appended since the last call
+    
+    Counts are kept per event type and per sector, for spawned and for
+    discovered events. Earnings and costs are the state's running totals.
+    """
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.events_total = 0
+        self.events_discovered = 0
+        self.discovered_value = 0.0
+        self.spawned_by_type: Counter = Counter()
+        self.spawned_by_sector: Counter = Counter()
+        self.discovered_by_type: Counter = Counter()
+        self.discovered_by_sector: Counter = Counter()
+        self.earnings = 0.0
+        self.costs = 0.0
+        # Episode positions of the next unread entries
+        self._events_seen = 0
+        self._discovered_seen = 0
+    
+    def update(self, state: EnvironmentState):
+        """Count the events appended to state since the last update"""
+        events_base = getattr(state, "events_base", 0)
+        discovered_base = getattr(state, "discovered_base", 0)
+        
+        for event in state.events[max(self._events_seen - events_base, 0):]:
+            self.spawned_by_type[event.event_type] += 1
+            self.spawned_by_sector[int(event.sector)] += 1
+        self._events_seen = events_base + len(state.events)
+        self.events_total = self._events_seen
+        
+        for event in state.discovered_events[max(self._discovered_seen - discovered_base, 0):]:
+            self.discovered_by_type[event.event_type] += 1
+            self.discovered_by_sector[int(event.sector)] += 1
+            self.discovered_value += float(event.value)
+        self._discovered_seen = discovered_base + len(state.discovered_events)
+        self.events_discovered = self._discovered_seen
+        
+        self.earnings = float(state.total_earnings)
+        self.costs = float(state.total_costs)
+    
+    @property
+    def profit(self) -> float:
+        return self.earnings - self.costs
+    
+    def summary(self) -> Dict[str, Any]:
+        """Totals in final_state form, plus the per-type and per-sector counts"""
+        return {
+            "earnings": self.earnings,
+            "costs": self.costs,
+            "profit": self.profit,
+            "events_discovered": self.events_discovered,
+            "events_total": self.events_total,
+            "discovered_value": self.discovered_value,
+            "spawned_by_type": {str(k): v for k, v in self.spawned_by_type.items()},
+            "discovered_by_type": {str(k): v for k, v in self.discovered_by_type.items()},
+            "spawned_by_sector": dict(sorted(self.spawned_by_sector.items())),
+            "discovered_by_sector": dict(sorted(self.discovered_by_sector.items()))
+        }
+
+
+class EventArchive:
+    """
+    Moves expired events out of the live state
+    
+    An event expires once it is settled (discovered, or its value has
+    decayed to zero; see utils.events.event_in_play) and spawned at least
+    horizon steps ago. Events still in play are never removed, so the env
+    can still discover and update them.
+    Expired events are removed from the front of state.events (and of
+    state.discovered_events) and kept in a ring buffer of the most recent
+    capacity events; with a spill path every removed event is also appended
+    to a JSON Lines file. Trimming stops at the first event still in play,
+    so event positions stay contiguous; the live lists are bounded by how
+    long events stay in play, plus the horizon.
+    """
+    
+    def __init__(
+        self,
+        horizon: int = 1000,
+        capacity: int = 10000,
+        spill_path: Optional[Union[str, Path]] = None,
+        trim_interval: Optional[int] = None
+    ):
+        """
+        Args:
+            horizon: Steps a settled event stays in the live state
+            capacity: Expired events kept in memory (ring buffer)
+            spill_path: JSON Lines file receiving every expired event
+            trim_interval: Steps between trims (default: horizon // 10);
+                           each trim copies the live lists once
+        """
+        if horizon < 1:
+            raise ValueError(f"horizon must be positive, got {horizon}")
+        self.horizon = horizon
+        self.trim_interval = trim_interval or max(1, horizon // 10)
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._spill = None
+        if self.spill_path:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spill = open(self.spill_path, "w")
+        self.archived = 0
+        self._last_trim: Optional[int] = None
+    
+    def trim(self, state: EnvironmentState, aggregates: Optional[EpisodeAggregates] = None) -> int:
+        """
+        Remove settled events older than the horizon from state
+        
+        Args:
+            state: Live state, modified in place
+            aggregates: Updated first, so no trimmed entry goes uncounted
+        
+        Returns:
+            Number of events removed from state.events
+        """
+        timestep = state.timestep
+        if self._last_trim is not None and timestep < self._last_trim:
+            self._last_trim = None  # New episode
+        if self._last_trim is not None and timestep - self._last_trim < self.trim_interval:
+            return 0
+        self._last_trim = timestep
+        if aggregates is not None:
+            aggregates.update(state)
+        
+        cutoff = timestep - self.horizon
+        events = state.events
+        expired = 0
+        while expired < len(events) and events[expired].timestep < cutoff and not event_in_play(events[expired]):
+            expired += 1
+        discovered = state.discovered_events
+        discovered_expired = 0
+        while discovered_expired < len(discovered) and discovered[discovered_expired].timestep < cutoff:
+            discovered_expired += 1
+        
+        if expired:
+            for event in events[:expired]:
+                record = _event_record(event)
+                self.recent.append(record)
+                if self._spill:
+                    self._spill.write(json.dumps(record) + "\n")
+            state.events = events[expired:]
+            state.events_base = getattr(state, "events_base", 0) + expired
+            self.archived += expired
+        if discovered_expired:
+            state.discovered_events = discovered[discovered_expired:]
+            state.discovered_base = getattr(state, "discovered_base", 0) + discovered_expired
+        return expired
+    
+    def close(self):
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+
+def read_spill(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Iterate over the events in an EventArchive spill file"""
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
@@ -0,0 +1,404 @@
+"""Persistent episode server: warm workers taking jobs over a local socket
+
+Requests are JSON objects on a ROUTER socket (REQ clients send one job at
+a time, DEALER clients can pipeline many):
+    
+    {"id": 7, "seed": 42, "strategy": "hybrid",
+     "config": {"environment": {"episode_length": 500}},
+     "upgrades": ["sensor_quality"],
+     "output": "/data/runs/seed42", "format": "columnar"}
+
+Every field is optional. "config" overrides sections of the server's
+config, "output" saves the full episode (as run_episode.py --output
+would), and "id" is echoed back. The reply carries the final_state
+summary:
+    
+    {"status": "ok", "id": 7, "seed": 42, "strategy": "hybrid",
+     "summary": {...}, "output": "/data/runs/seed42.ssep", "elapsed": 0.08}
+
+{"command": "status"} reports the pool, and {"command": "shutdown"} stops
+the server once the jobs in flight have been answered.
+
+With a ResultCache, jobs whose result is cached are answered at once
+with "cached": true. A job with "output" is only answered from the cache
+if the entry holds an episode file of the requested format, which is
+copied to the output path.
+
+Workers keep one ObservatoryEnv per distinct environment config and one
+agent per strategy, so a job pays only for its episode.
+"""
+
+import copy
+import json
+import multiprocessing
+import shutil
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import zmq
+
+from ..utils.logging import EPISODE_EXTENSIONS, EpisodeLogger
+from ..utils.result_cache import ResultCache
+from .episode import SUMMARY_FIELDS, make_agent, make_env, play_episode
+
+
+DEFAULT_ADDRESS = "tcp://127.0.0.1:5570"
+
+# Per-process state, reused for every job (see _init_worker)
+_worker_envs: Dict[str, Any] = {}
+_worker_agents: Dict[str, Any] = {}
+
+
+def apply_overrides(config: Dict[str, Any], overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy of config with each overridden section updated key by key"""
+    config = copy.deepcopy(config)
+    for section, values in (overrides or {}).items():
+        if isinstance(values, dict) and isinstance(config.get(section), dict):
+            config[section].update(values)
+        else:
+            config[section] = values
+    return config
+
+
+def _json_default(value):
+    # numpy scalars in summaries
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _env_key(config: Dict[str, Any]) -> str:
+    return json.dumps({k: v for k, v in config["environment"].items() if k != "seed"}, sort_keys=True)
+
+
+def _init_worker(config: Dict[str, Any]):
+    """Build the default env and agent before the first job arrives"""
+    _worker_envs.clear()
+    _worker_agents.clear()
+    _worker_envs[_env_key(config)] = make_env(config)
+    strategy = config["agent"]["dummy_strategy"]
+    _worker_agents[strategy] = make_agent(strategy)
+
+
+def run_job(config: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one job on this process's warm env and agent
+    
+    Args:
+        config: Server config with the job's overrides applied
+        job: Request (see module docstring)
+    
+    Returns:
+        Reply fields: seed, strategy, summary, output, elapsed
+    """
+    start = time.perf_counter()
+    key = _env_key(config)
+    env = _worker_envs.get(key)
+    if env is None:
+        env = _worker_envs[key] = make_env(config)
+    
+    strategy = job.get("strategy", config["agent"]["dummy_strategy"])
+    agent = _worker_agents.get(strategy)
+    if agent is None:
+        agent = _worker_agents[strategy] = make_agent(strategy)
+    
+    seed = job.get("seed", config["environment"]["seed"])
+    output = job.get("output")
+    episode_data = None
+    if output:
+        episode_data = {
+            "seed": seed,
+            "config": config,
+            "timesteps": [],
+            "actions": [],
+            "observations": [],
+            "rewards": [],
+            "info": []
+        }
+    
+    summary = play_episode(env, agent, seed, upgrades=job.get("upgrades", ()), episode_data=episode_data)
+    
+    saved_path = None
+    if output:
+        episode_data["final_state"] = summary
+        logger = EpisodeLogger(log_dir=config["logging"]["episode_dir"])
+        saved_path = logger.save_episode(episode_data, format=job.get("format", "json"), filename=output)
+    
+    return {
+        "seed": seed,
+        "strategy": strategy,
+        "summary": summary,
+        "output": saved_path,
+        "elapsed": time.perf_counter() - start
+    }
+
+
+class EpisodeServer:
+    """
+    Serves episode jobs from a pool of warm worker processes
+    
+    Jobs beyond the pool size wait in the pool's queue; replies are sent
+    as jobs finish, in no particular order.
+    """
+    
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        address: str = DEFAULT_ADDRESS,
+        workers: Optional[int] = None,
+        cache: Optional[ResultCache] = None
+    ):
+        """
+        Args:
+            config: Merged config (see load_config), the base of every job
+            address: Address to bind
+            workers: Worker processes (default: CPU count); 0 runs jobs
+                     in the server process, one at a time
+            cache: Result cache consulted before, and filled after, each job
+        """
+        self.config = config
+        self.address = address
+        self.workers = multiprocessing.cpu_count() if workers is None else workers
+        self.cache = cache
+        self.accepting = False
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cached = 0
+        
+        self.pool = None
+        self.context = None
+        self.socket = None
+        self._replies: deque = deque()
+        self._wake_send = None
+        self._wake_recv = None
+    
+    def start(self):
+        """Bind the socket and warm up the workers"""
+        if self.workers:
+            self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(self.config,))
+        else:
+            _init_worker(self.config)
+        
+        self.context = zmq.Context()
+        self.socket = self.context.socket(zmq.ROUTER)
+        self.socket.bind(self.address)
+        # Pool callbacks run on the pool's result thread; it wakes the
+        # server loop through this pair, the only socket it touches
+        wake_address = f"inproc://episode-server-{id(self)}"
+        self._wake_recv = self.context.socket(zmq.PAIR)
+        self._wake_recv.bind(wake_address)
+        self._wake_send = self.context.socket(zmq.PAIR)
+        self._wake_send.connect(wake_address)
+        self.accepting = True
+    
+    def serve_forever(self):
+        """Handle requests until a shutdown command (or KeyboardInterrupt)"""
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        poller.register(self._wake_recv, zmq.POLLIN)
+        
+        while self.accepting or self.in_flight:
+            events = dict(poller.poll(1000))
+            if self._wake_recv in events:
+                while self._wake_recv.poll(0, zmq.POLLIN):
+                    self._wake_recv.recv()
+            while self.socket.poll(0, zmq.POLLIN):
+                self._receive(self.socket.recv_multipart())
+            self._send_replies()
+    
+    def stop(self):
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+        if self.socket:
+            self.socket.close(linger=1000)  # Let the last replies out
+        for socket in (self._wake_send, self._wake_recv):
+            if socket:
+                socket.close(linger=0)
+        if self.context:
+            self.context.term()
+    
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "accepting": self.accepting,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cached": self.cached,
+            "in_flight": self.in_flight
+        }
+    
+    def _receive(self, frames: List[bytes]):
+        envelope, body = frames[:-1], frames[-1]
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            self._reply(envelope, {"status": "error", "message": f"Invalid request: {e}"})
+            return
+        
+        command = request.get("command")
+        if command == "status":
+            self._reply(envelope, {"status": "ok", **self.status()})
+        elif command == "shutdown":
+            self.accepting = False
+            self._reply(envelope, {"status": "ok", **self.status()})
+        elif command is not None:
+            self._reply(envelope, {"status": "error", "message": f"Unknown command: {command}"})
+        elif not self.accepting:
+            self._reply(envelope, {"status": "error", "id": request.get("id"), "message": "server is shutting down"})
+        else:
+            self._submit(envelope, request)
+    
+    def _submit(self, envelope: List[bytes], job: Dict[str, Any]):
+        self.submitted += 1
+        job_id = job.get("id")
+        try:
+            config = apply_overrides(self.config, job.get("config"))
+        except Exception as e:
+            self._finish(envelope, job_id, error=e)
+            return
+        
+        cache_key = None
+        seed = job.get("seed", config["environment"]["seed"])
+        if self.cache is not None and seed is not None:
+            strategy = job.get("strategy", config["agent"]["dummy_strategy"])
+            cache_key = self.cache.key(config, seed, strategy, job.get("upgrades", ()))
+            result = self._from_cache(cache_key, config, job)
+            if result is not None:
+                self.cached += 1
+                self._finish(envelope, job_id, result=result)
+                return
+        
+        if self.pool is None:
+            try:
+                result = run_job(config, job)
+            except Exception as e:
+                self._finish(envelope, job_id, error=e)
+            else:
+                self._finish(envelope, job_id, result=result, cache_key=cache_key, job=job)
+            return
+        
+        self.pool.apply_async(
+            run_job, (config, job),
+            callback=lambda result: self._finish(envelope, job_id, result=result, wake=True, cache_key=cache_key, job=job),
+            error_callback=lambda error: self._finish(envelope, job_id, error=error, wake=True)
+        )
+    
+    def _from_cache(self, cache_key: str, config: Dict[str, Any], job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Reply fields for a cached job, or None if it has to run"""
+        start = time.perf_counter()
+        entry = self.cache.get(cache_key, required=SUMMARY_FIELDS)
+        if entry is None:
+            return None
+        
+        saved_path = None
+        if job.get("output"):
+            extension = EPISODE_EXTENSIONS.get(job.get("format", "json"))
+            episode_path = self.cache.episode_path(entry)
+            if episode_path is None or episode_path.suffix != f".{extension}":
+                return None
+            log_dir = Path(config["logging"]["episode_dir"])
+            log_dir.mkdir(parents=True, exist_ok=True)
+            saved_path = str(log_dir / f"{job['output']}.{extension}")
+            shutil.copyfile(episode_path, saved_path)
+        
+        return {
+            "seed": entry["seed"],
+            "strategy": entry["strategy"],
+            "summary": entry["summary"],
+            "output": saved_path,
+            "elapsed": time.perf_counter() - start,
+            "cached": True
+        }
+    
+    def _finish(self, envelope, job_id, result=None, error=None, wake=False, cache_key=None, job=None):
+        if error is not None:
+            reply = {"status": "error", "id": job_id, "message": str(error)}
+        else:
+            reply = {"status": "ok", "id": job_id, **result}
+        # Results are cached by the server loop, not the pool's result thread
+        store = (cache_key, job) if cache_key is not None and error is None else None
+        self._replies.append((envelope, reply, store))
+        if wake:
+            self._wake_send.send(b"")
+    
+    def _reply(self, envelope: List[bytes], reply: Dict[str, Any]):
+        self.socket.send_multipart(envelope + [json.dumps(reply, default=_json_default).encode("utf-8")])
+    
+    def _send_replies(self):
+        while self._replies:
+            envelope, reply, store = self._replies.popleft()
+            if reply["status"] == "ok":
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._reply(envelope, reply)
+            if store is not None:
+                self._store(reply, *store)
+    
+    def _store(self, reply: Dict[str, Any], cache_key: str, job: Dict[str, Any]):
+        store_episodes = (self.config.get("cache") or {}).get("store_episodes", False)
+        try:
+            self.cache.put(
+                cache_key, reply["summary"],
+                seed=reply["seed"], strategy=reply["strategy"], upgrades=job.get("upgrades", ()),
+                episode_path=reply["output"] if store_episodes else None
+            )
+        except OSError as e:
+            print(f"Error caching result: {e}")
+
+
+class EpisodeClient:
+    """Submits jobs to an EpisodeServer"""
+    
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: Optional[float] = None):
+        """
+        Args:
+            address: Server address
+            timeout: Seconds to wait for each reply (None waits forever)
+        """
+        self.context = zmq.Context.instance()
+        self.address = address
+        self.timeout_ms = int(timeout * 1000) if timeout is not None else None
+    
+    def request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and wait for its reply"""
+        return self.run_many([request])[0]
+    
+    def run_many(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Submit all jobs at once and collect the replies
+        
+        Returns:
+            Replies in job order, with each job's own "id" (if any)
+        """
+        socket = self.context.socket(zmq.DEALER)
+        socket.connect(self.address)
+        try:
+            for index, job in enumerate(jobs):
+                job = dict(job, id=index)
+                socket.send_multipart([b"", json.dumps(job).encode("utf-8")])
+            
+            replies: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+            for _ in range(len(jobs)):
+                if not socket.poll(self.timeout_ms):
+                    raise TimeoutError(f"No reply from {self.address}")
+                reply = json.loads(socket.recv_multipart()[-1])
+                index = reply.get("id")
+                if index is None:
+                    # Commands do not echo an id
+                    index = replies.index(None)
+                if index < len(jobs) and "id" in jobs[index]:
+                    reply["id"] = jobs[index]["id"]
+                replies[index] = reply
+            return replies
+        finally:
+            socket.close(linger=0)
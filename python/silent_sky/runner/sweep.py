@@ -0,0 +1,155 @@
+"""Parallel seed sweeps over a process pool with long-lived workers"""
+
+import multiprocessing
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..utils.result_cache import ResultCache
+from .episode import SUMMARY_FIELDS, make_agent, make_env, play_episode
+
+
+# Per-process state, created once by _init_worker and reused for every job
+_worker_env = None
+_worker_agents: Dict[str, Any] = {}
+
+
+def _init_worker(config: Dict[str, Any]):
+    global _worker_env, _worker_agents
+    _worker_env = make_env(config)
+    _worker_agents = {}
+
+
+def _run_job(job: Tuple) -> Dict[str, Any]:
+    seed, strategy, *rest = job
+    upgrades = tuple(rest[0]) if rest else ()
+    agent = _worker_agents.get(strategy)
+    if agent is None:
+        agent = make_agent(strategy, seed)
+        _worker_agents[strategy] = agent
+    
+    summary = play_episode(_worker_env, agent, seed, upgrades=upgrades)
+    result = {"seed": seed, "strategy": strategy, **summary}
+    if rest:
+        result["upgrades"] = upgrades
+    return result
+
+
+def sweep_jobs(seeds: Iterable[int], strategies: Sequence[str]) -> List[Tuple[int, str]]:
+    """All (seed, strategy) pairs of a sweep"""
+    return [(seed, strategy) for seed in seeds for strategy in strategies]
+
+
+def run_sweep(
+    config: Dict[str, Any],
+    seeds: Iterable[int],
+    strategies: Sequence[str],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    cache: Optional[ResultCache] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run one episode per (seed, strategy) on a pool of worker processes
+    
+    Each worker builds its ObservatoryEnv and agents once and reuses them
+    across episodes. Results are yielded as they complete, in no
+    particular order.
+    
+    Args:
+        config: Merged config (see load_config); "environment" is used
+        seeds: Episode seeds
+        strategies: DummyAgent strategies to run for every seed
+        workers: Worker processes (default: CPU count); 0 runs in-process
+        chunksize: Jobs handed to a worker at a time
+        cache: Result cache; cached episodes are not rerun (see run_jobs)
+    
+    Yields:
+        Dict with seed, strategy and the episode's final_state summary
+    """
+    return run_jobs(config, sweep_jobs(seeds, strategies), workers=workers, chunksize=chunksize, cache=cache)
+
+
+def run_jobs(
+    config: Dict[str, Any],
+    jobs: Sequence[Tuple],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    cache: Optional[ResultCache] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run arbitrary episode jobs on the sweep worker pool
+    
+    Args:
+        config: Merged config (see load_config)
+        jobs: (seed, strategy) or (seed, strategy, upgrades) tuples
+        workers: Worker processes (default: CPU count); 0 runs in-process
+        chunksize: Jobs handed to a worker at a time
+        cache: Result cache; hits are yielded first, without starting
+               workers, and every episode played is stored
+    
+    Yields:
+        Dict with seed, strategy (and upgrades, if given) and the
+        episode's final_state summary, in completion order
+    """
+    if cache is not None:
+        yield from _run_cached(config, jobs, workers, chunksize, cache)
+        return
+    
+    if workers == 0:
+        _init_worker(config)
+        for job in jobs:
+            yield _run_job(job)
+        return
+    
+    workers = workers or multiprocessing.cpu_count()
+    if chunksize is None:
+        chunksize = max(1, len(jobs) // (workers * 8))
+    
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config,)) as pool:
+        for result in pool.imap_unordered(_run_job, jobs, chunksize=chunksize):
+            yield result
+
+
+def _run_cached(config, jobs, workers, chunksize, cache: ResultCache) -> Iterator[Dict[str, Any]]:
+    pending = []
+    for job in jobs:
+        seed, strategy, *rest = job
+        upgrades = tuple(rest[0]) if rest else ()
+        entry = cache.get(cache.key(config, seed, strategy, upgrades), required=SUMMARY_FIELDS)
+        if entry is None:
+            pending.append(job)
+            continue
+        result = {"seed": seed, "strategy": strategy, **entry["summary"]}
+        if rest:
+            result["upgrades"] = upgrades
+        yield result
+    
+    if not pending:
+        return
+    for result in run_jobs(config, pending, workers=workers, chunksize=chunksize):
+        upgrades = result.get("upgrades", ())
+        summary = {k: v for k, v in result.items() if k not in ("seed", "strategy", "upgrades")}
+        cache.put(
+            cache.key(config, result["seed"], result["strategy"], upgrades), summary,
+            seed=result["seed"], strategy=result["strategy"], upgrades=upgrades
+        )
+        yield result
+
+
+def aggregate_results(results: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Mean final_state metrics per strategy"""
+    totals: Dict[str, Dict[str, float]] = {}
+    for result in results:
+        row = totals.setdefault(result["strategy"], {
+            "episodes": 0,
+            "total_reward": 0.0,
+            "profit": 0.0,
+            "events_discovered": 0.0,
+            "events_total": 0.0
+        })
+        row["episodes"] += 1
+        for key in ("total_reward", "profit", "events_discovered", "events_total"):
+            row[key] += result[key]
+    
+    for row in totals.values():
+        for key in ("total_reward", "profit", "events_discovered", "events_total"):
+            row[key] /= row["episodes"]
+    return totals
@@ -0,0 +1,224 @@
+"""Upgrade return-on-investment: every upgrade combination on shared seeds
+
+Each (strategy, combination) cell runs the same seeds, so all combinations
+see the same event schedules (common random numbers) and differences from
+the no-upgrade baseline are compared seed by seed. Per-seed results are
+cached per cell:
+    
+    <cache_dir>/<config key>/<strategy>/<combination>.json
+
+where the config key hashes what ResultCache keys hash (the config
+minus the seed and strategy, plus the silent_sky source fingerprint), so
+changed settings or code start fresh cells. A rerun only plays the seeds
+a cell does not have yet.
+"""
+
+import itertools
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..utils.result_cache import result_key
+from .sweep import run_jobs
+
+
+UPGRADES = ("sensor_quality", "field_of_view", "reaction_speed", "prediction_hints")
+
+# Two-sided 95% normal quantile; intervals assume enough seeds per cell
+# (hundreds or more) for the sample means to be close to normal
+Z_95 = 1.959964
+
+Combination = Tuple[str, ...]
+
+
+def upgrade_combinations(upgrades: Sequence[str] = UPGRADES) -> List[Combination]:
+    """All subsets of upgrades, smallest first (2^4 = 16 for the defaults)"""
+    return [
+        combination
+        for size in range(len(upgrades) + 1)
+        for combination in itertools.combinations(upgrades, size)
+    ]
+
+
+def combination_name(combination: Combination) -> str:
+    return "+".join(combination) if combination else "none"
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """Short hash of the settings and source that affect episode outcomes"""
+    # Seed and strategy vary within the cache, so they are left out
+    return result_key(config, seed=None, strategy=None)[:16]
+
+
+class CellCache:
+    """Per-seed results of each (strategy, combination) cell on disk"""
+    
+    def __init__(self, cache_dir: Union[str, Path], config: Dict[str, Any]):
+        self.root = Path(cache_dir) / config_key(config)
+        self._cells: Dict[Tuple[str, Combination], Dict[int, Dict]] = {}
+        self._dirty = set()
+    
+    def _path(self, strategy: str, combination: Combination) -> Path:
+        return self.root / strategy / f"{combination_name(combination)}.json"
+    
+    def get(self, strategy: str, combination: Combination) -> Dict[int, Dict]:
+        """Seed -> result for one cell (loaded on first use)"""
+        key = (strategy, combination)
+        if key not in self._cells:
+            path = self._path(strategy, combination)
+            cell = {}
+            if path.exists():
+                with open(path, "r") as f:
+                    cell = {int(seed): result for seed, result in json.load(f)["seeds"].items()}
+            self._cells[key] = cell
+        return self._cells[key]
+    
+    def add(self, result: Dict):
+        combination = tuple(result["upgrades"])
+        self.get(result["strategy"], combination)[result["seed"]] = result
+        self._dirty.add((result["strategy"], combination))
+    
+    def flush(self):
+        """Write cells changed since the last flush (atomic per cell)"""
+        for strategy, combination in self._dirty:
+            path = self._path(strategy, combination)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "strategy": strategy,
+                    "upgrades": list(combination),
+                    "seeds": self._cells[(strategy, combination)]
+                }, f)
+            os.replace(tmp_path, path)
+        self._dirty.clear()
+
+
+def mean_interval(values: np.ndarray) -> Tuple[float, float]:
+    """Mean and 95% confidence half-width"""
+    if len(values) == 0:
+        return math.nan, math.nan
+    if len(values) == 1:
+        return float(values[0]), math.nan
+    return float(values.mean()), float(Z_95 * values.std(ddof=1) / math.sqrt(len(values)))
+
+
+def ratio_interval(numerator: np.ndarray, denominator: np.ndarray) -> Tuple[float, float]:
+    """Ratio of means and its 95% half-width (delta method)"""
+    if len(numerator) < 2 or denominator.mean() == 0:
+        return math.nan, math.nan
+    ratio = numerator.mean() / denominator.mean()
+    residual = numerator - ratio * denominator
+    half_width = Z_95 * residual.std(ddof=1) / (math.sqrt(len(numerator)) * abs(denominator.mean()))
+    return float(ratio), float(half_width)
+
+
+def summarize_cell(results: Sequence[Dict], baseline: Optional[Dict[int, Dict]] = None) -> Dict[str, Any]:
+    """
+    Statistics of one cell
+    
+    Args:
+        results: Per-seed results of the cell
+        baseline: Seed -> result of the no-upgrade cell of the same
+                  strategy, for paired differences
+    
+    Returns:
+        Dict of (mean, half_width) pairs: profit (as the env reports it),
+        net_profit (budget change over the episode, so upgrade purchases
+        count exactly once), events_discovered, cost_per_discovery
+        (episode costs over discoveries), and with a baseline,
+        net_profit_gain and discovery_gain
+    """
+    def column(rows, key):
+        return np.array([row[key] for row in rows], dtype=np.float64)
+    
+    def net(rows):
+        return column(rows, "budget") - column(rows, "start_budget")
+    
+    profit = column(results, "profit")
+    net_profit = net(results)
+    discovered = column(results, "events_discovered")
+    summary = {
+        "episodes": len(results),
+        "upgrade_cost": float(column(results, "upgrade_cost").mean()) if results else math.nan,
+        "profit": mean_interval(profit),
+        "net_profit": mean_interval(net_profit),
+        "events_discovered": mean_interval(discovered),
+        "cost_per_discovery": ratio_interval(column(results, "costs"), discovered)
+    }
+    
+    if baseline is not None:
+        paired = [(row, baseline[row["seed"]]) for row in results if row["seed"] in baseline]
+        base = [b for _, b in paired]
+        rows = [row for row, _ in paired]
+        summary["net_profit_gain"] = mean_interval(net(rows) - net(base))
+        summary["discovery_gain"] = mean_interval(column(rows, "events_discovered") - column(base, "events_discovered"))
+    return summary
+
+
+def evaluate_upgrades(
+    config: Dict[str, Any],
+    seeds: Iterable[int],
+    strategies: Sequence[str],
+    cache_dir: Union[str, Path],
+    combinations: Optional[Sequence[Combination]] = None,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    flush_every: int = 1000,
+    progress=None
+) -> Dict[Tuple[str, Combination], Dict[str, Any]]:
+    """
+    Play the missing seeds of every cell and summarize the grid
+    
+    Args:
+        config: Merged config (see load_config)
+        seeds: Seeds shared by every cell
+        strategies: DummyAgent strategies
+        cache_dir: Root of the cell cache
+        combinations: Upgrade combinations (default: all 16); the empty
+                      baseline combination is always included
+        workers: Worker processes (default: CPU count); 0 runs in-process
+        chunksize: Jobs handed to a worker at a time
+        flush_every: Write the cache every this many finished episodes, so
+                     an interrupted run keeps its progress
+        progress: Optional callback(done, total)
+    
+    Returns:
+        (strategy, combination) -> summarize_cell dict
+    """
+    seeds = list(seeds)
+    combinations = list(combinations) if combinations is not None else upgrade_combinations()
+    if () not in combinations:
+        combinations.insert(0, ())
+    cache = CellCache(cache_dir, config)
+    
+    jobs = [
+        (seed, strategy, combination)
+        for strategy in strategies
+        for combination in combinations
+        for seed in seeds
+        if seed not in cache.get(strategy, combination)
+    ]
+    if jobs:
+        try:
+            for done, result in enumerate(run_jobs(config, jobs, workers=workers, chunksize=chunksize), 1):
+                cache.add(result)
+                if done % flush_every == 0:
+                    cache.flush()
+                if progress is not None:
+                    progress(done, len(jobs))
+        finally:
+            cache.flush()
+    
+    summaries = {}
+    for strategy in strategies:
+        baseline = cache.get(strategy, ())
+        for combination in combinations:
+            cell = cache.get(strategy, combination)
+            results = [cell[seed] for seed in seeds]
+            summaries[(strategy, combination)] = summarize_cell(results, baseline if combination else None)
+    return summaries
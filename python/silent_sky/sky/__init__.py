@@ -0,0 +1,36 @@
+"""Sky geometry: sphere-to-viewport projection and hexagon signal mapping"""
+
+from .coordinates import spherical_to_cartesian, cartesian_to_spherical, angular_distance, normalize_theta, clamp_phi
+from .projection import project_to_viewport, in_viewport, viewport_center
+from .hexgrid import (
+    HexagonGridMapper,
+    HexRingGrid,
+    SectorField,
+    jwst_hex_positions,
+    hex_ring_positions,
+    hex_ring_sector_count,
+    hex_rings_for_sectors,
+    hex_to_world,
+)
+from .signals import SignalCalculator, active_events
+
+__all__ = [
+    "spherical_to_cartesian",
+    "cartesian_to_spherical",
+    "angular_distance",
+    "normalize_theta",
+    "clamp_phi",
+    "project_to_viewport",
+    "in_viewport",
+    "viewport_center",
+    "HexagonGridMapper",
+    "HexRingGrid",
+    "SectorField",
+    "jwst_hex_positions",
+    "hex_ring_positions",
+    "hex_ring_sector_count",
+    "hex_rings_for_sectors",
+    "hex_to_world",
+    "SignalCalculator",
+    "active_events",
+]
@@ -0,0 +1,59 @@
+"""Spherical coordinate conversions (port of SphericalCoordinateSystem.cs)
+
+Theta: azimuth angle [0, 2π) (longitude)
+Phi: polar angle [0, π] (latitude)
+
+All functions accept scalars or arrays and broadcast like NumPy ufuncs.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+TWO_PI = 2.0 * np.pi
+
+
+def spherical_to_cartesian(theta, phi, radius=1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(theta, phi, radius) -> (x, y, z)"""
+    sin_phi = np.sin(phi)
+    return (
+        radius * sin_phi * np.cos(theta),
+        radius * sin_phi * np.sin(theta),
+        radius * np.cos(phi)
+    )
+
+
+def cartesian_to_spherical(x, y, z) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(x, y, z) -> (theta, phi, radius); points at the origin map to (0, 0, 0)"""
+    x, y, z = np.broadcast_arrays(np.asarray(x, dtype=np.float64), y, z)
+    radius = np.sqrt(x * x + y * y + z * z)
+    degenerate = radius < 0.0001
+    theta = np.mod(np.arctan2(y, x), TWO_PI)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        phi = np.arccos(np.clip(z / radius, -1.0, 1.0))
+    theta = np.where(degenerate, 0.0, theta)
+    phi = np.where(degenerate, 0.0, phi)
+    radius = np.where(degenerate, 0.0, radius)
+    return theta, phi, radius
+
+
+def angular_distance(theta1, phi1, theta2, phi2) -> np.ndarray:
+    """Great-circle distance in radians (spherical law of cosines)"""
+    cos_delta = (
+        np.sin(phi1) * np.sin(phi2) * np.cos(theta1 - theta2)
+        + np.cos(phi1) * np.cos(phi2)
+    )
+    return np.arccos(np.clip(cos_delta, -1.0, 1.0))
+
+
+def normalize_theta(theta) -> np.ndarray:
+    """Wrap theta to [0, 2π)"""
+    theta = np.mod(theta, TWO_PI)
+    # mod can round up to exactly 2π for tiny negative inputs
+    return np.where(theta >= TWO_PI, 0.0, theta)
+
+
+def clamp_phi(phi) -> np.ndarray:
+    """Clamp phi to [0, π]"""
+    return np.clip(phi, 0.0, np.pi)
@@ -0,0 +1,364 @@
+"""Viewport-to-hexagon mapping (port of HexagonGridMapper.cs)
+
+Hexagons are pointy-top with "size" the centre-to-vertex radius, laid out
+in axial coordinates like SectorMap. A point belongs to the first hexagon
+(lowest index) whose closed outline contains it, or to none (-1).
+
+Lookups go through a raster over the [0, 1]² viewport. Each cell stores
+the hexagon that contains the whole cell, -1 if the cell touches no
+hexagon, or AMBIGUOUS if a hexagon edge may cross it. Only points in
+ambiguous cells get the exact edge test, so the result matches the
+per-hexagon test of the C# code at O(1) cost for almost every point.
+
+HexRingGrid generalizes the 19-hex JWST layout to any number of rings and
+precomputes the neighbour and footprint tables that sparse sensor updates
+need; SectorField tracks which sectors changed since the last read.
+"""
+
+import math
+from threading import Lock
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+JWST_NUM_HEXAGONS = 19
+
+# Defaults used by SectorMap / SignalCalculator in Unity
+DEFAULT_HEX_SIZE = 80.0
+DEFAULT_VIEWPORT_SIZE = (800.0, 800.0)
+
+AMBIGUOUS = -2
+
+# Axial offsets of the six neighbours
+HEX_DIRECTIONS = ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1))
+
+
+def jwst_hex_positions() -> List[Tuple[int, int]]:
+    """Axial (q, r) coordinates of the 19 hexagons in sector index order"""
+    positions = [(0, 0), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1), (1, -1)]
+    
+    ring2 = [
+        (q, r)
+        for q in range(-3, 4)
+        for r in range(-3, 4)
+        if (abs(q) + abs(r) + abs(q + r)) // 2 == 2
+    ]
+    # Descending angle of the raw (q, r) pair, as in SignalCalculator.cs
+    ring2.sort(key=lambda p: math.atan2(p[1], p[0]), reverse=True)
+    
+    return positions + ring2
+
+
+def hex_ring_positions(num_rings: int) -> List[Tuple[int, int]]:
+    """
+    Axial (q, r) coordinates of a hexagon of num_rings rings around a centre
+    
+    The first 19 entries are jwst_hex_positions(); every further ring is
+    ordered like ring 2, by descending angle of the raw (q, r) pair.
+    """
+    if num_rings < 0:
+        raise ValueError(f"num_rings must be >= 0, got {num_rings}")
+    positions = jwst_hex_positions()[:hex_ring_sector_count(min(num_rings, 2))]
+    for ring in range(3, num_rings + 1):
+        cells = [
+            (q, r)
+            for q in range(-ring, ring + 1)
+            for r in range(max(-ring, -q - ring), min(ring, -q + ring) + 1)
+            if max(abs(q), abs(r), abs(q + r)) == ring
+        ]
+        cells.sort(key=lambda p: math.atan2(p[1], p[0]), reverse=True)
+        positions += cells
+    return positions
+
+
+def hex_ring_sector_count(num_rings: int) -> int:
+    """Hexagons in num_rings rings around a centre: 1 + 3 R (R + 1)"""
+    return 1 + 3 * num_rings * (num_rings + 1)
+
+
+def hex_rings_for_sectors(num_sectors: int) -> int:
+    """Inverse of hex_ring_sector_count; ValueError unless num_sectors is a full grid"""
+    num_rings = 0
+    while hex_ring_sector_count(num_rings) < num_sectors:
+        num_rings += 1
+    if hex_ring_sector_count(num_rings) != num_sectors:
+        raise ValueError(f"{num_sectors} sectors do not fill whole hex rings (7, 19, 37, 61, ...)")
+    return num_rings
+
+
+def hex_to_world(q, r, size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Axial coordinates to world position (pointy-top layout)"""
+    q = np.asarray(q, dtype=np.float64)
+    r = np.asarray(r, dtype=np.float64)
+    return size * np.sqrt(3.0) * (q + r * 0.5), size * 1.5 * r
+
+
+def hexagon_vertices(size: float) -> np.ndarray:
+    """Outline relative to the centre, clockwise from the top vertex: (6, 2)"""
+    half_width = size * np.sqrt(3.0) / 2.0
+    return np.array([
+        (0.0, size),
+        (half_width, size / 2.0),
+        (half_width, -size / 2.0),
+        (0.0, -size),
+        (-half_width, -size / 2.0),
+        (-half_width, size / 2.0),
+    ])
+
+
+class HexagonGridMapper:
+    """Maps normalized viewport points to hexagon indices"""
+    
+    def __init__(
+        self,
+        hex_world_positions: Optional[np.ndarray] = None,
+        hex_size: float = DEFAULT_HEX_SIZE,
+        viewport_size: Sequence[float] = DEFAULT_VIEWPORT_SIZE,
+        raster_resolution: int = 512
+    ):
+        """
+        Args:
+            hex_world_positions: (H, 2) hexagon centres relative to the
+                                 container centre (default: JWST layout)
+            hex_size: Hexagon radius in world units
+            viewport_size: (width, height) of the viewport container
+            raster_resolution: Lookup raster cells per axis
+        """
+        if hex_world_positions is None:
+            q, r = np.array(jwst_hex_positions()).T
+            hex_world_positions = np.stack(hex_to_world(q, r, hex_size), axis=1)
+        hex_world_positions = np.asarray(hex_world_positions, dtype=np.float64)
+        width, height = viewport_size
+        
+        self.num_hexagons = len(hex_world_positions)
+        self.centers = np.stack([
+            0.5 + hex_world_positions[:, 0] / width,
+            0.5 + hex_world_positions[:, 1] / height
+        ], axis=1)
+        # Normalized by the mean viewport dimension, as in the C# mapper
+        self.size_normalized = hex_size / ((width + height) * 0.5)
+        
+        vertices = hexagon_vertices(self.size_normalized)
+        self._edge_start = vertices
+        self._edge = np.roll(vertices, -1, axis=0) - vertices
+        self._edge_length = np.linalg.norm(self._edge, axis=1)
+        
+        self.raster_resolution = raster_resolution
+        self.raster = self._build_raster(raster_resolution)
+    
+    def hexagon_for_points(self, x, y) -> np.ndarray:
+        """
+        Hexagon index for each viewport point (-1 if none)
+        
+        Args:
+            x, y: Normalized viewport coordinates (any matching shapes)
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        shape = np.broadcast(x, y).shape
+        x = np.broadcast_to(x, shape).ravel()
+        y = np.broadcast_to(y, shape).ravel()
+        
+        resolution = self.raster_resolution
+        inside = (x >= 0.0) & (x <= 1.0) & (y >= 0.0) & (y <= 1.0)
+        ix = np.clip((x * resolution).astype(np.int64), 0, resolution - 1)
+        iy = np.clip((y * resolution).astype(np.int64), 0, resolution - 1)
+        result = np.where(inside, self.raster[iy, ix], -1)
+        
+        ambiguous = np.flatnonzero(result == AMBIGUOUS)
+        if len(ambiguous):
+            result[ambiguous] = self.hexagon_for_points_exact(x[ambiguous], y[ambiguous])
+        return result.reshape(shape)
+    
+    def hexagon_for_points_exact(self, x, y) -> np.ndarray:
+        """Hexagon index by testing every hexagon's edges (reference path)"""
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        # Cross product of each edge with the vector to the point, (N, H, 6);
+        # points are inside a clockwise outline where all crosses are <= 0
+        cross = self._edge_cross(x, y)
+        contained = np.all(cross <= 0.0, axis=2)
+        contained &= ((x >= 0.0) & (x <= 1.0) & (y >= 0.0) & (y <= 1.0))[:, None]
+        return np.where(contained.any(axis=1), contained.argmax(axis=1), -1)
+    
+    def _edge_cross(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        dx = x[:, None, None] - self.centers[None, :, 0, None] - self._edge_start[None, None, :, 0]
+        dy = y[:, None, None] - self.centers[None, :, 1, None] - self._edge_start[None, None, :, 1]
+        return self._edge[:, 0] * dy - self._edge[:, 1] * dx
+    
+    def _build_raster(self, resolution: int, rows_per_chunk: int = 32) -> np.ndarray:
+        """Classify each cell by the distance from its centre to every outline"""
+        raster = np.empty((resolution, resolution), dtype=np.int16)
+        cell_centers = (np.arange(resolution) + 0.5) / resolution
+        # A cell lies within half a diagonal of its centre
+        margin = np.sqrt(2.0) / (2.0 * resolution)
+        
+        for row in range(0, resolution, rows_per_chunk):
+            rows = cell_centers[row:row + rows_per_chunk]
+            x = np.tile(cell_centers, len(rows))
+            y = np.repeat(rows, resolution)
+            # Signed distance to each edge line (positive outside); the max
+            # over a convex outline's edges never exceeds the true distance
+            distance = (self._edge_cross(x, y) / self._edge_length).max(axis=2)
+            
+            within = distance < -margin
+            clear = np.all(distance > margin, axis=1)
+            cells = np.where(clear, -1, AMBIGUOUS)
+            cells = np.where(within.any(axis=1), within.argmax(axis=1), cells)
+            raster[row:row + len(rows)] = cells.reshape(len(rows), resolution)
+        return raster
+
+
+class HexRingGrid:
+    """
+    Sector indexing and adjacency for a hex-ring sky
+    
+    Built once per sky size. Sector i sits at positions[i] (see
+    hex_ring_positions); neighbours and footprints are index arrays, so
+    code touching one observation never walks the whole grid.
+    
+    Usage:
+        grid = HexRingGrid(num_rings=40)                 # 4921 sectors
+        observed = grid.footprint(sector, radius=1)      # sector + 6 neighbours
+    """
+    
+    def __init__(self, num_rings: int = 2):
+        self.num_rings = num_rings
+        self.positions = np.array(hex_ring_positions(num_rings), dtype=np.int32)
+        self.num_sectors = len(self.positions)
+        
+        # (q, r) -> sector index, -1 outside the grid, offset by num_rings
+        side = 2 * num_rings + 1
+        self._index = np.full((side, side), -1, dtype=np.int32)
+        self._index[self.positions[:, 0] + num_rings, self.positions[:, 1] + num_rings] = np.arange(self.num_sectors)
+        
+        self.neighbors = self._lookup(self.positions[:, None, :] + np.array(HEX_DIRECTIONS)[None])
+        self._footprints = {0: np.arange(self.num_sectors, dtype=np.int32)[:, None]}
+    
+    def index_of(self, q, r) -> np.ndarray:
+        """Sector index of axial coordinates (-1 outside the grid)"""
+        return self._lookup(np.stack([np.asarray(q), np.asarray(r)], axis=-1))
+    
+    def world_positions(self, size: float = DEFAULT_HEX_SIZE) -> np.ndarray:
+        """(H, 2) hexagon centres, e.g. for HexagonGridMapper"""
+        return np.stack(hex_to_world(self.positions[:, 0], self.positions[:, 1], size), axis=1)
+    
+    def footprint_table(self, radius: int) -> np.ndarray:
+        """
+        Sectors within radius steps of every sector, computed once per radius
+        
+        Returns:
+            (H, 1 + 3 radius (radius + 1)) int32, the sector itself first and
+            -1 padding where the footprint leaves the grid
+        """
+        table = self._footprints.get(radius)
+        if table is None:
+            offsets = np.array(hex_ring_positions(radius), dtype=np.int32)
+            table = self._footprints[radius] = self._lookup(self.positions[:, None, :] + offsets[None])
+        return table
+    
+    def footprint(self, sector: int, radius: int = 0) -> np.ndarray:
+        """Sectors within radius steps of sector, inside the grid"""
+        row = self.footprint_table(radius)[sector]
+        return row[row >= 0]
+    
+    def _lookup(self, axial: np.ndarray) -> np.ndarray:
+        shifted = axial + self.num_rings
+        side = self._index.shape[0]
+        inside = np.all((shifted >= 0) & (shifted < side), axis=-1)
+        shifted = np.where(inside[..., None], shifted, 0)
+        return np.where(inside, self._index[shifted[..., 0], shifted[..., 1]], -1).astype(np.int32)
+
+
+class SectorField:
+    """
+    Per-sector float channels with dirty-index tracking
+    
+    Writers update only the sectors an observation touched; readers ask
+    for the indices changed since the version they last read
+    (changes_since), so several readers (e.g. the bridge encoder and a
+    recorder) can follow one field. take_dirty is a built-in single reader.
+    Both sides cost O(changed sectors), independent of the sky size. The
+    change log holds at most about two sky's worth of indices; a reader
+    further behind gets None and should read the whole field. Marking and
+    reading changes are thread-safe.
+    """
+    
+    def __init__(self, num_sectors: int, channels: Sequence[str] = ("reading", "confidence"), dtype=np.float32):
+        self.channels = tuple(channels)
+        self.values = np.zeros((len(self.channels), num_sectors), dtype=dtype)
+        self._lock = Lock()
+        # Marked index arrays; _log[0] is version _log_start
+        self._log: List[np.ndarray] = []
+        self._log_start = 0
+        self._logged = 0
+        self._taken = 0
+    
+    @property
+    def num_sectors(self) -> int:
+        return self.values.shape[1]
+    
+    @property
+    def version(self) -> int:
+        """Number of marks so far; pass to changes_since to read what follows"""
+        return self._log_start + len(self._log)
+    
+    def __getitem__(self, channel: str) -> np.ndarray:
+        return self.values[self.channels.index(channel)]
+    
+    def update(self, indices, **channel_values):
+        """Set channel values at indices (scalars or arrays) and mark them dirty"""
+        indices = np.asarray(indices, dtype=np.intp).ravel()
+        for channel, values in channel_values.items():
+            self.values[self.channels.index(channel), indices] = values
+        self.mark(indices)
+    
+    def mark(self, indices):
+        """Mark sectors as changed"""
+        indices = np.array(indices, dtype=np.intp).ravel()
+        if not len(indices):
+            return
+        with self._lock:
+            self._log.append(indices)
+            self._logged += len(indices)
+            if self._logged > 2 * self.num_sectors:
+                # Forget the oldest marks down to about one sky's worth;
+                # readers that had not seen them read everything
+                drop = 0
+                while self._logged > self.num_sectors and drop < len(self._log) - 1:
+                    self._logged -= len(self._log[drop])
+                    drop += 1
+                del self._log[:drop]
+                self._log_start += drop
+    
+    def mark_all(self):
+        self.mark(np.arange(self.num_sectors))
+    
+    def changes_since(self, version: int) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Sectors marked after version
+        
+        Returns:
+            Sorted indices (None if the log no longer reaches back to
+            version) and the version to pass next time
+        """
+        with self._lock:
+            if version < self._log_start:
+                return None, self.version
+            chunks = self._log[version - self._log_start:]
+            current = self.version
+        if not chunks:
+            return np.empty(0, dtype=np.intp), current
+        return np.unique(np.concatenate(chunks)), current
+    
+    def take_dirty(self) -> np.ndarray:
+        """
+        Sorted indices changed since the last call; clears the dirty set
+        
+        Returns every sector if the change log was trimmed past the last call.
+        """
+        dirty, self._taken = self.changes_since(self._taken)
+        if dirty is None:
+            return np.arange(self.num_sectors)
+        return dirty
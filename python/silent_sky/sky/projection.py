@@ -0,0 +1,63 @@
+"""Equirectangular sphere-to-viewport projection (port of ViewportProjection.cs)
+
+The viewport is a 180° × 120° field of view centred on the equator at
+theta = 0, rotated by (theta_offset, phi_offset). Viewport coordinates are
+normalized: (0, 0) is bottom-left, (1, 1) top-right, and points outside the
+field of view fall outside [0, 1].
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from .coordinates import normalize_theta
+
+
+FOV_HORIZONTAL = np.pi  # 180°
+FOV_VERTICAL = 2.0 * np.pi / 3.0  # 120°
+
+DEFAULT_CENTER_THETA = 0.0
+DEFAULT_CENTER_PHI = np.pi / 2.0
+
+
+def project_to_viewport(theta, phi, theta_offset: float = 0.0, phi_offset: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Project points on the sphere to normalized viewport coordinates
+    
+    Args:
+        theta: Azimuth angles [0, 2π)
+        phi: Polar angles [0, π]
+        theta_offset: Viewport rotation in azimuth (unbounded)
+        phi_offset: Viewport rotation in polar angle (unbounded; the centre
+                    is clamped to the poles)
+    
+    Returns:
+        (x, y) arrays
+    """
+    center_theta = normalize_theta(DEFAULT_CENTER_THETA + normalize_theta(theta_offset))
+    center_phi = np.clip(DEFAULT_CENTER_PHI + phi_offset, 0.0, np.pi)
+    
+    # Shortest signed azimuth difference
+    delta_theta = np.asarray(theta, dtype=np.float64) - center_theta
+    delta_theta = np.where(delta_theta > np.pi, delta_theta - 2.0 * np.pi, delta_theta)
+    delta_theta = np.where(delta_theta < -np.pi, delta_theta + 2.0 * np.pi, delta_theta)
+    delta_phi = np.asarray(phi, dtype=np.float64) - center_phi
+    
+    return 0.5 + delta_theta / FOV_HORIZONTAL, 0.5 + delta_phi / FOV_VERTICAL
+
+
+def in_viewport(x, y) -> np.ndarray:
+    """Mask of viewport coordinates inside the field of view"""
+    return (x >= 0.0) & (x <= 1.0) & (y >= 0.0) & (y <= 1.0)
+
+
+def viewport_center(theta_offset: float = 0.0, phi_offset: float = 0.0) -> Tuple[float, float]:
+    """Viewport centre (theta, phi) on the sphere for a rotation"""
+    center_theta = float(normalize_theta(DEFAULT_CENTER_THETA + normalize_theta(theta_offset)))
+    center_phi = DEFAULT_CENTER_PHI + phi_offset
+    # Wrap past the poles, as the Unity viewport controller does
+    while center_phi < 0.0:
+        center_phi += np.pi
+    while center_phi > np.pi:
+        center_phi -= np.pi
+    return center_theta, float(np.clip(center_phi, 0.0, np.pi))
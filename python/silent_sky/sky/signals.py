@@ -0,0 +1,82 @@
+"""Per-hexagon signal aggregation (port of SignalCalculator.cs)"""
+
+from typing import Optional
+
+import numpy as np
+
+from .hexgrid import HexagonGridMapper
+from .projection import project_to_viewport
+
+
+def active_events(timestamps, durations, current_time: float) -> np.ndarray:
+    """Mask of events active at current_time (SpaceEvent.IsActive)"""
+    timestamps = np.asarray(timestamps)
+    return (current_time >= timestamps) & (current_time <= timestamps + np.asarray(durations))
+
+
+class SignalCalculator:
+    """
+    Sums event values per hexagon for events given in (theta, phi)
+    
+    Usage:
+        calculator = SignalCalculator()
+        signals = calculator.compute(theta, phi, values, theta_offset=0.3)
+    """
+    
+    def __init__(self, mapper: Optional[HexagonGridMapper] = None):
+        self.mapper = mapper or HexagonGridMapper()
+    
+    def assign(self, theta, phi, theta_offset: float = 0.0, phi_offset: float = 0.0) -> np.ndarray:
+        """Hexagon index of each event under a viewport rotation (-1 if none)"""
+        x, y = project_to_viewport(theta, phi, theta_offset, phi_offset)
+        return self.mapper.hexagon_for_points(x, y)
+    
+    def compute(
+        self,
+        theta,
+        phi,
+        values,
+        theta_offset: float = 0.0,
+        phi_offset: float = 0.0,
+        active: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Per-hexagon signal: the sum of the values of the events in each hexagon
+        
+        Args:
+            theta, phi: Event positions, shape (N,)
+            values: Event values, shape (N,)
+            theta_offset, phi_offset: Viewport rotation
+            active: Optional mask of events to include (see active_events)
+        
+        Returns:
+            float64 array of shape (num_hexagons,)
+        """
+        hexagons = self.assign(theta, phi, theta_offset, phi_offset)
+        values = np.asarray(values, dtype=np.float64)
+        mapped = hexagons >= 0
+        if active is not None:
+            mapped &= np.asarray(active, dtype=bool)
+        return np.bincount(hexagons[mapped], weights=values[mapped], minlength=self.mapper.num_hexagons)
+    
+    def compute_batch(self, theta, phi, values, theta_offsets, phi_offsets) -> np.ndarray:
+        """
+        Signals for the same events under B viewport rotations
+        
+        Returns:
+            Array of shape (B, num_hexagons)
+        """
+        theta_offsets = np.atleast_1d(theta_offsets)
+        phi_offsets = np.broadcast_to(phi_offsets, theta_offsets.shape)
+        values = np.asarray(values, dtype=np.float64)
+        num_hexagons = self.mapper.num_hexagons
+        
+        # Flatten (rotation, hexagon) into one bincount
+        hexagons = np.stack([
+            self.assign(theta, phi, t, p) for t, p in zip(theta_offsets, phi_offsets)
+        ])
+        rows = np.broadcast_to(np.arange(len(theta_offsets))[:, None], hexagons.shape)
+        mapped = hexagons >= 0
+        bins = rows[mapped] * num_hexagons + hexagons[mapped]
+        weights = np.broadcast_to(values, hexagons.shape)[mapped]
+        return np.bincount(bins, weights=weights, minlength=len(theta_offsets) * num_hexagons).reshape(-1, num_hexagons)
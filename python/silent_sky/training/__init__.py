@@ -0,0 +1,5 @@
+"""Training utilities (rollout collection)"""
+
+from .rollout import RolloutCollector, compute_gae
+
+__all__ = ["RolloutCollector", "compute_gae"]
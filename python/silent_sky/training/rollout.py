@@ -0,0 +1,398 @@
+"""Rollout collection: many env copies in worker processes, shared-memory buffers
+
+A RolloutCollector owns num_envs environments split across worker
+processes, and one buffer per field of shape (num_steps, num_envs, ...)
+in shared memory (observations have num_steps + 1 rows; the last one is
+the bootstrap observation). Workers read actions from and write
+observations, rewards and dones to those buffers directly; the pipes to
+the workers only carry step numbers.
+
+The policy runs in the parent process. It is any object with
+    
+    act(observation, indices) -> {"sector": (B,), "exposure_mode": (B,),
+                                  optionally "value": (B,), "log_prob": (B,)}
+
+where observation holds (B, ...) arrays for the envs in indices, plus
+optionally reset(indices, seeds) (called when those envs start a new
+episode) and value(observation, indices) (for the bootstrap value).
+BatchedDummyAgent fits this interface.
+
+In "lockstep" mode the policy acts for all envs at once and every worker
+steps its envs before the next step begins. In "async" mode each worker
+advances as soon as the policy has acted for its envs, so a slow worker
+does not hold up the others; every worker still fills num_steps rows.
+
+Env i plays episodes with seeds seed + i, seed + i + num_envs, ... and is
+reset as soon as an episode ends (terminated or truncated): dones[t, i]
+is 1 and observations[t + 1, i] is the first observation of the next
+episode.
+"""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..runner.episode import make_env, sky_sectors
+
+
+OBSERVATION_FIELDS = ("sensor_readings", "sensor_confidence", "time_remaining", "budget_remaining")
+
+
+def buffer_layout(num_steps: int, num_envs: int, num_sectors: int) -> Dict[str, Tuple[Tuple[int, ...], str]]:
+    """Field -> (shape, dtype) of the shared buffers"""
+    return {
+        "sensor_readings": ((num_steps + 1, num_envs, num_sectors), "<f4"),
+        "sensor_confidence": ((num_steps + 1, num_envs, num_sectors), "<f4"),
+        "time_remaining": ((num_steps + 1, num_envs, 1), "<f4"),
+        "budget_remaining": ((num_steps + 1, num_envs, 1), "<f4"),
+        "action_sector": ((num_steps, num_envs), "<i4"),
+        "action_exposure_mode": ((num_steps, num_envs), "<i4"),
+        "rewards": ((num_steps, num_envs), "<f4"),
+        "dones": ((num_steps, num_envs), "u1"),
+    }
+
+
+def episode_seed(seed: Optional[int], env_index: int, episode: int, num_envs: int) -> Optional[int]:
+    """Seed of an env's episode-th episode (None if unseeded)"""
+    if seed is None:
+        return None
+    return seed + env_index + episode * num_envs
+
+
+def compute_gae(
+    rewards: np.ndarray,
+    values: np.ndarray,
+    dones: np.ndarray,
+    last_values: np.ndarray,
+    gamma: float = 0.99,
+    lam: float = 0.95
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generalized advantage estimates and returns for a (T, N) rollout
+    
+    The recursion runs backwards over T with every step vectorized over
+    all N envs. dones[t] cuts the recursion: no value is bootstrapped
+    across an episode boundary (truncation is treated as termination).
+    With all-zero values this gives lambda-discounted returns.
+    
+    Returns:
+        (advantages, returns), both float32 (T, N)
+    """
+    rewards = np.asarray(rewards, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    not_done = 1.0 - np.asarray(dones, dtype=np.float32)
+    next_values = np.concatenate([values[1:], np.asarray(last_values, dtype=np.float32)[None]], axis=0)
+    
+    # One-step TD errors for the whole buffer at once
+    deltas = rewards + gamma * next_values * not_done - values
+    advantages = np.empty_like(deltas)
+    running = np.zeros(deltas.shape[1], dtype=np.float32)
+    for t in range(len(deltas) - 1, -1, -1):
+        running = deltas[t] + gamma * lam * not_done[t] * running
+        advantages[t] = running
+    return advantages, advantages + values
+
+
+class _EnvSlice:
+    """Envs owned by one worker, stepping against the shared buffers"""
+    
+    def __init__(self, config: Dict[str, Any], indices: Sequence[int], seed: Optional[int], num_envs: int, buffers: Dict[str, np.ndarray]):
+        self.indices = list(indices)
+        self.seed = seed
+        self.num_envs = num_envs
+        self.buffers = buffers
+        self.envs = [make_env(config) for _ in self.indices]
+        self.episodes = [0] * len(self.indices)
+        self.observations = [
+            env.reset(seed=episode_seed(seed, i, 0, num_envs))[0]
+            for env, i in zip(self.envs, self.indices)
+        ]
+    
+    def write_observations(self, t: int):
+        for observation, i in zip(self.observations, self.indices):
+            for field in OBSERVATION_FIELDS:
+                self.buffers[field][t, i] = observation[field]
+    
+    def step(self, t: int):
+        """Apply actions[t], write rewards[t], dones[t] and observations[t + 1]"""
+        sectors = self.buffers["action_sector"][t]
+        exposure_modes = self.buffers["action_exposure_mode"][t]
+        rewards = self.buffers["rewards"][t]
+        dones = self.buffers["dones"][t]
+        
+        for j, (env, i) in enumerate(zip(self.envs, self.indices)):
+            action = {"sector": int(sectors[i]), "exposure_mode": int(exposure_modes[i])}
+            observation, reward, terminated, truncated, _ = env.step(action)
+            done = terminated or truncated
+            if done:
+                self.episodes[j] += 1
+                observation, _ = env.reset(seed=episode_seed(self.seed, i, self.episodes[j], self.num_envs))
+            rewards[i] = reward
+            dones[i] = done
+            self.observations[j] = observation
+        self.write_observations(t + 1)
+
+
+def _attach(spec: Dict[str, Tuple[str, Tuple[int, ...], str]]):
+    segments = {field: shared_memory.SharedMemory(name=name) for field, (name, _, _) in spec.items()}
+    arrays = {
+        field: np.ndarray(shape, dtype=dtype, buffer=segments[field].buf)
+        for field, (_, shape, dtype) in spec.items()
+    }
+    return segments, arrays
+
+
+def _worker_main(conn, config, indices, seed, num_envs, spec):
+    segments, buffers = _attach(spec)
+    env_slice = None
+    try:
+        env_slice = _EnvSlice(config, indices, seed, num_envs, buffers)
+        conn.send(None)
+        while True:
+            command, t = conn.recv()
+            if command == "begin":
+                env_slice.write_observations(0)
+            elif command == "step":
+                env_slice.step(t)
+            else:
+                break
+            conn.send(None)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        # Views into the segments must be gone before they can be closed
+        env_slice = buffers = None
+        for segment in segments.values():
+            segment.close()
+
+
+class RolloutCollector:
+    """Collects (num_steps, num_envs) rollouts from env copies in worker processes"""
+    
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        num_envs: int,
+        num_steps: int,
+        num_workers: Optional[int] = None,
+        mode: str = "lockstep",
+        seed: Optional[int] = 0
+    ):
+        """
+        Args:
+            config: Merged config (see load_config); "environment" is used
+            num_envs: Env copies
+            num_steps: Steps per env per rollout
+            num_workers: Worker processes (default: min(CPU count,
+                         num_envs)); 0 steps every env in this process
+            mode: "lockstep" or "async"
+            seed: Base episode seed (None for unseeded episodes)
+        """
+        if mode not in ("lockstep", "async"):
+            raise ValueError(f"Unknown mode: {mode}")
+        if num_workers is None:
+            num_workers = min(multiprocessing.cpu_count(), num_envs)
+        num_workers = min(num_workers, num_envs)
+        
+        self.num_envs = num_envs
+        self.num_steps = num_steps
+        self.mode = mode
+        self.seed = seed
+        self.episodes = np.zeros(num_envs, dtype=np.int64)
+        self.total_frames = 0
+        self.total_seconds = 0.0
+        
+        # Running episode totals, carried across rollouts
+        self._episode_return = np.zeros(num_envs, dtype=np.float64)
+        self._episode_length = np.zeros(num_envs, dtype=np.int64)
+        
+        layout = buffer_layout(num_steps, num_envs, sky_sectors(config))
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self.buffers: Dict[str, np.ndarray] = {}
+        for field, (shape, dtype) in layout.items():
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            segment = shared_memory.SharedMemory(create=True, size=size)
+            self._segments[field] = segment
+            self.buffers[field] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        self.values = np.zeros((num_steps, num_envs), dtype=np.float32)
+        self.log_probs = np.zeros((num_steps, num_envs), dtype=np.float32)
+        self.last_values = np.zeros(num_envs, dtype=np.float32)
+        
+        self.slices = [list(s) for s in np.array_split(np.arange(num_envs), max(num_workers, 1))]
+        self._local = None
+        self._conns = []
+        self._processes = []
+        if num_workers == 0:
+            self._local = _EnvSlice(config, self.slices[0], seed, num_envs, self.buffers)
+        else:
+            spec = {field: (self._segments[field].name, shape, dtype) for field, (shape, dtype) in layout.items()}
+            for indices in self.slices:
+                parent_conn, child_conn = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=_worker_main,
+                    args=(child_conn, config, indices, seed, num_envs, spec),
+                    daemon=True
+                )
+                process.start()
+                child_conn.close()
+                self._conns.append(parent_conn)
+                self._processes.append(process)
+            for conn in self._conns:
+                conn.recv()  # Envs built and reset
+    
+    @property
+    def fps(self) -> float:
+        """Env frames per second over every rollout so far"""
+        return self.total_frames / self.total_seconds if self.total_seconds else 0.0
+    
+    def collect(self, policy) -> Dict[str, Any]:
+        """
+        Fill the buffers with one rollout
+        
+        The returned arrays are the shared buffers themselves and are
+        overwritten by the next collect.
+        
+        Returns:
+            Dict of (T, N) arrays (observation fields have T + 1 rows):
+            the buffer fields, values, log_probs, last_values (N,), and
+            "stats": frames, seconds, fps, episodes finished, and the mean
+            return and length of those episodes
+        """
+        start = time.perf_counter()
+        self._finished_returns: List[float] = []
+        self._finished_lengths: List[int] = []
+        self.values[:] = 0.0
+        self.log_probs[:] = 0.0
+        
+        if self._local is not None:
+            self._local.write_observations(0)
+            for t in range(self.num_steps):
+                self._act(policy, t, self.slices[0])
+                self._local.step(t)
+                self._after_step(policy, t, self.slices[0])
+        elif self.mode == "lockstep":
+            self._collect_lockstep(policy)
+        else:
+            self._collect_async(policy)
+        
+        all_envs = np.arange(self.num_envs)
+        if hasattr(policy, "value"):
+            self.last_values[:] = policy.value(self._observation(self.num_steps, all_envs), all_envs)
+        else:
+            self.last_values[:] = 0.0
+        
+        seconds = time.perf_counter() - start
+        frames = self.num_steps * self.num_envs
+        self.total_frames += frames
+        self.total_seconds += seconds
+        stats = {
+            "frames": frames,
+            "seconds": seconds,
+            "fps": frames / seconds if seconds else 0.0,
+            "episodes": len(self._finished_returns),
+            "mean_return": float(np.mean(self._finished_returns)) if self._finished_returns else float("nan"),
+            "mean_length": float(np.mean(self._finished_lengths)) if self._finished_lengths else float("nan")
+        }
+        return {
+            **self.buffers,
+            "values": self.values,
+            "log_probs": self.log_probs,
+            "last_values": self.last_values,
+            "stats": stats
+        }
+    
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._conns = []
+        self._processes = []
+        self._local = None
+        self.buffers = {}
+        for segment in self._segments.values():
+            try:
+                segment.close()
+            except BufferError:
+                pass  # A returned rollout still references it; freed with it
+            segment.unlink()
+        self._segments = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _collect_lockstep(self, policy):
+        all_envs = np.arange(self.num_envs)
+        self._broadcast(("begin", None))
+        for t in range(self.num_steps):
+            self._act(policy, t, all_envs)
+            self._broadcast(("step", t))
+            self._after_step(policy, t, all_envs)
+    
+    def _collect_async(self, policy):
+        for conn in self._conns:
+            conn.send(("begin", None))
+        next_step = {conn: 0 for conn in self._conns}
+        slices = dict(zip(self._conns, self.slices))
+        active = list(self._conns)
+        while active:
+            for conn in wait(active):
+                conn.recv()
+                t = next_step[conn]
+                indices = slices[conn]
+                if t > 0:
+                    self._after_step(policy, t - 1, indices)
+                if t == self.num_steps:
+                    active.remove(conn)
+                    continue
+                self._act(policy, t, indices)
+                conn.send(("step", t))
+                next_step[conn] = t + 1
+    
+    def _broadcast(self, message):
+        for conn in self._conns:
+            conn.send(message)
+        for conn in self._conns:
+            conn.recv()
+    
+    def _observation(self, t: int, indices) -> Dict[str, np.ndarray]:
+        return {field: self.buffers[field][t, indices] for field in OBSERVATION_FIELDS}
+    
+    def _act(self, policy, t: int, indices):
+        output = policy.act(self._observation(t, indices), indices)
+        self.buffers["action_sector"][t, indices] = output["sector"]
+        self.buffers["action_exposure_mode"][t, indices] = output["exposure_mode"]
+        if "value" in output:
+            self.values[t, indices] = output["value"]
+        if "log_prob" in output:
+            self.log_probs[t, indices] = output["log_prob"]
+    
+    def _after_step(self, policy, t: int, indices):
+        """Episode bookkeeping for the envs that just stepped"""
+        indices = np.asarray(indices)
+        self._episode_return[indices] += self.buffers["rewards"][t, indices]
+        self._episode_length[indices] += 1
+        
+        finished = indices[self.buffers["dones"][t, indices] == 1]
+        if not len(finished):
+            return
+        self._finished_returns.extend(self._episode_return[finished].tolist())
+        self._finished_lengths.extend(self._episode_length[finished].tolist())
+        self._episode_return[finished] = 0.0
+        self._episode_length[finished] = 0
+        self.episodes[finished] += 1
+        if hasattr(policy, "reset"):
+            seeds = [episode_seed(self.seed, i, self.episodes[i], self.num_envs) for i in finished]
+            policy.reset(indices=finished, seeds=seeds)
@@ -2,6 +2,7 @@
 
 from .logging import EpisodeLogger
 from .config import load_config
+from .result_cache import ResultCache
 
-__all__ = ["EpisodeLogger", "load_config"]
+__all__ = ["EpisodeLogger", "load_config", "ResultCache"]
 
@@ -0,0 +1,122 @@
+"""Benchmark harness: latency percentiles, throughput and baseline comparison"""
+
+import json
+import platform
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def latency_stats(durations_ns: List[int], items: int = 0) -> Dict[str, float]:
+    """
+    Summarize per-call durations
+    
+    Args:
+        durations_ns: One duration per call, in nanoseconds
+        items: Work items processed over all calls (e.g. env steps); defaults
+               to one per call
+    
+    Returns:
+        Dict with calls, total_s, ops_per_s and mean/p50/p90/p99/max in µs
+    """
+    samples = np.asarray(durations_ns, dtype=np.float64) / 1000.0
+    total_s = float(samples.sum()) / 1e6
+    items = items or len(samples)
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {
+        "calls": len(samples),
+        "total_s": total_s,
+        "ops_per_s": items / total_s if total_s > 0 else float("inf"),
+        "mean_us": float(samples.mean()),
+        "p50_us": float(p50),
+        "p90_us": float(p90),
+        "p99_us": float(p99),
+        "max_us": float(samples.max())
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None, warmup: int = 1) -> List[int]:
+    """
+    Time repeated calls of fn
+    
+    Args:
+        fn: Call to time
+        repeat: Timed calls
+        setup: Untimed call before each timed call
+        warmup: Untimed calls of setup + fn before timing starts
+    
+    Returns:
+        Per-call durations in nanoseconds
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    
+    durations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter_ns()
+        fn()
+        durations.append(time.perf_counter_ns() - start)
+    return durations
+
+
+def environment_info() -> Dict[str, str]:
+    """Machine and library versions recorded with each result file"""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine()
+    }
+
+
+def save_results(results: Dict[str, Dict[str, float]], path: str):
+    """Write results with environment info as JSON"""
+    with open(path, "w") as f:
+        json.dump({"environment": environment_info(), "results": results}, f, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, float]]:
+    """Read the results section of a saved result file"""
+    with open(Path(path), "r") as f:
+        return json.load(f)["results"]
+
+
+def compare_results(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = 0.10,
+    metric: str = "p50_us"
+) -> List[Dict[str, Any]]:
+    """
+    Compare current results against a baseline
+    
+    A case regresses when its metric (a latency, lower is better) grows by
+    more than tolerance relative to the baseline. Cases missing from either
+    side are skipped.
+    
+    Returns:
+        One entry per shared case with baseline, current, ratio and regressed
+    """
+    comparison = []
+    for name in sorted(set(current) & set(baseline)):
+        before = baseline[name].get(metric)
+        after = current[name].get(metric)
+        if not before or after is None:
+            continue
+        ratio = after / before
+        comparison.append({
+            "case": name,
+            "baseline": before,
+            "current": after,
+            "ratio": ratio,
+            "regressed": ratio > 1.0 + tolerance
+        })
+    return comparison
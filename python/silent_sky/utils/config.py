@@ -37,7 +37,12 @@ def get_default_config() -> Dict[str, Any]:
         "unity": {
             "enabled": False,
             "pub_port": 5555,
-            "rep_port": 5556
+            "rep_port": 5556,
+            "schema_version": 1,
+            "keyframe_interval": 100,
+            "publish_mode": "inline",
+            "target_fps": None,
+            "topics": None  # e.g. {"base_port": 5560, "sectors": {"rate": 10, "hwm": 10}}
         },
         "agent": {
             "type": "dummy",
@@ -46,6 +51,12 @@ def get_default_config() -> Dict[str, Any]:
         "logging": {
             "episode_dir": "data/episodes",
             "log_level": "INFO"
+        },
+        "cache": {
+            "enabled": False,  # Or pass --cache
+            "dir": "data/cache",
+            "max_size_mb": 1024,
+            "store_episodes": False  # Also keep full episode files
         }
     }
 
@@ -0,0 +1,304 @@
+"""Offline transition dataset: sharded, memory-mapped arrays built from saved episodes
+
+Layout of a dataset directory:
+    
+    manifest.json          shards, source episode files, num_sectors
+    shard_00000/
+        sensor_readings.npy     float32 (N, num_sectors)
+        sensor_confidence.npy   float32 (N, num_sectors)
+        time_remaining.npy      float32 (N, 1)
+        budget_remaining.npy    float32 (N, 1)
+        action_sector.npy       int32 (N,)
+        action_exposure_mode.npy int32 (N,)
+        rewards.npy             float32 (N,)
+        dones.npy               uint8 (N,)   1 on the last step of an episode
+        episode_starts.npy      int64 (E,)   first row of each episode
+    shard_00001/
+        ...
+
+Episodes never span shards. Appending writes new shards and rewrites the
+manifest, so readers see either the old or the new set of shards.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .episode_format import episode_to_columns
+from .logging import EPISODE_EXTENSIONS, EpisodeLogger
+
+
+MANIFEST_VERSION = 1
+
+OBSERVATION_FIELDS = ("sensor_readings", "sensor_confidence", "time_remaining", "budget_remaining")
+
+# Field name -> (episode column, dtype)
+FIELDS = {
+    "sensor_readings": ("observations/sensor_readings", "<f4"),
+    "sensor_confidence": ("observations/sensor_confidence", "<f4"),
+    "time_remaining": ("observations/time_remaining", "<f4"),
+    "budget_remaining": ("observations/budget_remaining", "<f4"),
+    "action_sector": ("actions/sector", "<i4"),
+    "action_exposure_mode": ("actions/exposure_mode", "<i4"),
+    "rewards": ("rewards", "<f4"),
+}
+
+
+def episode_transitions(episode_data: Dict) -> Dict[str, np.ndarray]:
+    """
+    Per-step arrays of one episode in dataset field layout
+    
+    Accepts the row layout of run_episode.py (JSON, pickle) as well as the
+    column layout of columnar and stream files.
+    """
+    columns, _ = episode_to_columns(episode_data)
+    transitions = {
+        field: np.asarray(columns[column], dtype=dtype)
+        for field, (column, dtype) in FIELDS.items()
+    }
+    for field in ("time_remaining", "budget_remaining"):
+        transitions[field] = transitions[field].reshape(len(transitions[field]), -1)
+    dones = np.zeros(len(transitions["rewards"]), dtype="u1")
+    if len(dones):
+        dones[-1] = 1
+    transitions["dones"] = dones
+    return transitions
+
+
+class DatasetBuilder:
+    """
+    Compacts saved episodes into dataset shards
+    
+    Reopening an existing dataset continues it: episode files already in
+    the manifest are skipped and new episodes go to new shards.
+    """
+    
+    def __init__(self, dataset_dir: Union[str, Path], shard_size: int = 1_000_000):
+        """
+        Args:
+            dataset_dir: Dataset directory (created if missing)
+            shard_size: Target transitions per shard; a shard is closed at the
+                        first episode boundary past this size
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self.dataset_dir.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.manifest = load_manifest(self.dataset_dir)
+        
+        self._episodes: List[Dict[str, np.ndarray]] = []
+        self._pending_sources: List[str] = []
+        self._buffered = 0
+    
+    def add_episode(self, episode_data: Dict, source: Optional[str] = None) -> int:
+        """
+        Add one episode
+        
+        Args:
+            episode_data: Episode as returned by EpisodeLogger.load_episode
+            source: Episode file name, recorded so later appends skip it
+        
+        Returns:
+            Number of transitions added
+        """
+        transitions = episode_transitions(episode_data)
+        steps = len(transitions["rewards"])
+        if steps == 0:
+            return 0
+        
+        num_sectors = transitions["sensor_readings"].shape[1]
+        if self.manifest["num_sectors"] is None:
+            self.manifest["num_sectors"] = num_sectors
+        elif self.manifest["num_sectors"] != num_sectors:
+            raise ValueError(
+                f"Episode has {num_sectors} sectors, dataset has {self.manifest['num_sectors']}"
+            )
+        
+        self._episodes.append(transitions)
+        if source is not None:
+            self._pending_sources.append(source)
+        self._buffered += steps
+        if self._buffered >= self.shard_size:
+            self._write_shard()
+        return steps
+    
+    def add_directory(self, episode_dir: Union[str, Path], formats: Sequence[str] = ("json", "pickle", "columnar", "stream")) -> int:
+        """
+        Add every finished, not yet ingested episode file in a directory
+        
+        Episodes without a final_state (e.g. streams still being written)
+        are left for a later append.
+        
+        Returns:
+            Number of episodes added
+        """
+        logger = EpisodeLogger(log_dir=str(episode_dir))
+        by_extension = {EPISODE_EXTENSIONS[fmt]: fmt for fmt in formats}
+        added = 0
+        for path in sorted(Path(episode_dir).iterdir()):
+            fmt = by_extension.get(path.suffix.lstrip("."))
+            if fmt is None or path.name in self.manifest["sources"]:
+                continue
+            episode_data = logger.load_episode(str(path), format=fmt)
+            if not episode_data.get("final_state"):
+                continue
+            if self.add_episode(episode_data, source=path.name):
+                added += 1
+        return added
+    
+    def close(self):
+        """Write the last partial shard and the manifest"""
+        if self._episodes:
+            self._write_shard()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+    
+    def _write_shard(self):
+        episodes, self._episodes = self._episodes, []
+        sources, self._pending_sources = self._pending_sources, []
+        self._buffered = 0
+        
+        name = f"shard_{len(self.manifest['shards']):05d}"
+        shard_dir = self.dataset_dir / name
+        shard_dir.mkdir(exist_ok=True)
+        for field in list(FIELDS) + ["dones"]:
+            np.save(shard_dir / f"{field}.npy", np.concatenate([e[field] for e in episodes]))
+        lengths = np.array([len(e["rewards"]) for e in episodes], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        np.save(shard_dir / "episode_starts.npy", starts)
+        
+        self.manifest["shards"].append({
+            "name": name,
+            "transitions": int(lengths.sum()),
+            "episodes": len(episodes)
+        })
+        for source in sources:
+            self.manifest["sources"][source] = name
+        save_manifest(self.dataset_dir, self.manifest)
+
+
+def load_manifest(dataset_dir: Union[str, Path]) -> Dict:
+    """Read a dataset manifest, or an empty one for a new dataset"""
+    path = Path(dataset_dir) / "manifest.json"
+    if not path.exists():
+        return {"version": MANIFEST_VERSION, "num_sectors": None, "shards": [], "sources": {}}
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported dataset version: {manifest.get('version')}")
+    return manifest
+
+
+def save_manifest(dataset_dir: Union[str, Path], manifest: Dict):
+    """Replace the manifest atomically"""
+    path = Path(dataset_dir) / "manifest.json"
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+class OfflineDataset:
+    """
+    Memory-mapped view of a dataset directory
+    
+    Batches are dicts of arrays keyed by field name, plus next_<observation>
+    fields (the following step's observation; the same observation on the
+    last step of an episode, where dones is 1).
+    """
+    
+    def __init__(self, dataset_dir: Union[str, Path]):
+        self.dataset_dir = Path(dataset_dir)
+        self.shards: List[Dict[str, np.ndarray]] = []
+        self.refresh()
+    
+    def refresh(self) -> int:
+        """
+        Pick up shards appended since the dataset was opened
+        
+        Returns:
+            Number of new shards
+        """
+        manifest = load_manifest(self.dataset_dir)
+        new_shards = manifest["shards"][len(self.shards):]
+        for shard in new_shards:
+            shard_dir = self.dataset_dir / shard["name"]
+            self.shards.append({
+                field: np.load(shard_dir / f"{field}.npy", mmap_mode="r")
+                for field in list(FIELDS) + ["dones", "episode_starts"]
+            })
+        self.manifest = manifest
+        return len(new_shards)
+    
+    def __len__(self) -> int:
+        return sum(len(shard["rewards"]) for shard in self.shards)
+    
+    @property
+    def num_episodes(self) -> int:
+        return sum(len(shard["episode_starts"]) for shard in self.shards)
+    
+    def shard_batch(self, shard_index: int, rows: np.ndarray, fields: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Gather rows of one shard into in-memory arrays"""
+        shard = self.shards[shard_index]
+        rows = np.sort(rows)  # Sequential reads from the mapped files
+        fields = list(fields) if fields is not None else list(FIELDS) + ["dones"]
+        batch = {field: np.asarray(shard[field][rows]) for field in fields}
+        
+        next_rows = np.where(shard["dones"][rows] == 1, rows, rows + 1)
+        for field in OBSERVATION_FIELDS:
+            if field in fields:
+                batch[f"next_{field}"] = np.asarray(shard[field][next_rows])
+        return batch
+    
+    def iter_minibatches(
+        self,
+        batch_size: int,
+        shuffle: bool = True,
+        seed: Optional[int] = None,
+        shards_per_group: int = 4,
+        drop_last: bool = False,
+        fields: Optional[Iterable[str]] = None
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield minibatches covering the dataset once
+        
+        Shuffling visits shards in random order, shards_per_group at a time,
+        and shuffles transitions within each group. Only one group's index
+        permutation and one batch are held in memory.
+        
+        Args:
+            batch_size: Transitions per batch
+            shuffle: Randomize order (otherwise shard order, row order)
+            seed: Seed for the shuffle
+            shards_per_group: Shards mixed together in each shuffle window
+            drop_last: Skip the final short batch of each group
+            fields: Fields to load (default: all)
+        """
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(len(self.shards)) if shuffle else np.arange(len(self.shards))
+        group_size = shards_per_group if shuffle else 1
+        
+        for start in range(0, len(order), group_size):
+            group = order[start:start + group_size]
+            sizes = np.array([len(self.shards[i]["rewards"]) for i in group], dtype=np.int64)
+            offsets = np.concatenate([[0], np.cumsum(sizes)])
+            total = int(offsets[-1])
+            permutation = rng.permutation(total) if shuffle else np.arange(total)
+            
+            for batch_start in range(0, total, batch_size):
+                indices = permutation[batch_start:batch_start + batch_size]
+                if drop_last and len(indices) < batch_size:
+                    break
+                owner = np.searchsorted(offsets, indices, side="right") - 1
+                parts = [
+                    self.shard_batch(int(group[g]), indices[owner == g] - offsets[g], fields)
+                    for g in np.unique(owner)
+                ]
+                yield {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
@@ -0,0 +1,261 @@
+"""Columnar binary episode format
+
+A columnar block is a small JSON header followed by raw little-endian
+arrays, each aligned to 64 bytes so it can be memory-mapped and viewed
+without copying:
+    
+    magic "SSEP" | u16 version | u16 flags | u32 header_len
+    header JSON (metadata + column table), padded to 64 bytes
+    column data, each column padded to 64 bytes
+
+Per-step lists of dicts (actions, observations, info) are stored as one
+column per field ("actions/sector", "observations/sensor_readings", ...).
+Everything that is not per-step data (seed, config, final_state) goes into
+the header metadata.
+"""
+
+import json
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+
+MAGIC = b"SSEP"
+VERSION = 1
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct("<4sHHI")
+
+# Fixed dtypes for the known per-step fields; anything else is inferred
+COLUMN_DTYPES = {
+    "timesteps": "<i4",
+    "actions": "<i4",
+    "observations": "<f4",
+    "rewards": "<f8",
+}
+
+
+def _align(n: int) -> int:
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _infer_dtype(array: np.ndarray) -> str:
+    """Pick a fixed little-endian dtype for a column of unknown origin"""
+    if array.dtype.kind == "b":
+        return "|b1"
+    if array.dtype.kind in "iu":
+        return "<i8"
+    if array.dtype.kind == "f":
+        return "<f8"
+    raise TypeError(f"Cannot store dtype {array.dtype} as a column")
+
+
+def _to_column(key: str, values: Any) -> np.ndarray:
+    array = np.asarray(values)
+    dtype = COLUMN_DTYPES.get(key) or _infer_dtype(array)
+    return np.ascontiguousarray(array, dtype=np.dtype(dtype))
+
+
+def _json_default(obj: Any) -> Any:
+    """json.dumps fallback for NumPy values left in the metadata"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _is_step_list(values: Any) -> bool:
+    return isinstance(values, (list, tuple)) and len(values) > 0
+
+
+def episode_to_columns(episode_data: Dict) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Split episode data into fixed-dtype columns and JSON metadata
+    
+    Accepts both the row layout built by run_episode.py (lists of per-step
+    values/dicts) and the column layout returned by read_columnar.
+    columns_to_rows goes the other way.
+    
+    Returns:
+        (columns, metadata) where column names use "/" for nested fields
+    """
+    columns: Dict[str, np.ndarray] = {}
+    metadata: Dict = {}
+    
+    for key, values in episode_data.items():
+        if isinstance(values, np.ndarray):
+            columns[key] = _to_column(key, values)
+        elif isinstance(values, dict) and values and all(
+            isinstance(v, np.ndarray) for v in values.values()
+        ):
+            for field, array in values.items():
+                columns[f"{key}/{field}"] = _to_column(key, array)
+        elif _is_step_list(values) and all(isinstance(v, dict) for v in values):
+            fields = list(values[0].keys())
+            try:
+                if any(list(v.keys()) != fields for v in values):
+                    raise TypeError("per-step dicts have differing keys")
+                step_columns = {
+                    f"{key}/{field}": _to_column(key, [v[field] for v in values])
+                    for field in fields
+                }
+            except (TypeError, ValueError):
+                # Ragged or non-numeric per-step dicts stay in the header
+                metadata[key] = values
+            else:
+                columns.update(step_columns)
+        elif _is_step_list(values) and all(
+            isinstance(v, (int, float, np.integer, np.floating)) for v in values
+        ):
+            columns[key] = _to_column(key, values)
+        else:
+            metadata[key] = values
+    
+    return columns, metadata
+
+
+def pack_columns(columns: Dict[str, np.ndarray], metadata: Optional[Dict] = None) -> bytes:
+    """Encode columns and metadata as a single columnar block"""
+    table = []
+    offset = 0
+    for name, array in columns.items():
+        table.append({
+            "name": name,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset
+        })
+        offset = _align(offset + array.nbytes)
+    
+    header = json.dumps(
+        {"metadata": metadata or {}, "columns": table, "data_len": offset},
+        separators=(",", ":"),
+        default=_json_default
+    ).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header))
+    
+    block = bytearray(data_start + offset)
+    _PREAMBLE.pack_into(block, 0, MAGIC, VERSION, 0, len(header))
+    block[_PREAMBLE.size:_PREAMBLE.size + len(header)] = header
+    for entry, array in zip(table, columns.values()):
+        start = data_start + entry["offset"]
+        block[start:start + array.nbytes] = array.tobytes()
+    return bytes(block)
+
+
+def read_block_header(buffer: Union[bytes, memoryview, np.ndarray], offset: int = 0) -> Tuple[Dict, int, int]:
+    """
+    Parse the header of the block starting at offset
+    
+    Returns:
+        (header, data_start, block_end) as absolute offsets into buffer
+    
+    Raises:
+        ValueError: if the buffer does not hold a complete block header
+    """
+    view = memoryview(buffer).cast("B")
+    if len(view) < offset + _PREAMBLE.size:
+        raise ValueError("Truncated columnar block")
+    magic, version, _flags, header_len = _PREAMBLE.unpack_from(view, offset)
+    if magic != MAGIC:
+        raise ValueError("Not a columnar episode block")
+    if version > VERSION:
+        raise ValueError(f"Unsupported columnar block version: {version}")
+    
+    header_start = offset + _PREAMBLE.size
+    if len(view) < header_start + header_len:
+        raise ValueError("Truncated columnar block")
+    header = json.loads(bytes(view[header_start:header_start + header_len]))
+    data_start = offset + _align(_PREAMBLE.size + header_len)
+    return header, data_start, data_start + header["data_len"]
+
+
+def unpack_columns(buffer: Union[bytes, np.ndarray], offset: int = 0) -> Tuple[Dict[str, np.ndarray], Dict, int]:
+    """
+    Decode the block starting at offset into array views over buffer
+    
+    Returns:
+        (columns, metadata, block_end)
+    """
+    header, data_start, block_end = read_block_header(buffer, offset)
+    if len(memoryview(buffer).cast("B")) < block_end:
+        raise ValueError("Truncated columnar block")
+    
+    columns = {}
+    for entry in header["columns"]:
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        count = int(np.prod(shape, dtype=np.int64))
+        columns[entry["name"]] = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + entry["offset"]
+        ).reshape(shape)
+    return columns, header["metadata"], block_end
+
+
+def nest_columns(columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Turn "actions/sector" style column names back into nested dicts"""
+    nested: Dict[str, Any] = {}
+    for name, array in columns.items():
+        key, _, field = name.partition("/")
+        if field:
+            nested.setdefault(key, {})[field] = array
+        else:
+            nested[key] = array
+    return nested
+
+
+def columns_to_rows(episode: Dict) -> Dict:
+    """
+    Rebuild the row layout of run_episode.py from the column layout
+    
+    Arrays become lists of per-step values and dicts of arrays become lists
+    of per-step dicts; metadata is passed through unchanged.
+    """
+    rows: Dict = {}
+    for key, values in episode.items():
+        if isinstance(values, np.ndarray):
+            rows[key] = values.tolist()
+        elif isinstance(values, dict) and values and all(
+            isinstance(v, np.ndarray) for v in values.values()
+        ):
+            fields = {field: array.tolist() for field, array in values.items()}
+            rows[key] = [dict(zip(fields, step)) for step in zip(*fields.values())]
+        else:
+            rows[key] = values
+    return rows
+
+
+def write_columnar(path: Union[str, Path], episode_data: Dict):
+    """Write episode data as a single columnar block"""
+    columns, metadata = episode_to_columns(episode_data)
+    with open(path, "wb") as f:
+        f.write(pack_columns(columns, metadata))
+
+
+def read_columnar(path: Union[str, Path], mmap: bool = True) -> Dict:
+    """
+    Read a columnar episode file
+    
+    Args:
+        path: File written by write_columnar
+        mmap: Memory-map the file and return read-only views into it
+              instead of reading it into memory
+    
+    Returns:
+        Dict with the header metadata (seed, config, final_state, ...) and
+        per-step data as arrays, e.g. episode["observations"]["sensor_readings"]
+        with shape (steps, num_sectors)
+    """
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        buffer = Path(path).read_bytes()
+    
+    columns, metadata, _ = unpack_columns(buffer)
+    episode = dict(metadata)
+    episode.update(nest_columns(columns))
+    return episode
+
@@ -0,0 +1,201 @@
+"""Streaming, append-only episode files
+
+A stream file is a sequence of columnar blocks (see episode_format):
+    
+    header block   metadata {"stream": "header", seed, config, ...}
+    chunk blocks   per-step columns for up to chunk_size steps
+    trailer block  metadata {"stream": "trailer", "final_state": ...}
+
+Blocks are only ever appended, so a reader can tail the file while the
+episode is running and stop at the first incomplete block.
+"""
+
+import queue
+import time
+from pathlib import Path
+from threading import Thread
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .episode_format import episode_to_columns, nest_columns, pack_columns, unpack_columns
+
+
+STEP_FIELDS = ("timesteps", "actions", "observations", "rewards", "info")
+
+
+class EpisodeStreamWriter:
+    """
+    Appends episode steps to disk in fixed-size chunks
+    
+    append_step only buffers the step; full chunks are encoded and written
+    by a background thread so the step loop never waits on disk. At most
+    max_pending_chunks chunks are held in memory before append_step blocks.
+    """
+    
+    def __init__(
+        self,
+        path: Union[str, Path],
+        metadata: Optional[Dict] = None,
+        chunk_size: int = 64,
+        max_pending_chunks: int = 8
+    ):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.steps_written = 0
+        self.closed = False
+        
+        self._rows: List[Tuple] = []
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending_chunks)
+        self._error: Optional[BaseException] = None
+        
+        self._file = open(self.path, "wb")
+        header = dict(metadata or {})
+        header["stream"] = "header"
+        header["chunk_size"] = chunk_size
+        self._file.write(pack_columns({}, header))
+        self._file.flush()
+        
+        self._thread = Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+    
+    def append_step(self, timestep: int, action: Dict, observation: Dict, reward: float, info: Dict):
+        """Buffer one step; hands a full chunk to the writer thread"""
+        self._raise_writer_error()
+        observation = {k: np.array(v) for k, v in observation.items()}
+        self._rows.append((timestep, dict(action), observation, float(reward), dict(info)))
+        if len(self._rows) >= self.chunk_size:
+            self._submit_chunk()
+    
+    def close(self, final_state: Optional[Dict] = None):
+        """Flush remaining steps, write the trailer and wait for the writer thread"""
+        if self.closed:
+            return
+        self.closed = True
+        if self._rows:
+            self._submit_chunk()
+        trailer = {"stream": "trailer", "steps": self.steps_written, "final_state": final_state}
+        self._queue.put(("trailer", trailer))
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._raise_writer_error()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _submit_chunk(self):
+        rows, self._rows = self._rows, []
+        first_step = self.steps_written
+        self.steps_written += len(rows)
+        self._queue.put(("chunk", (first_step, rows)))
+    
+    def _write_loop(self):
+        """Encode and write queued chunks (runs in thread)"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                kind, payload = item
+                if kind == "chunk":
+                    block = self._encode_chunk(*payload)
+                else:
+                    block = pack_columns({}, payload)
+                self._file.write(block)
+                self._file.flush()
+            except BaseException as e:
+                self._error = e
+    
+    @staticmethod
+    def _encode_chunk(first_step: int, rows: List[Tuple]) -> bytes:
+        episode_data = {field: [row[i] for row in rows] for i, field in enumerate(STEP_FIELDS)}
+        columns, metadata = episode_to_columns(episode_data)
+        metadata["stream"] = "chunk"
+        metadata["first_step"] = first_step
+        return pack_columns(columns, metadata)
+    
+    def _raise_writer_error(self):
+        if self._error is not None:
+            raise IOError(f"Episode stream writer failed: {self._error}") from self._error
+
+
+def iter_stream_blocks(
+    path: Union[str, Path],
+    follow: bool = False,
+    poll_interval: float = 0.2,
+    timeout: Optional[float] = None
+) -> Iterator[Tuple[Dict, Dict[str, np.ndarray]]]:
+    """
+    Yield (metadata, columns) for each complete block in a stream file
+    
+    Args:
+        path: Stream file, possibly still being written
+        follow: Keep waiting for new blocks until the trailer arrives
+        poll_interval: Seconds between checks for new data when following
+        timeout: Give up following after this many seconds without new data
+    """
+    offset = 0
+    last_data = time.monotonic()
+    with open(path, "rb") as f:
+        while True:
+            f.seek(offset)
+            buffer = f.read()
+            position = 0
+            while position < len(buffer):
+                try:
+                    columns, metadata, end = unpack_columns(buffer, position)
+                except ValueError as e:
+                    if "Truncated" not in str(e):
+                        raise
+                    break
+                yield metadata, columns
+                if metadata.get("stream") == "trailer":
+                    return
+                position = end
+            
+            if position:
+                offset += position
+                last_data = time.monotonic()
+            if not follow:
+                return
+            if timeout is not None and time.monotonic() - last_data > timeout:
+                return
+            time.sleep(poll_interval)
+
+
+def read_stream(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read a complete or partial stream file into the columnar episode layout
+    
+    Returns:
+        Same layout as episode_format.read_columnar. Step fields that could
+        not be stored as columns (e.g. nested info dicts) are lists of
+        per-step values. "final_state" is only present once the trailer has
+        been written.
+    """
+    episode: Dict[str, Any] = {}
+    chunks: Dict[str, List[np.ndarray]] = {}
+    for metadata, columns in iter_stream_blocks(path):
+        kind = metadata.get("stream")
+        if kind == "header":
+            episode.update({k: v for k, v in metadata.items() if k not in ("stream", "chunk_size")})
+        elif kind == "trailer":
+            episode["final_state"] = metadata.get("final_state")
+        else:
+            for name, array in columns.items():
+                chunks.setdefault(name, []).append(array)
+            # The chunk's metadata holds the step fields that were not columns
+            for field in STEP_FIELDS:
+                if field in metadata:
+                    episode.setdefault(field, []).extend(metadata[field])
+    
+    episode.update(nest_columns({
+        name: np.concatenate(arrays) for name, arrays in chunks.items()
+    }))
+    return episode
@@ -0,0 +1,13 @@
+"""Helpers for code that reads the env's event lists from outside the env"""
+
+
+def event_in_play(event) -> bool:
+    """
+    Whether the env may still change an event
+    
+    An event is settled once it has been discovered or its value has
+    decayed to zero; the env neither discovers nor updates it after that.
+    The bridge encoder, EventArchive and snapshot_env only track events in
+    play, so their cost follows the active events, not the episode length.
+    """
+    return not event.discovered and event.value > 0
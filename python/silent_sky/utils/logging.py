@@ -7,6 +7,17 @@ from typing import Dict, List, Optional
 from datetime import datetime
 
 from ..env.state import EnvironmentState
+from .episode_format import columns_to_rows, read_columnar, write_columnar
+from .episode_stream import STEP_FIELDS, EpisodeStreamWriter, read_stream
+
+
+# File extension used for each episode format
+EPISODE_EXTENSIONS = {
+    "json": "json",
+    "pickle": "pickle",
+    "columnar": "ssep",
+    "stream": "sseps",
+}
 
 
 class EpisodeLogger:
@@ -16,6 +27,21 @@ class EpisodeLogger:
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
     
+    def episode_path(self, format: str = "json", filename: Optional[str] = None) -> Path:
+        """
+        Path an episode is saved to
+        
+        Args:
+            format: "json", "pickle", "columnar" or "stream"
+            filename: Optional custom filename (default: episode_<timestamp>)
+        """
+        if format not in EPISODE_EXTENSIONS:
+            raise ValueError(f"Unknown format: {format}")
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"episode_{timestamp}"
+        return self.log_dir / f"{filename}.{EPISODE_EXTENSIONS[format]}"
+    
     def save_episode(
         self,
         episode_data: Dict,
@@ -27,17 +53,13 @@ class EpisodeLogger:
         
         Args:
             episode_data: Dict containing full episode state, actions, observations, rewards
-            format: "json" or "pickle"
+            format: "json", "pickle", "columnar" or "stream"
             filename: Optional custom filename
         
         Returns:
             Path to saved file
         """
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"episode_{timestamp}"
-        
-        filepath = self.log_dir / f"{filename}.{format}"
+        filepath = self.episode_path(format, filename)
         
         if format == "json":
             # Convert numpy arrays to lists for JSON
@@ -47,13 +69,33 @@ class EpisodeLogger:
         elif format == "pickle":
             with open(filepath, 'wb') as f:
                 pickle.dump(episode_data, f)
-        else:
-            raise ValueError(f"Unknown format: {format}")
+        elif format == "columnar":
+            write_columnar(filepath, episode_data)
+        elif format == "stream":
+            metadata = {k: v for k, v in episode_data.items() if k not in STEP_FIELDS and k != "final_state"}
+            writer = EpisodeStreamWriter(filepath, metadata=self._to_json_serializable(metadata))
+            for step in zip(*(episode_data[field] for field in STEP_FIELDS)):
+                writer.append_step(*step)
+            writer.close(final_state=episode_data.get("final_state"))
         
         return str(filepath)
     
-    def load_episode(self, filepath: str, format: str = "json") -> Dict:
-        """Load episode data"""
+    def load_episode(self, filepath: str, format: str = "json", mmap: bool = True) -> Dict:
+        """
+        Load episode data
+        
+        Args:
+            filepath: Path to episode file
+            format: "json", "pickle", "columnar" or "stream"
+            mmap: For "columnar", memory-map the file and return array views
+                  into it instead of reading it into memory
+        
+        Returns:
+            Episode data dict. JSON and pickle return the layout they were
+            saved with; columnar and stream return per-step data as arrays,
+            e.g. episode["actions"]["sector"] and episode["rewards"]. A stream
+            that is still being written loads up to its last complete chunk.
+        """
         path = Path(filepath)
         
         if format == "json":
@@ -62,9 +104,77 @@ class EpisodeLogger:
         elif format == "pickle":
             with open(path, 'rb') as f:
                 return pickle.load(f)
+        elif format == "columnar":
+            return read_columnar(path, mmap=mmap)
+        elif format == "stream":
+            return read_stream(path)
         else:
             raise ValueError(f"Unknown format: {format}")
     
+    def open_stream(
+        self,
+        metadata: Optional[Dict] = None,
+        filename: Optional[str] = None,
+        chunk_size: int = 64
+    ) -> EpisodeStreamWriter:
+        """
+        Open an append-only episode stream
+        
+        Steps are written in chunks of chunk_size by a background thread as
+        the episode runs; call close(final_state=...) to write the trailer.
+        
+        Args:
+            metadata: Episode-level data such as seed and config
+            filename: Optional custom filename
+            chunk_size: Steps per chunk on disk
+        
+        Returns:
+            Open EpisodeStreamWriter; its path attribute is the file path
+        """
+        filepath = self.episode_path("stream", filename)
+        return EpisodeStreamWriter(
+            filepath,
+            metadata=self._to_json_serializable(metadata or {}),
+            chunk_size=chunk_size
+        )
+    
+    def convert_episode(
+        self,
+        filepath: str,
+        src_format: str = "json",
+        dst_format: str = "columnar",
+        force: bool = False
+    ) -> str:
+        """
+        Convert a saved episode to another format
+        
+        The converted file is written next to the source with the extension
+        of the target format. Converting to JSON or pickle rebuilds the
+        row-per-step layout those formats are saved with.
+        
+        Args:
+            filepath: Path to episode file
+            src_format: Format of the episode file
+            dst_format: "json", "pickle", "columnar" or "stream"
+            force: Overwrite the target if it already exists
+        
+        Returns:
+            Path to converted file
+        
+        Raises:
+            FileExistsError: if the target exists and force is False
+        """
+        path = Path(filepath)
+        converter = EpisodeLogger(log_dir=str(path.parent))
+        target = converter.episode_path(dst_format, path.stem)
+        if target.exists() and not force:
+            raise FileExistsError(f"{target} already exists (use force to overwrite)")
+        
+        episode_data = self.load_episode(str(path), format=src_format, mmap=False)
+        if dst_format in ("json", "pickle"):
+            episode_data = columns_to_rows(episode_data)
+        return converter.save_episode(episode_data, format=dst_format, filename=path.stem)
+    
     def _to_json_serializable(self, obj):
         """Convert numpy arrays and other types to JSON-serializable"""
         import numpy as np
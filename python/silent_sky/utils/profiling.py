@@ -0,0 +1,291 @@
+"""Named timing spans, latency histograms and per-step profiler hooks"""
+
+import cProfile
+import json
+import math
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+# Log-spaced histogram buckets: BUCKETS_PER_OCTAVE per doubling of duration
+# (~19% wide), covering 1 ns up to 2**40 ns (~18 minutes)
+BUCKETS_PER_OCTAVE = 4
+NUM_BUCKETS = 40 * BUCKETS_PER_OCTAVE
+
+
+class Histogram:
+    """Fixed-size log-bucket histogram of durations in nanoseconds"""
+    
+    __slots__ = ("counts", "count", "total_ns", "min_ns", "max_ns")
+    
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+    
+    def add(self, duration_ns: int):
+        """Record one duration"""
+        bucket = int(math.log2(duration_ns) * BUCKETS_PER_OCTAVE) if duration_ns > 1 else 0
+        self.counts[min(bucket, NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+    
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in nanoseconds, from bucket midpoints"""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                value = 2.0 ** ((bucket + 0.5) / BUCKETS_PER_OCTAVE)
+                return min(max(value, self.min_ns), self.max_ns)
+        return float(self.max_ns)
+    
+    def summary(self) -> Dict[str, float]:
+        """count, total_ms and mean/p50/p99/max in µs"""
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.count / 1000.0 if self.count else 0.0,
+            "p50_us": self.percentile(50) / 1000.0,
+            "p99_us": self.percentile(99) / 1000.0,
+            "max_us": self.max_ns / 1000.0
+        }
+
+
+class _Span:
+    """Context manager recording its wall time into a profiler histogram"""
+    
+    __slots__ = ("histogram", "start")
+    
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.start = 0
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.add(time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullSpan:
+    """Shared no-op span returned while profiling is disabled"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class StepHook:
+    """Base class for hooks run around selected steps of the episode loop"""
+    
+    def on_step_start(self, step: int):
+        pass
+    
+    def on_step_end(self, step: int):
+        pass
+    
+    def close(self, output_prefix: str):
+        """Called once at episode end; writes output files to output_prefix + suffix"""
+        pass
+
+
+class Profiler:
+    """
+    Named timing spans around phases of the step loop
+    
+    Usage:
+        profiler = Profiler(enabled=True)
+        with profiler.span("env.step"):
+            env.step(action)
+    
+    When disabled, span() returns a shared no-op context manager and
+    begin_step/end_step return immediately, so instrumented code can stay
+    in place at almost no cost.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+        self.hooks: List[StepHook] = []
+    
+    def span(self, name: str):
+        """Context manager timing the enclosed block under name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return _Span(histogram)
+    
+    def record(self, name: str, duration_ns: int):
+        """Record a duration measured elsewhere"""
+        if self.enabled:
+            self.histograms.setdefault(name, Histogram()).add(duration_ns)
+    
+    def add_hook(self, hook: StepHook):
+        """Run hook around every step (the hook picks which steps it acts on)"""
+        self.hooks.append(hook)
+    
+    def begin_step(self, step: int):
+        if self.enabled:
+            for hook in self.hooks:
+                hook.on_step_start(step)
+    
+    def end_step(self, step: int):
+        if self.enabled:
+            for hook in self.hooks:
+                hook.on_step_end(step)
+    
+    def close(self, output_prefix: str):
+        """Close all hooks, writing their output next to output_prefix"""
+        for hook in self.hooks:
+            hook.close(output_prefix)
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-span histogram summaries, in first-seen order"""
+        return {name: histogram.summary() for name, histogram in self.histograms.items()}
+    
+    def print_summary(self):
+        print(f"{'span':<24} {'count':>8} {'total ms':>10} {'mean µs':>10} {'p50 µs':>10} {'p99 µs':>10}")
+        for name, stats in self.summary().items():
+            print(f"{name:<24} {stats['count']:>8} {stats['total_ms']:>10.1f} "
+                  f"{stats['mean_us']:>10.1f} {stats['p50_us']:>10.1f} {stats['p99_us']:>10.1f}")
+    
+    def save(self, path: str):
+        """Write the summary as JSON"""
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+def instrument(obj: Any, method: str, profiler: Profiler, name: Optional[str] = None):
+    """
+    Wrap obj.method (on this instance only) in a profiler span
+    
+    Lets callers time code they cannot edit, e.g.
+    instrument(env.reward_calculator, "calculate_money", profiler).
+    """
+    if not profiler.enabled:
+        return
+    original = getattr(obj, method)
+    name = name or f"{type(obj).__name__}.{method}"
+    
+    def wrapper(*args, **kwargs):
+        with profiler.span(name):
+            return original(*args, **kwargs)
+    
+    setattr(obj, method, wrapper)
+
+
+def parse_steps(spec: str) -> Callable[[int], bool]:
+    """
+    Step selector from a spec string
+    
+    "100:110" selects steps 100-109, "every:50" every 50th step and
+    "5,17,42" the listed steps.
+    """
+    if spec.startswith("every:"):
+        period = int(spec.split(":", 1)[1])
+        return lambda step: step % period == 0
+    if ":" in spec:
+        start, stop = (int(x) for x in spec.split(":", 1))
+        return lambda step: start <= step < stop
+    steps = {int(x) for x in spec.split(",")}
+    return lambda step: step in steps
+
+
+class CProfileHook(StepHook):
+    """Deterministic cProfile of the selected steps, dumped as <prefix>.prof (pstats)"""
+    
+    def __init__(self, select: Callable[[int], bool]):
+        self.select = select
+        self.profile = cProfile.Profile()
+        self.active = False
+    
+    def on_step_start(self, step: int):
+        if self.select(step):
+            self.profile.enable()
+            self.active = True
+    
+    def on_step_end(self, step: int):
+        if self.active:
+            self.profile.disable()
+            self.active = False
+    
+    def close(self, output_prefix: str):
+        self.profile.dump_stats(f"{output_prefix}.prof")
+
+
+class StackSamplerHook(StepHook):
+    """
+    Sampling profiler for the selected steps
+    
+    A background thread samples the stepping thread's stack every interval
+    seconds while a selected step runs. Samples are written as collapsed
+    stacks ("frame;frame;frame count") to <prefix>.stacks.txt, the input
+    format of flamegraph tools.
+    """
+    
+    def __init__(self, select: Callable[[int], bool], interval: float = 0.001):
+        self.select = select
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.target_thread = threading.get_ident()
+        self.sampling = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self.thread.start()
+    
+    def on_step_start(self, step: int):
+        if self.select(step):
+            self.sampling.set()
+    
+    def on_step_end(self, step: int):
+        self.sampling.clear()
+    
+    def close(self, output_prefix: str):
+        self.running = False
+        self.sampling.set()
+        self.thread.join(timeout=1.0)
+        with open(f"{output_prefix}.stacks.txt", "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+    
+    def _sample_loop(self):
+        while self.running:
+            self.sampling.wait()
+            if not self.running:
+                return
+            frame = sys._current_frames().get(self.target_thread)
+            if frame is not None:
+                self.samples[";".join(reversed(list(_frame_names(frame))))] += 1
+            time.sleep(self.interval)
+
+
+def _frame_names(frame) -> Iterable[str]:
+    while frame is not None:
+        code = frame.f_code
+        yield f"{code.co_name} ({Path(code.co_filename).name})"
+        frame = frame.f_back
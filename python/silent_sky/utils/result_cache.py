@@ -0,0 +1,348 @@
+"""Content-addressed cache of episode results
+
+An episode is identified by everything that decides its outcome: the
+merged config (see load_config), the seed, the agent strategy, any
+upgrades bought at the start, and a fingerprint of the silent_sky source.
+The sha256 of those is the entry key, so a changed config, seed or code
+path simply misses instead of returning a stale result.
+
+Entries live in a local directory:
+    
+    <cache_dir>/<key[:2]>/<key>.json            summary and metadata
+    <cache_dir>/<key[:2]>/<key>-episode.<ext>   full episode file (optional)
+
+Hits refresh the entry's modification time. Once the cache grows past
+max_bytes, the least recently used entries are evicted until it is back
+under EVICT_TO of the limit, so eviction scans stay rare.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+
+# Config sections that cannot change an episode's outcome
+IGNORED_SECTIONS = ("unity", "logging", "cache")
+
+DEFAULT_CACHE_DIR = "data/cache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+EVICT_TO = 0.9
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+
+@lru_cache(maxsize=None)
+def source_fingerprint(package_dir: Union[str, Path] = PACKAGE_DIR) -> str:
+    """sha256 of every .py file under package_dir (paths and contents)"""
+    package_dir = Path(package_dir)
+    digest = hashlib.sha256()
+    for path in sorted(package_dir.rglob("*.py")):
+        digest.update(path.relative_to(package_dir).as_posix().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _json_default(value):
+    # numpy scalars in summaries
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def result_key(
+    config: Dict[str, Any],
+    seed: Optional[int],
+    strategy: Optional[str],
+    upgrades: Sequence[str] = (),
+    fingerprint: Optional[str] = None
+) -> str:
+    """
+    Cache key of one episode
+    
+    The seed and strategy given here replace environment.seed and
+    agent.dummy_strategy, so sweeps (which pass them per job) and single
+    runs (which set them in the config) share entries.
+    """
+    relevant = {k: v for k, v in config.items() if k not in IGNORED_SECTIONS}
+    relevant["environment"] = dict(relevant.get("environment", {}), seed=seed)
+    relevant["agent"] = dict(relevant.get("agent", {}), dummy_strategy=strategy)
+    payload = {
+        "config": relevant,
+        "upgrades": list(upgrades),
+        "source": fingerprint or source_fingerprint()
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=_json_default).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk episode results with size-based LRU eviction
+    
+    Usage:
+        cache = ResultCache.from_config(config)
+        key = cache.key(config, seed, "greedy")
+        entry = cache.get(key, required=SUMMARY_FIELDS)
+        if entry is None:
+            summary = play_episode(env, agent, seed)
+            cache.put(key, summary, seed=seed, strategy="greedy")
+    """
+    
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR, max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: Cache directory (created on first write)
+            max_bytes: Size limit enforced after each write (None: unlimited)
+        """
+        self.root = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.fingerprint = source_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None  # Scanned on the first write
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ResultCache":
+        """Cache configured by the "cache" config section"""
+        cache_config = config.get("cache") or {}
+        max_size_mb = cache_config.get("max_size_mb", DEFAULT_MAX_BYTES // (1024 * 1024))
+        return cls(
+            cache_config.get("dir", DEFAULT_CACHE_DIR),
+            max_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None
+        )
+    
+    def key(self, config: Dict[str, Any], seed: int, strategy: str, upgrades: Sequence[str] = ()) -> str:
+        return result_key(config, seed, strategy, upgrades, fingerprint=self.fingerprint)
+    
+    def get(self, key: str, required: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Cached entry, or None
+        
+        Args:
+            key: Entry key
+            required: Summary fields the caller needs; an entry missing any
+                      of them is treated as a miss
+        
+        Returns:
+            Dict with key, seed, strategy, upgrades, summary, created,
+            fingerprint and episode_file (file name next to the entry, or None)
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        summary = entry.get("summary") or {}
+        if any(field not in summary for field in required):
+            self.misses += 1
+            return None
+        
+        if entry.get("episode_file") and not (path.parent / entry["episode_file"]).exists():
+            entry["episode_file"] = None
+        try:
+            os.utime(path)  # Most recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+    
+    def put(
+        self,
+        key: str,
+        summary: Dict[str, Any],
+        seed: Optional[int] = None,
+        strategy: Optional[str] = None,
+        upgrades: Sequence[str] = (),
+        episode_path: Optional[Union[str, Path]] = None
+    ) -> Dict[str, Any]:
+        """
+        Store an episode result, copying episode_path into the cache if given
+        
+        Returns:
+            The stored entry
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size_before = self._entry_size(path)
+        
+        previous = self._read_entry(path)
+        episode_file = previous.get("episode_file") if previous else None  # Kept unless replaced
+        if episode_path is not None:
+            episode_path = Path(episode_path)
+            if episode_file and episode_file != f"{key}-episode{episode_path.suffix}":
+                (path.parent / episode_file).unlink(missing_ok=True)
+            episode_file = f"{key}-episode{episode_path.suffix}"
+            tmp_path = path.parent / f"{episode_file}.tmp"
+            shutil.copyfile(episode_path, tmp_path)
+            os.replace(tmp_path, path.parent / episode_file)
+        
+        entry = {
+            "key": key,
+            "seed": seed,
+            "strategy": strategy,
+            "upgrades": list(upgrades),
+            "summary": summary,
+            "created": time.time(),
+            "fingerprint": self.fingerprint,
+            "episode_file": episode_file
+        }
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f, default=_json_default)
+        os.replace(tmp_path, path)
+        
+        if self._size is not None:
+            self._size += self._entry_size(path) - size_before
+        if self.max_bytes is not None:
+            self._evict(self.max_bytes, int(self.max_bytes * EVICT_TO), keep=key)
+        return entry
+    
+    def episode_path(self, entry: Dict[str, Any]) -> Optional[Path]:
+        """Path of the entry's stored episode file, if it has one"""
+        if not entry.get("episode_file"):
+            return None
+        return self._entry_path(entry["key"]).parent / entry["episode_file"]
+    
+    def entries(self) -> Iterator[Tuple[Path, Dict[str, Any], int, float]]:
+        """(entry path, entry, size in bytes, last use) for every entry"""
+        if not self.root.exists():
+            return
+        for path in self.root.glob("??/*.json"):
+            if "-" in path.name:
+                continue  # A JSON episode file
+            entry = self._read_entry(path)
+            if entry is None:
+                continue
+            try:
+                last_used = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            yield path, entry, self._entry_size(path, entry), last_used
+    
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, size and age range of the cache"""
+        count = 0
+        size = 0
+        with_episodes = 0
+        stale = 0
+        oldest = None
+        newest = None
+        for _, entry, entry_size, last_used in self.entries():
+            count += 1
+            size += entry_size
+            with_episodes += bool(entry.get("episode_file"))
+            stale += entry.get("fingerprint") != self.fingerprint
+            oldest = last_used if oldest is None else min(oldest, last_used)
+            newest = last_used if newest is None else max(newest, last_used)
+        self._size = size
+        return {
+            "dir": str(self.root),
+            "entries": count,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "with_episodes": with_episodes,
+            "stale": stale,
+            "oldest_use": oldest,
+            "newest_use": newest,
+            "fingerprint": self.fingerprint
+        }
+    
+    def prune(
+        self,
+        max_bytes: Optional[int] = None,
+        older_than: Optional[float] = None,
+        stale: bool = False
+    ) -> Tuple[int, int]:
+        """
+        Remove entries
+        
+        Args:
+            max_bytes: Evict least recently used entries down to this size
+            older_than: Remove entries unused for this many seconds
+            stale: Remove entries written by a different source fingerprint
+        
+        Returns:
+            (entries removed, bytes freed)
+        """
+        removed = 0
+        freed = 0
+        now = time.time()
+        for path, entry, entry_size, last_used in list(self.entries()):
+            if (older_than is not None and now - last_used > older_than) or (stale and entry.get("fingerprint") != self.fingerprint):
+                self._remove(path, entry)
+                removed += 1
+                freed += entry_size
+        self._size = None
+        if max_bytes is not None:
+            evicted, evicted_bytes = self._evict(max_bytes, max_bytes)
+            removed += evicted
+            freed += evicted_bytes
+        return removed, freed
+    
+    def clear(self) -> Tuple[int, int]:
+        """Remove every entry"""
+        return self.prune(max_bytes=0)
+    
+    def _evict(self, limit: int, target: int, keep: Optional[str] = None) -> Tuple[int, int]:
+        """Above limit bytes, remove least recently used entries down to target"""
+        if self._size is None:
+            self._size = sum(entry_size for _, _, entry_size, _ in self.entries())
+        if self._size <= limit:
+            return 0, 0
+        
+        removed = 0
+        freed = 0
+        for path, entry, entry_size, _ in sorted(self.entries(), key=lambda item: item[3]):
+            if self._size <= target:
+                break
+            if entry.get("key") == keep:
+                continue
+            self._remove(path, entry)
+            self._size -= entry_size
+            removed += 1
+            freed += entry_size
+        return removed, freed
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+    
+    @staticmethod
+    def _read_entry(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def _entry_size(self, path: Path, entry: Optional[Dict[str, Any]] = None) -> int:
+        if entry is None:
+            entry = self._read_entry(path)
+            if entry is None:
+                return 0
+        size = 0
+        files = [path] + ([path.parent / entry["episode_file"]] if entry.get("episode_file") else [])
+        for file in files:
+            try:
+                size += file.stat().st_size
+            except FileNotFoundError:
+                pass
+        return size
+    
+    def _remove(self, path: Path, entry: Dict[str, Any]):
+        if entry.get("episode_file"):
+            (path.parent / entry["episode_file"]).unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
+
+
+def open_cache(config: Dict[str, Any], enabled: bool = False) -> Optional[ResultCache]:
+    """The configured cache if enabled (by argument or cache.enabled), else None"""
+    if enabled or (config.get("cache") or {}).get("enabled", False):
+        return ResultCache.from_config(config)
+    return None
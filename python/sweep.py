@@ -0,0 +1,72 @@
+"""Seed sweep runner - many episodes across worker processes"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from silent_sky.runner.sweep import run_sweep, aggregate_results
+from silent_sky.utils.config import load_config
+from silent_sky.utils.result_cache import open_cache
+
+
+RESULT_FIELDS = [
+    "seed", "strategy", "steps", "total_reward", "budget",
+    "earnings", "costs", "profit", "events_discovered", "events_total"
+]
+
+
+def parse_seed_range(value: str) -> range:
+    """Parse "START:STOP" (STOP exclusive) or a single count "N" (0..N-1)"""
+    if ":" in value:
+        start, stop = value.split(":", 1)
+        return range(int(start), int(stop))
+    return range(int(value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a seed sweep")
+    parser.add_argument("--seeds", type=parse_seed_range, default=range(100), help="Seed range START:STOP or count N")
+    parser.add_argument("--strategies", nargs="+", choices=["greedy", "round_robin", "hybrid"], default=["greedy", "round_robin", "hybrid"], help="Dummy agent strategies")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--chunksize", type=int, default=None, help="Episodes handed to a worker at a time")
+    parser.add_argument("--output", type=str, default="sweep_results.csv", help="Results table (CSV)")
+    parser.add_argument("--config", type=str, default=None, help="Config file path")
+    parser.add_argument("--cache", action="store_true", help="Reuse cached results and cache new ones (see cache.py)")
+    
+    args = parser.parse_args()
+    
+    config = load_config(args.config)
+    cache = open_cache(config, args.cache)
+    
+    num_jobs = len(args.seeds) * len(args.strategies)
+    print(f"Running {num_jobs} episodes ({len(args.seeds)} seeds x {len(args.strategies)} strategies)...")
+    
+    results = []
+    start = time.perf_counter()
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for result in run_sweep(config, args.seeds, args.strategies, workers=args.workers, chunksize=args.chunksize, cache=cache):
+            writer.writerow(result)
+            results.append(result)
+            if len(results) % 1000 == 0:
+                print(f"{len(results)}/{num_jobs} episodes")
+    elapsed = time.perf_counter() - start
+    
+    print(f"\nSweep complete: {len(results)} episodes in {elapsed:.1f}s "
+          f"({len(results) / elapsed:.1f} episodes/s)")
+    if cache:
+        print(f"Cache: {cache.hits} hits, {cache.misses} episodes run")
+    print(f"{'strategy':<12} {'episodes':>8} {'reward':>10} {'profit':>12} {'discovered':>11}")
+    for strategy, row in aggregate_results(results).items():
+        print(f"{strategy:<12} {row['episodes']:>8} {row['total_reward']:>10.2f} "
+              f"{row['profit']:>12.2f} {row['events_discovered']:>8.1f}/{row['events_total']:.1f}")
+    print(f"Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
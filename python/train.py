@@ -1,4 +1,4 @@
-"""Training pipeline - placeholder for Phase 2"""
+"""Training pipeline - rollout collection ready, PPO in Phase 2"""
 
 import argparse
 import sys
@@ -6,6 +6,8 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from silent_sky.agent.batched_agent import BatchedDummyAgent
+from silent_sky.training.rollout import RolloutCollector, compute_gae
 from silent_sky.utils.config import load_config
 
 
@@ -15,14 +17,39 @@ def main():
     parser.add_argument("--headless", action="store_true", default=True, help="Run headless (default)")
     parser.add_argument("--episodes", type=int, default=100, help="Number of episodes to train")
     parser.add_argument("--config", type=str, default=None, help="Config file path")
+    parser.add_argument("--num-envs", type=int, default=16, help="Env copies stepped per rollout")
+    parser.add_argument("--rollout-steps", type=int, default=256, help="Steps per env per rollout")
+    parser.add_argument("--workers", type=int, default=None, help="Rollout worker processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--mode", choices=["lockstep", "async"], default="lockstep", help="Rollout stepping mode")
+    parser.add_argument("--strategy", choices=["greedy", "round_robin", "hybrid"], default="greedy", help="Dummy agent standing in for the policy")
+    parser.add_argument("--seed", type=int, default=0, help="Base episode seed")
     
     args = parser.parse_args()
     
-    print("Training pipeline not implemented in Phase 1.")
-    print("Phase 1 focuses on Unity + Dummy Agent.")
+    config = load_config(args.config)
+    
     print("PPO training will be added in Phase 2.")
+    print(f"Collecting rollouts with the {args.strategy} dummy agent "
+          f"({args.num_envs} envs x {args.rollout_steps} steps, {args.mode})...")
     
-    # This will be implemented in Phase 2 with Stable-Baselines3
+    # Until PPO lands, the dummy agent stands in for the policy; episode i
+    # of env k is seeded like the collector's envs
+    policy = BatchedDummyAgent(args.strategy, seeds=[args.seed + i for i in range(args.num_envs)])
+    with RolloutCollector(
+        config, args.num_envs, args.rollout_steps,
+        num_workers=args.workers, mode=args.mode, seed=args.seed
+    ) as collector:
+        episodes = 0
+        while episodes < args.episodes:
+            rollout = collector.collect(policy)
+            advantages, returns = compute_gae(
+                rollout["rewards"], rollout["values"], rollout["dones"], rollout["last_values"]
+            )
+            stats = rollout["stats"]
+            episodes += stats["episodes"]
+            print(f"{episodes}/{args.episodes} episodes, {stats['fps']:.0f} env frames/s, "
+                  f"mean return {stats['mean_return']:.2f}")
+        print(f"Collected {collector.total_frames} frames at {collector.fps:.0f} env frames/s")
 
 
 if __name__ == "__main__":
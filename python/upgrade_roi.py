@@ -0,0 +1,94 @@
+"""Upgrade ROI evaluator - every upgrade combination on shared seeds"""
+
+import argparse
+import csv
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from silent_sky.runner.upgrade_roi import UPGRADES, combination_name, evaluate_upgrades, upgrade_combinations
+from silent_sky.utils.config import load_config
+from sweep import parse_seed_range
+
+
+INTERVAL_FIELDS = ["profit", "net_profit", "net_profit_gain", "events_discovered", "discovery_gain", "cost_per_discovery"]
+
+
+def format_interval(value) -> str:
+    if value is None:
+        return "-"
+    mean, half_width = value
+    if math.isnan(half_width):
+        return f"{mean:.2f}"
+    return f"{mean:.2f} ± {half_width:.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate upgrade combinations on shared seeds")
+    parser.add_argument("--seeds", type=parse_seed_range, default=range(1000), help="Seed range START:STOP or count N")
+    parser.add_argument("--strategies", nargs="+", choices=["greedy", "round_robin", "hybrid"], default=["greedy", "round_robin", "hybrid"], help="Dummy agent strategies")
+    parser.add_argument("--upgrades", nargs="+", choices=UPGRADES, default=list(UPGRADES), help="Upgrades to combine")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--chunksize", type=int, default=None, help="Episodes handed to a worker at a time")
+    parser.add_argument("--cache-dir", type=str, default="data/upgrade_roi", help="Per-cell result cache")
+    parser.add_argument("--output", type=str, default=None, help="Summary table (CSV)")
+    parser.add_argument("--config", type=str, default=None, help="Config file path")
+    
+    args = parser.parse_args()
+    
+    config = load_config(args.config)
+    # Keep the canonical upgrade order so cache cell names are stable
+    upgrades = [upgrade for upgrade in UPGRADES if upgrade in args.upgrades]
+    combinations = upgrade_combinations(upgrades)
+    
+    print(f"Evaluating {len(combinations)} combinations x {len(args.strategies)} strategies "
+          f"on {len(args.seeds)} seeds (cache: {args.cache_dir})...")
+    
+    def progress(done, total):
+        if done % 1000 == 0 or done == total:
+            print(f"{done}/{total} episodes")
+    
+    start = time.perf_counter()
+    summaries = evaluate_upgrades(
+        config, args.seeds, args.strategies, args.cache_dir,
+        combinations=combinations, workers=args.workers, chunksize=args.chunksize, progress=progress
+    )
+    print(f"Done in {time.perf_counter() - start:.1f}s (95% confidence intervals)")
+    
+    for strategy in args.strategies:
+        rows = [(combination, summaries[(strategy, combination)]) for combination in combinations]
+        rows.sort(key=lambda row: row[1]["net_profit"][0], reverse=True)
+        print(f"\n{strategy}")
+        print(f"{'upgrades':<62} {'net profit':>18} {'gain vs none':>18} {'discovered':>14} {'cost/discovery':>16}")
+        for combination, summary in rows:
+            print(f"{combination_name(combination):<62} {format_interval(summary['net_profit']):>18} "
+                  f"{format_interval(summary.get('net_profit_gain')):>18} "
+                  f"{format_interval(summary['events_discovered']):>14} "
+                  f"{format_interval(summary['cost_per_discovery']):>16}")
+    
+    if args.output:
+        fieldnames = ["strategy", "upgrades", "episodes", "upgrade_cost"]
+        for field in INTERVAL_FIELDS:
+            fieldnames += [field, f"{field}_ci95"]
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for (strategy, combination), summary in summaries.items():
+                row = {
+                    "strategy": strategy,
+                    "upgrades": combination_name(combination),
+                    "episodes": summary["episodes"],
+                    "upgrade_cost": summary["upgrade_cost"]
+                }
+                for field in INTERVAL_FIELDS:
+                    if field in summary:
+                        row[field], row[f"{field}_ci95"] = summary[field]
+                writer.writerow(row)
+        print(f"\nSummary saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+using System;
+using System.Collections.Generic;
+using System.Text;
+using UnityEngine;
+
+namespace SilentSky.Unity.Bridge
+{
+    /// <summary>
+    /// Decoder for schema_version 2 state messages (binary frames + event deltas)
+    /// Matches python/silent_sky/bridge/protocol.py
+    ///
+    /// Frames: [0] header JSON, [1] sectors float32 (3 x N) or, when sectors_sparse,
+    /// 16-byte changed-sector records, [2] observation float32,
+    /// [3] events (12-byte records), [4] discovered events (12-byte records),
+    /// [5] updated events (16-byte records: position + event record)
+    /// </summary>
+    public class SnapshotDecoder
+    {
+        public const int SchemaVersion = 2;
+        private const int EventRecordSize = 12;
+        private const int DiscoveredRecordSize = 12;
+        private const int UpdateRecordSize = 16;
+        private const int SectorRecordSize = 16;
+        
+        private readonly List<EventData> events = new List<EventData>();
+        private readonly List<EventData> discoveredEvents = new List<EventData>();
+        
+        // Episode position of events[0]; long-horizon runs trim old events,
+        // so keyframes may start past the beginning of the episode
+        private int eventsBase;
+        
+        // Sector values (3 x N) kept across messages for sparse updates
+        private float[] sectorValues;
+        
+        /// <summary>
+        /// True once a keyframe has been received; deltas before that are skipped
+        /// </summary>
+        public bool IsSynced { get; private set; }
+        
+        /// <summary>
+        /// Decode one multipart message into a full state
+        /// Returns null while waiting for the first keyframe
+        /// </summary>
+        public EnvironmentState Decode(IList<byte[]> frames)
+        {
+            if (frames == null || frames.Count < 5)
+            {
+                throw new ArgumentException("Expected 5 frames for schema_version 2");
+            }
+            
+            var header = JsonUtility.FromJson<SnapshotHeader>(Encoding.UTF8.GetString(frames[0]));
+            if (header.schema_version != SchemaVersion)
+            {
+                throw new ArgumentException($"Unsupported schema_version: {header.schema_version}");
+            }
+            
+            if (header.keyframe)
+            {
+                events.Clear();
+                discoveredEvents.Clear();
+                eventsBase = header.events_offset;
+                IsSynced = true;
+            }
+            else if (!IsSynced)
+            {
+                return null;
+            }
+            
+            int numSectors = header.num_sectors;
+            if (!header.sectors_sparse)
+            {
+                sectorValues = ReadFloats(frames[1]);
+            }
+            else if (sectorValues == null || sectorValues.Length != 3 * numSectors)
+            {
+                // Sparse update without its keyframe; wait for the next one
+                IsSynced = false;
+                return null;
+            }
+            else
+            {
+                ApplySparseSectors(frames[1], numSectors);
+            }
+            float[] obs = ReadFloats(frames[2]);
+            
+            DecodeEvents(frames[3], header.event_types);
+            if (frames.Count > 5)
+            {
+                DecodeUpdates(frames[5], header.event_types);
+            }
+            DecodeDiscovered(frames[4], header.event_types);
+            
+            var sectors = new SectorData[numSectors];
+            for (int i = 0; i < numSectors; i++)
+            {
+                sectors[i] = new SectorData
+                {
+                    sector_id = i,
+                    sensor_reading = sectorValues[i],
+                    sensor_confidence = sectorValues[numSectors + i],
+                    activity_rate = sectorValues[2 * numSectors + i]
+                };
+            }
+            
+            return new EnvironmentState
+            {
+                schema_version = header.schema_version,
+                timestep = header.timestep,
+                state = new StateData
+                {
+                    sectors = sectors,
+                    // Copies: the lists' records keep changing on this thread
+                    // while the main thread reads the state
+                    events = CopyEvents(events),
+                    discovered_events = CopyEvents(discoveredEvents),
+                    budget = header.budget,
+                    total_earnings = header.total_earnings,
+                    total_costs = header.total_costs,
+                    upgrades = header.upgrades,
+                    time_remaining = header.time_remaining
+                },
+                observation = new ObservationData
+                {
+                    sensor_readings = Slice(obs, 0, numSectors),
+                    sensor_confidence = Slice(obs, numSectors, numSectors),
+                    time_remaining = Slice(obs, 2 * numSectors, 1),
+                    budget_remaining = Slice(obs, 2 * numSectors + 1, obs.Length - 2 * numSectors - 1)
+                },
+                info = header.info,
+                seq = header.seq,
+                sent_at = header.sent_at
+            };
+        }
+        
+        private void ApplySparseSectors(byte[] frame, int numSectors)
+        {
+            for (int offset = 0; offset + SectorRecordSize <= frame.Length; offset += SectorRecordSize)
+            {
+                int index = ReadInt32(frame, offset);
+                if (index < 0 || index >= numSectors)
+                {
+                    continue;
+                }
+                sectorValues[index] = ReadSingle(frame, offset + 4);
+                sectorValues[numSectors + index] = ReadSingle(frame, offset + 8);
+                sectorValues[2 * numSectors + index] = ReadSingle(frame, offset + 12);
+            }
+        }
+        
+        private void DecodeEvents(byte[] frame, string[] eventTypes)
+        {
+            for (int offset = 0; offset + EventRecordSize <= frame.Length; offset += EventRecordSize)
+            {
+                events.Add(ReadEvent(frame, offset, eventTypes));
+            }
+        }
+        
+        private void DecodeUpdates(byte[] frame, string[] eventTypes)
+        {
+            for (int offset = 0; offset + UpdateRecordSize <= frame.Length; offset += UpdateRecordSize)
+            {
+                int index = ReadInt32(frame, offset) - eventsBase;
+                if (index >= 0 && index < events.Count)
+                {
+                    events[index] = ReadEvent(frame, offset + 4, eventTypes);
+                }
+            }
+        }
+        
+        private static EventData ReadEvent(byte[] frame, int offset, string[] eventTypes)
+        {
+            return new EventData
+            {
+                timestep = ReadInt32(frame, offset),
+                value = ReadSingle(frame, offset + 4),
+                sector = ReadUInt16(frame, offset + 8),
+                event_type = EventTypeName(eventTypes, frame[offset + 10]),
+                discovered = frame[offset + 11] != 0
+            };
+        }
+        
+        private static EventData[] CopyEvents(List<EventData> source)
+        {
+            var result = new EventData[source.Count];
+            for (int i = 0; i < result.Length; i++)
+            {
+                var e = source[i];
+                result[i] = new EventData
+                {
+                    event_type = e.event_type,
+                    sector = e.sector,
+                    timestep = e.timestep,
+                    value = e.value,
+                    discovered = e.discovered
+                };
+            }
+            return result;
+        }
+        
+        private void DecodeDiscovered(byte[] frame, string[] eventTypes)
+        {
+            for (int offset = 0; offset + DiscoveredRecordSize <= frame.Length; offset += DiscoveredRecordSize)
+            {
+                int index = ReadInt32(frame, offset) - eventsBase;
+                if (index >= 0 && index < events.Count)
+                {
+                    events[index].discovered = true;
+                }
+                
+                discoveredEvents.Add(new EventData
+                {
+                    value = ReadSingle(frame, offset + 4),
+                    sector = ReadUInt16(frame, offset + 8),
+                    event_type = EventTypeName(eventTypes, frame[offset + 10]),
+                    discovered = true
+                });
+            }
+        }
+        
+        private static string EventTypeName(string[] eventTypes, byte code)
+        {
+            return eventTypes != null && code < eventTypes.Length ? eventTypes[code] : code.ToString();
+        }
+        
+        // Wire data is little-endian; swap on big-endian hosts
+        private static float[] ReadFloats(byte[] frame)
+        {
+            var values = new float[frame.Length / 4];
+            for (int i = 0; i < values.Length; i++)
+            {
+                values[i] = ReadSingle(frame, i * 4);
+            }
+            return values;
+        }
+        
+        private static float ReadSingle(byte[] data, int offset)
+        {
+            if (BitConverter.IsLittleEndian)
+            {
+                return BitConverter.ToSingle(data, offset);
+            }
+            byte[] swapped = { data[offset + 3], data[offset + 2], data[offset + 1], data[offset] };
+            return BitConverter.ToSingle(swapped, 0);
+        }
+        
+        private static int ReadInt32(byte[] data, int offset)
+        {
+            return data[offset] | (data[offset + 1] << 8) | (data[offset + 2] << 16) | (data[offset + 3] << 24);
+        }
+        
+        private static int ReadUInt16(byte[] data, int offset)
+        {
+            return data[offset] | (data[offset + 1] << 8);
+        }
+        
+        private static float[] Slice(float[] source, int start, int length)
+        {
+            var result = new float[Math.Max(0, length)];
+            Array.Copy(source, start, result, 0, result.Length);
+            return result;
+        }
+    }
+    
+    [Serializable]
+    public class SnapshotHeader
+    {
+        public int schema_version;
+        public int timestep;
+        public bool keyframe;
+        public int num_sectors;
+        public bool sectors_sparse;
+        public int events_offset;
+        public int discovered_offset;
+        public string[] event_types;
+        public float budget;
+        public float total_earnings;
+        public float total_costs;
+        public UpgradeData upgrades;
+        public float time_remaining;
+        public InfoData info;
+        public long seq;
+        public double sent_at;
+    }
+}
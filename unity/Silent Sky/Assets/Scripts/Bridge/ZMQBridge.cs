@@ -40,6 +40,9 @@ namespace SilentSky.Unity.Bridge
         
         private Coroutine mockDataCoroutine;
         
+        // Decoder for schema_version 2 (binary frames with event deltas)
+        private readonly SnapshotDecoder snapshotDecoder = new SnapshotDecoder();
+        
         private void Start()
         {
             Debug.Log("ZMQBridge: Start() called");
@@ -127,6 +130,21 @@ namespace SilentSky.Unity.Bridge
             Debug.LogWarning("SendDirective: Real connection not implemented yet.");
         }
         
+        /// <summary>
+        /// Handle a schema_version 2 multipart message from the PUB socket.
+        /// Safe to call from the receive thread; listeners run on the main thread.
+        /// </summary>
+        public void ReceiveFrames(IList<byte[]> frames)
+        {
+            var state = snapshotDecoder.Decode(frames);
+            if (state == null)
+            {
+                return; // Waiting for the first keyframe
+            }
+            
+            UnityMainThreadDispatcher.Instance().Enqueue(() => _onStateUpdate?.Invoke(state));
+        }
+        
         private IEnumerator GenerateMockData()
         {
             Debug.Log("ZMQBridge: GenerateMockData() started");
@@ -169,6 +187,8 @@ namespace SilentSky.Unity.Bridge
         public StateData state;
         public ObservationData observation;
         public InfoData info;
+        public long seq;        // Publisher message counter
+        public double sent_at;  // Publisher wall clock (Unix seconds)
     }
     
     [Serializable]